@@ -0,0 +1,95 @@
+"""
+Seeded generator for synthetic sales files in the same dirty format as
+data/sales_data.txt (thousands separators, commas in product names, zero
+and negative quantities, malformed IDs, wrong field counts, blank lines).
+
+    python benchmarks/generate_sales_data.py --rows 1000000 --output /tmp/sales_1m.txt
+"""
+import argparse
+import random
+from datetime import date, timedelta
+
+HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n"
+PRODUCT_WORDS = ["Wireless", "Mouse", "USB", "Cable", "Laptop", "Charger", "Webcam", "Headphones",
+                 "Keyboard", "Monitor", "External", "Hard", "Drive", "Gaming", "Pro", "65W"]
+BASE_REGIONS = ["North", "South", "East", "West", "Central", "North-East", "North-West", "South-East"]
+
+
+def _product_catalog(rng, n_products):
+    catalog = []
+    for i in range(n_products):
+        name = " ".join(rng.sample(PRODUCT_WORDS, rng.randint(1, 3)))
+        if rng.random() < 0.1:
+            name = name.replace(" ", ",", 1)  # commas inside the product name
+        catalog.append((f"P{101 + i}", name, rng.choice([99, 173, 523, 1043, 1916, 2413, 2826, 15000, 45999])))
+    return catalog
+
+
+def _format_price(rng, price):
+    if price >= 1000 and rng.random() < 0.3:
+        return f"{price:,}"  # 1,916 style thousands separator
+    return str(price)
+
+
+def generate_lines(rows, products=50, customers=500, regions=4, seed=42, start=date(2024, 12, 1), days=31):
+    rng = random.Random(seed)
+    catalog = _product_catalog(rng, products)
+    region_names = (BASE_REGIONS * (regions // len(BASE_REGIONS) + 1))[:regions]
+    region_names = [r if i < len(BASE_REGIONS) else f"{r}{i}" for i, r in enumerate(region_names)]
+    yield HEADER
+    for i in range(rows):
+        product_id, name, price = rng.choice(catalog)
+        fields = [
+            f"T{i + 1:03d}",
+            (start + timedelta(days=rng.randrange(days))).isoformat(),
+            product_id,
+            name,
+            str(rng.choice([1, 2, 3, 4, 5, 6, 7, 8, 9, 10])),
+            _format_price(rng, price),
+            f"C{rng.randint(1, customers):03d}",
+            rng.choice(region_names)
+        ]
+        roll = rng.random()
+        if roll < 0.02:
+            fields[4] = "0"  # zero quantity
+        elif roll < 0.03:
+            fields[4] = "-1"
+        elif roll < 0.04:
+            fields[0] = fields[0].replace("T", "X", 1)  # malformed TransactionID
+        elif roll < 0.05:
+            fields[6] = fields[6].replace("C", "", 1)  # malformed CustomerID
+        elif roll < 0.06:
+            fields[2] = fields[2].replace("P", "", 1)  # malformed ProductID
+        elif roll < 0.065:
+            fields.pop()  # too few fields
+        elif roll < 0.07:
+            fields.append("extra")  # too many fields
+        elif roll < 0.072:
+            fields[5] = "abc"  # not a number
+        yield "|".join(fields) + "\n"
+        if rng.random() < 0.001:
+            yield "\n"
+
+
+def write_sales_file(filename, rows, products=50, customers=500, regions=4, seed=42):
+    with open(filename, "w", encoding="utf-8", newline="") as file:
+        for line in generate_lines(rows, products, customers, regions, seed):
+            file.write(line)
+    return filename
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--products", type=int, default=50)
+    parser.add_argument("--customers", type=int, default=500)
+    parser.add_argument("--regions", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="data/generated_sales_data.txt")
+    args = parser.parse_args()
+    write_sales_file(args.output, args.rows, args.products, args.customers, args.regions, args.seed)
+    print(f"Wrote {args.rows} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Measures cold import time of the pipeline modules with `python -X importtime`
+and checks that heavy dependencies stay lazy.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --save-baseline
+    python benchmarks/import_time.py --compare   # exit 1 on regression
+
+Every measurement imports one module in a fresh interpreter and takes the
+cumulative time -X importtime reports for it; the median of --repeat runs
+is kept. A module that pulls in one of LAZY_DEPENDENCIES at import fails
+--compare regardless of timing.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "import_baseline.json")
+MODULES = [
+    "main",
+    "utils.file_handler",
+    "utils.data_processor",
+    "utils.api_handler",
+    "utils.catalog_cache",
+    "utils.product_lookup",
+    "utils.result_cache",
+    "utils.report",
+]
+LAZY_DEPENDENCIES = ("requests", "urllib3", "numpy")  # loaded on first use only
+DEFAULT_REPEAT = 7
+DEFAULT_THRESHOLD = 0.20  # fail when a module imports this much slower than baseline...
+DEFAULT_SLACK_MS = 5.0  # ...plus this many ms, so few-ms modules don't flag on noise
+
+
+def measure(module):
+    """(cumulative import microseconds, [modules loaded]) for one fresh `import module`."""
+    command = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+    stderr = subprocess.run(command, check=True, capture_output=True, text=True, cwd=ROOT).stderr
+    cumulative = None
+    loaded = []
+    for line in stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, total, name = line.split("|")
+        name = name.strip()
+        loaded.append(name)
+        if name == module:
+            cumulative = int(total)
+    return cumulative, loaded
+
+
+def run(modules, repeat):
+    """{module: {ms, lazy_violations}}; the first run of each module only warms the bytecode cache."""
+    results = {}
+    for module in modules:
+        measure(module)
+        timings = []
+        loaded = []
+        for _ in range(repeat):
+            cumulative, loaded = measure(module)
+            timings.append(cumulative)
+        results[module] = {
+            "ms": round(statistics.median(timings) / 1000, 2),
+            "lazy_violations": sorted({name.split(".")[0] for name in loaded} & set(LAZY_DEPENDENCIES))
+        }
+    return results
+
+
+def compare(results, baseline, threshold, slack_ms=DEFAULT_SLACK_MS):
+    """Returns a list of (module, baseline_ms, ms) regressions."""
+    regressions = []
+    for module, metrics in results.items():
+        base = baseline.get(module)
+        if base and metrics["ms"] > base["ms"] * (1 + threshold) + slack_ms:
+            regressions.append((module, base["ms"], metrics["ms"]))
+    return regressions
+
+
+def print_table(results):
+    print(f"{'Module':24}{'Import ms':>10}  Eager heavy imports")
+    for module, m in results.items():
+        print(f"{module:24}{m['ms']:>10.2f}  {', '.join(m['lazy_violations']) or '-'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline import time benchmark")
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--slack-ms", type=float, default=DEFAULT_SLACK_MS)
+    args = parser.parse_args()
+
+    results = run(args.modules, max(1, args.repeat))
+    print_table(results)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as file:
+                baseline = json.load(file)
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(baseline, file, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    if args.compare:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        failed = False
+        for module, base, now in compare(results, baseline, args.threshold, args.slack_ms):
+            print(f"REGRESSION {module}: {now:.2f} ms vs baseline {base:.2f} ms")
+            failed = True
+        for module, m in results.items():
+            if m["lazy_violations"]:
+                print(f"EAGER IMPORT {module} loads {', '.join(m['lazy_violations'])} at import")
+                failed = True
+        if failed:
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
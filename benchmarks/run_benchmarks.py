@@ -0,0 +1,217 @@
+"""
+Times every pipeline stage on generated sales files and reports rows/s and
+peak RSS, optionally comparing against a stored baseline.
+
+    python benchmarks/run_benchmarks.py --sizes 10000 1000000
+    python benchmarks/run_benchmarks.py --sizes 10000 --save-baseline
+    python benchmarks/run_benchmarks.py --sizes 10000 --compare   # exit 1 on regression
+
+--compare also fails when a stage has no baseline entry for a size, so a
+new stage cannot go unchecked until --save-baseline records it.
+
+Each size runs in a fresh interpreter so peak RSS is per size, not
+cumulative. Peak RSS is reported after each stage (it can only grow).
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.generate_sales_data import write_sales_file  # noqa: E402
+
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baseline.json")
+DEFAULT_SIZES = [10_000, 1_000_000, 10_000_000]
+DEFAULT_THRESHOLD = 0.20  # fail when a stage is this much slower than baseline
+
+
+def _peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_stages(filename, workdir):
+    """Runs the pipeline stage by stage; returns {stage: {seconds, rows, rows_per_s, peak_rss_mb}}."""
+    from utils.file_handler import (
+        read_sales_data, parse_transactions, validate_and_filter, iter_sales_columns, parse_sales_file
+    )
+    from utils.data_processor import (
+        SalesAggregator, calculate_total_revenue, region_wise_sales, top_selling_products,
+        customer_analysis, daily_sales_trend, find_peak_sales_day, low_performing_products
+    )
+    from utils.api_handler import enrich_sales_data, save_enriched_data, generate_sales_report
+    from utils.records import TransactionArrays
+    from utils.result_cache import compute_analytics
+
+    results = {}
+
+    def timed(stage, rows, func, count=len):
+        # rows=None means "count the stage's output" (with `count`)
+        start = time.perf_counter()
+        value = func()
+        seconds = time.perf_counter() - start
+        if rows is None:
+            rows = count(value)
+        results[stage] = {
+            "seconds": round(seconds, 4),
+            "rows": rows,
+            "rows_per_s": round(rows / seconds) if seconds else None,
+            "peak_rss_mb": round(_peak_rss_mb(), 1)
+        }
+        return value
+
+    # Block tokenizer first, so its peak RSS isn't inflated by the rows below
+    timed("iter_sales_columns", None, lambda: [row for block in iter_sales_columns(filename) for row in block[0]])
+
+    # The path main.py runs: column blocks -> TransactionArrays -> steps 4-9 on the arrays
+    product_mapping = _benchmark_catalog()
+    blocks = timed("read_columns", None, lambda: list(iter_sales_columns(filename)),
+                   count=lambda blocks: sum(len(block[0]) for block in blocks))
+    arrays = timed("transaction_arrays", None, lambda: TransactionArrays.from_column_blocks(blocks))
+    del blocks
+    valid_arrays, _, _ = timed("validate_arrays", len(arrays), lambda: validate_and_filter(arrays))
+    del arrays
+    aggregator = timed("analysis_arrays", len(valid_arrays),
+                       lambda: compute_analytics(SalesAggregator().update(valid_arrays))['aggregator'])
+    enriched = timed("enrich_arrays", len(valid_arrays), lambda: enrich_sales_data(valid_arrays, product_mapping))
+    timed("save_enriched_arrays", len(valid_arrays),
+          lambda: save_enriched_data(enriched, os.path.join(workdir, "enriched_sales_data.txt")))
+    timed("generate_report_arrays", len(valid_arrays),
+          lambda: generate_sales_report(enriched, aggregator, os.path.join(workdir, "sales_report.txt")))
+    del valid_arrays, aggregator, enriched
+
+    timed("parse_sales_file", None, lambda: parse_sales_file(filename))
+    raw = timed("read_sales_data", None, lambda: read_sales_data(filename, "utf-8"))
+    transactions = timed("parse_transactions", len(raw), lambda: parse_transactions(raw))
+    del raw
+    valid_tx, _, _ = timed("validate_and_filter", len(transactions), lambda: validate_and_filter(transactions))
+    del transactions
+
+    def analyse():
+        aggregator = SalesAggregator().update(valid_tx)
+        calculate_total_revenue(aggregator)
+        region_wise_sales(aggregator)
+        top_selling_products(aggregator)
+        customer_analysis(aggregator)
+        daily_sales_trend(aggregator)
+        find_peak_sales_day(aggregator)
+        low_performing_products(aggregator)
+        return aggregator
+    aggregator = timed("analysis", len(valid_tx), analyse)
+
+    enriched = timed("enrich_sales_data", len(valid_tx), lambda: enrich_sales_data(valid_tx, product_mapping))
+    timed("save_enriched_data", len(valid_tx),
+          lambda: save_enriched_data(enriched, os.path.join(workdir, "enriched_sales_data.txt")))
+    timed("generate_sales_report", len(valid_tx),
+          lambda: generate_sales_report(enriched, aggregator, os.path.join(workdir, "sales_report.txt")))
+    return results
+
+
+def _benchmark_catalog():
+    # Offline catalog covering most generated ProductIDs, so no network is involved
+    return {
+        i: {'title': f"Product {i}", 'category': "benchmark", 'brand': "Bench", 'rating': 4.5}
+        for i in range(101, 141)
+    }
+
+
+def _run_size_in_subprocess(rows, seed, keep_files):
+    command = [sys.executable, os.path.abspath(__file__), "--worker", str(rows), "--seed", str(seed)]
+    if keep_files:
+        command.append("--keep-files")
+    output = subprocess.run(command, check=True, capture_output=True, text=True, cwd=ROOT).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _worker(rows, seed, keep_files):
+    workdir = tempfile.mkdtemp(prefix="sales_bench_")
+    filename = os.path.join(workdir, f"sales_{rows}.txt")
+    write_sales_file(filename, rows, seed=seed)
+    try:
+        print(json.dumps(run_stages(filename, workdir)))
+    finally:
+        if not keep_files:
+            for name in os.listdir(workdir):
+                os.remove(os.path.join(workdir, name))
+            os.rmdir(workdir)
+
+
+def compare(results, baseline, threshold):
+    """Returns a list of (size, stage, baseline_rows_per_s, rows_per_s) regressions."""
+    regressions = []
+    for size, stages in results.items():
+        for stage, metrics in stages.items():
+            base = baseline.get(size, {}).get(stage)
+            if not base or not base.get("rows_per_s") or not metrics.get("rows_per_s"):
+                continue
+            if metrics["rows_per_s"] < base["rows_per_s"] * (1 - threshold):
+                regressions.append((size, stage, base["rows_per_s"], metrics["rows_per_s"]))
+    return regressions
+
+
+def missing_from_baseline(results, baseline):
+    """Returns a list of (size, stage) timed now but absent from the baseline."""
+    return [(size, stage) for size, stages in results.items() for stage in stages
+            if stage not in baseline.get(size, {})]
+
+
+def print_table(results):
+    print(f"{'Rows':>10}  {'Stage':24}{'Seconds':>10}{'Rows/s':>14}{'Peak RSS MB':>13}")
+    for size, stages in results.items():
+        for stage, m in stages.items():
+            print(f"{size:>10}  {stage:24}{m['seconds']:>10.3f}{m['rows_per_s'] or 0:>14,}{m['peak_rss_mb']:>13.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sales pipeline benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--keep-files", action="store_true")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _worker(args.worker, args.seed, args.keep_files)
+        return 0
+
+    results = {str(rows): _run_size_in_subprocess(rows, args.seed, args.keep_files) for rows in args.sizes}
+    print_table(results)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as file:
+                baseline = json.load(file)
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(baseline, file, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    if args.compare:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        for size, stage, base, now in regressions:
+            print(f"REGRESSION {stage} @ {size} rows: {now:,} rows/s vs baseline {base:,}")
+        missing = missing_from_baseline(results, baseline)
+        for size, stage in missing:
+            print(f"NO BASELINE {stage} @ {size} rows (record one with --save-baseline)")
+        if regressions or missing:
+            return 1
+        print("No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,54 +1,470 @@
 # main.py
 
+import argparse
+import asyncio
+import glob
 import os
-from utils.file_handler import read_sales_data, parse_transactions, validate_and_filter
-from utils.data_processor import (
-    calculate_total_revenue,
-    region_wise_sales,
-    top_selling_products,
-    customer_analysis,
-    daily_sales_trend,
-    find_peak_sales_day,
-    low_performing_products
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from utils.file_handler import (
+    iter_sales_columns,
+    new_parse_rejects,
+    validate_and_filter
 )
+from utils.data_processor import SalesAggregator
+from utils.records import TransactionArrays
 from utils.api_handler import (
-    fetch_all_products,
-    create_product_mapping,
     enrich_sales_data,
     save_enriched_data,
-    generate_sales_report
+    generate_sales_report,
+    enrichment_summary
 )
+from utils.catalog_cache import get_product_mapping
+from utils.product_lookup import lookup_product_mapping
+from utils.metrics import PipelineMetrics
+from utils.sketches import ApproxSalesAggregator
+from utils.result_cache import ResultCache, analytics_key, compute_analytics, dataset_fingerprint
+from utils.parallel import parallel_ingest
+from utils.incremental import default_checkpoint_path, incremental_aggregate, record_enrichment
+from utils.partitions import GRANULARITIES, PartitionedStore
 
-def main():
+DEFAULT_INPUT = "data/sales_data.txt"
+DEFAULT_ENRICHED_OUTPUT = "data/enriched_sales_data.txt"
+DEFAULT_REPORT_OUTPUT = "output/sales_report.txt"
+BATCH_ENRICHED_OUTPUT = "data/enriched_{stem}.txt"
+BATCH_REPORT_OUTPUT = "output/{stem}_report.txt"
+
+
+def read_columns(filename, file_encoder, rejects):
+    """
+    Reads and tokenizes a sales file block by block (see
+    file_handler.iter_sales_columns). Returns (column blocks, rows read),
+    where rows read counts the rejected rows too.
+    """
+    columns = list(iter_sales_columns(filename, file_encoder, rejects))
+    row_count = sum(len(block[0]) for block in columns) + sum(rejects.values())
+    return columns, row_count
+
+
+def read_transactions(filename, file_encoder, rejects, metrics):
+    """Steps 1-2: read_columns, then the columns as a TransactionArrays."""
+    with metrics.stage("read") as stage:
+        columns, row_count = read_columns(filename, file_encoder, rejects)
+        stage["rows_out"] = row_count
+    with metrics.stage("parse", rows_in=row_count) as stage:
+        transactions = TransactionArrays.from_column_blocks(columns)
+        stage["rows_out"] = len(transactions)
+    return transactions
+
+
+def ingest_in_parallel(filename, file_encoder, metrics, workers, region=None, min_amount=None, max_amount=None,
+                       approximate=False, log=print, cache=None, cache_key=None, all_rows=True):
+    """
+    Steps 1-5 with the file cut into byte-range chunks that `workers`
+    processes read, parse, validate and aggregate (parallel.parallel_ingest);
+    the partial aggregates are merged in file order, so results and tie
+    order match the serial steps. Returns (transactions, analysis, rejects):
+    every parsed row, and analysis as analyze_transactions returns it.
+    With all_rows=False (batch mode, where the filters are known up front)
+    only the valid rows come back from the workers, and transactions is
+    those rows. The analytics are stored in `cache` under cache_key when given.
+    """
+    log(f"\n[1-5/10] Reading, validating and analyzing in {workers} processes...")
+    with metrics.stage("parallel_ingest") as stage:
+        transactions, valid_tx, aggregator, filter_summary, rejects = parallel_ingest(
+            filename, workers, file_encoder, region, min_amount, max_amount,
+            aggregator_class=ApproxSalesAggregator if approximate else SalesAggregator, all_rows=all_rows)
+        analytics = compute_analytics(aggregator)
+        if cache and cache_key:
+            cache.put(cache_key, dict(analytics, filter_summary=filter_summary))
+        stage["rows_in"] = filter_summary['total_input'] + sum(rejects.values())
+        stage["rows_out"] = len(valid_tx)
+    if transactions is None:
+        transactions = valid_tx
+    log(f"✓ Parsed {filter_summary['total_input']} records{describe_rejects(rejects)}")
+    log(f"✓ Valid: {filter_summary['final_count']} | Invalid: {filter_summary['invalid']}")
+    if not valid_tx:
+        log("✗ No valid transactions after filtering. Exiting.")
+        return transactions, None, rejects
+    analysis = {
+        "valid_tx": valid_tx,
+        "filter_summary": filter_summary,
+        "aggregator": analytics['aggregator'],
+        "total_revenue": analytics['total_revenue']
+    }
+    return transactions, analysis, rejects
+
+
+def ingest_incremental(filename, file_encoder, metrics, region=None, min_amount=None, max_amount=None, log=print):
+    """
+    Steps 1-5 for an append-only file (incremental.incremental_aggregate):
+    only the lines appended since the last run are parsed, validated and
+    merged into the aggregates kept in the file's checkpoint. Returns
+    (new valid transactions, analysis as analyze_transactions returns it,
+    with valid_tx the new rows and the totals covering every run), or
+    analysis None while the checkpoint holds no valid transactions. The
+    new rows are appended to the enriched output of earlier runs.
+    """
+    log(f"\n[1-5/10] Reading and analyzing rows appended to {filename}...")
+    with metrics.stage("incremental_ingest") as stage:
+        aggregator, filter_summary, new_tx = incremental_aggregate(filename, None, region, min_amount, max_amount,
+                                                                  file_encoder)
+        analytics = compute_analytics(aggregator)
+        stage["rows_out"] = len(new_tx)
+    log(f"✓ New valid: {len(new_tx)} | Total valid: {filter_summary['final_count']} | "
+        f"Invalid: {filter_summary['invalid']} | Duplicate IDs: {filter_summary.get('duplicates', 0)}")
+    if not aggregator.transaction_count:
+        log("✗ No valid transactions after filtering. Exiting.")
+        return new_tx, None
+    analysis = {
+        "valid_tx": new_tx,
+        "filter_summary": filter_summary,
+        "aggregator": analytics['aggregator'],
+        "total_revenue": analytics['total_revenue'],
+        # Valid rows from earlier runs are in the enriched output already;
+        # after a restart from byte 0 they are all in new_tx
+        "append_enriched": filter_summary['final_count'] > len(new_tx),
+        # The report's enrichment figures then cover the whole enriched output too
+        "enrichment_checkpoint": default_checkpoint_path(filename)
+    }
+    return new_tx, analysis
+
+
+def describe_rejects(rejects):
+    if not any(rejects.values()):
+        return ""
+    return (f" (skipped {rejects['field_count']} with wrong field count, "
+            f"{rejects['bad_number']} with bad numbers)")
+
+
+def analyze_transactions(transactions, metrics, region=None, min_amount=None, max_amount=None, log=print,
+                         cache=None, cache_key=None, approximate=False):
+    """
+    Steps 4-5 of the pipeline: validate/filter and aggregate. Returns a dict
+    with valid_tx, filter_summary, aggregator and total_revenue, or None
+    when nothing survives validation. With a ResultCache and the input's
+    analytics_key, the aggregation is reused across runs.
+    """
+    # -----------------------------
+    # 4. Validate and Filter Transactions
+    # -----------------------------
+    log("\n[4/10] Validating transactions...")
+    with metrics.stage("validate", rows_in=len(transactions)) as stage:
+        valid_tx, invalid_count, filter_summary = validate_and_filter(
+            transactions,
+            region=region,
+            min_amount=min_amount,
+            max_amount=max_amount
+        )
+        stage["rows_out"] = len(valid_tx)
+    log(f"✓ Valid: {filter_summary['final_count']} | Invalid: {filter_summary['invalid']}")
+
+    if not valid_tx:
+        log("✗ No valid transactions after filtering. Exiting.")
+        return None
+
+    # -----------------------------
+    # 5. Data Analysis
+    # -----------------------------
+    log("\n[5/10] Analyzing sales data...")
+    with metrics.stage("analyze", rows_in=len(valid_tx)):
+        key = cache_key if cache else None
+        analytics = cache.get(key) if key else None
+        cached = analytics is not None
+        if not cached:
+            aggregator = ApproxSalesAggregator() if approximate else SalesAggregator()
+            analytics = compute_analytics(aggregator.update(valid_tx))  # single pass over valid_tx
+            analytics['filter_summary'] = filter_summary
+            if key:
+                cache.put(key, analytics)
+    log("✓ Analysis complete" + (" (cached)" if cached else ""))
+    return {
+        "valid_tx": valid_tx,
+        "filter_summary": filter_summary,
+        "aggregator": analytics['aggregator'],
+        "total_revenue": analytics['total_revenue']
+    }
+
+
+def fetch_products(transactions=None, metrics=None, trace_memory=True):
+    """
+    Step 6 on its own: the product mapping for `transactions` (just the
+    products they reference, via data/product_catalog.sqlite), or the
+    cached full catalog when transactions is None.
+    """
+    metrics = metrics or PipelineMetrics(trace_memory=False)
+    rows_in = None if transactions is None else len(transactions)
+    with metrics.stage("fetch_products", rows_in=rows_in, trace_memory=trace_memory) as stage:
+        if transactions is None:
+            product_mapping = get_product_mapping()
+        else:
+            product_mapping = lookup_product_mapping(transactions)
+        stage["rows_out"] = len(product_mapping)
+    return product_mapping
+
+
+def start_product_fetch(transactions=None, metrics=None):
+    """
+    Runs fetch_products in a background thread so the API round-trips
+    overlap parsing and analysis. Returns a concurrent.futures.Future to
+    pass as `catalog` to analyze_and_report_async. The thread is a daemon:
+    a run that ends without the catalog (nothing valid, a cache hit) does
+    not wait for the fetch, which cancel() stops if it has not started.
+    """
+    future = Future()
+
+    def fetch():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            # Not traced: it runs alongside the other stages (see PipelineMetrics)
+            future.set_result(fetch_products(transactions, metrics, False))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=fetch, name="product-fetch", daemon=True).start()
+    return future
+
+
+def enrich_and_report(analysis, metrics, product_mapping=None, enriched_output=DEFAULT_ENRICHED_OUTPUT,
+                      report_output=DEFAULT_REPORT_OUTPUT, log=print, report_format="text"):
+    """
+    Steps 6-9 for an analyze_transactions result. `product_mapping` is a
+    catalog fetched beforehand; None looks up the products of the valid
+    transactions now. With analysis["append_enriched"] the enriched rows
+    are appended to enriched_output, and with analysis["enrichment_checkpoint"]
+    the enrichment figures are the running totals kept in that --incremental
+    checkpoint. Returns the pipeline summary dict.
+    """
+    valid_tx = analysis["valid_tx"]
+    filter_summary = analysis["filter_summary"]
+
+    # -----------------------------
+    # 6. Fetch Products from API
+    # -----------------------------
+    log("\n[6/10] Fetching product data from API...")
+    if product_mapping is None:
+        # Only the products that appear in valid_tx, via data/product_catalog.sqlite
+        product_mapping = fetch_products(valid_tx, metrics)
+    log(f"✓ Loaded {len(product_mapping)} products")
+
+    # -----------------------------
+    # 7. Enrich Sales Data
+    # -----------------------------
+    log("\n[7/10] Enriching sales data...")
+    with metrics.stage("enrich", rows_in=len(valid_tx)) as stage:
+        enriched_tx = enrich_sales_data(valid_tx, product_mapping)
+        success_count = enriched_tx.match_count()
+        stage["rows_out"] = success_count
+    success_rate = (success_count / len(valid_tx) * 100) if valid_tx else 0
+    log(f"✓ Enriched {success_count}/{len(valid_tx)} transactions ({success_rate:.1f}%)")
+
+    # -----------------------------
+    # 8. Save Enriched Data
+    # -----------------------------
+    log("\n[8/10] Saving enriched data...")
+    with metrics.stage("save_enriched", rows_in=len(enriched_tx)):
+        enriched_file = save_enriched_data(enriched_tx, filename=enriched_output,
+                                           append=analysis.get("append_enriched", False))
+    log(f"✓ Saved to: {enriched_file}")
+
+    # -----------------------------
+    # 9. Generate Report
+    # -----------------------------
+    log("\n[9/10] Generating report...")
+    with metrics.stage("report", rows_in=len(enriched_tx)):
+        enrichment = enrichment_summary(enriched_tx)
+        if analysis.get("enrichment_checkpoint"):
+            enrichment = record_enrichment(analysis["enrichment_checkpoint"], enrichment)
+            success_count = enrichment["success_count"]
+        report_file = generate_sales_report(enriched_tx, analysis["aggregator"], output_file=report_output,
+                                            fmt=report_format, enrichment=enrichment)
+    log(f"✓ Report saved to: {report_file}")
+
+    return {
+        "valid": filter_summary["final_count"],
+        "invalid": filter_summary["invalid"],
+        "enriched": success_count,
+        "total_revenue": analysis["total_revenue"],
+        "enriched_file": enriched_file,
+        "report_file": report_file,
+        "enrichment": enrichment
+    }
+
+
+def report_from_cache(analytics, metrics, enriched_output=DEFAULT_ENRICHED_OUTPUT,
+                      report_output=DEFAULT_REPORT_OUTPUT, log=print, report_format="text"):
+    """
+    Steps 1-9 for a cache hit: cached analytics (analyze_transactions'
+    cache entry) whose enrichment was recorded by remember_enrichment, with
+    that enriched file still in place and unchanged. Only the report is
+    rendered. Returns the pipeline summary dict, or None when the cached
+    entry cannot stand in for the run (the input is then read as usual).
+    """
+    recorded = analytics.get("enrichment") if analytics else None
+    if recorded is None or recorded["enriched_file"] != os.path.abspath(enriched_output):
+        return None
+    try:
+        stat = os.stat(enriched_output)
+    except FileNotFoundError:
+        return None
+    if [stat.st_size, stat.st_mtime_ns] != recorded["stamp"]:
+        return None
+
+    filter_summary = analytics["filter_summary"]
+    log("\n[1-8/10] Input unchanged: reusing the cached analysis and enriched data")
+    log(f"✓ Valid: {filter_summary['final_count']} | Invalid: {filter_summary['invalid']}")
+    log(f"✓ Enriched data: {enriched_output}")
+
+    log("\n[9/10] Generating report...")
+    with metrics.stage("report"):
+        report_file = generate_sales_report(None, analytics["aggregator"], output_file=report_output,
+                                            fmt=report_format, enrichment=recorded["summary"])
+    log(f"✓ Report saved to: {report_file}")
+    return {
+        "valid": filter_summary["final_count"],
+        "invalid": filter_summary["invalid"],
+        "enriched": recorded["summary"]["success_count"],
+        "total_revenue": analytics["total_revenue"],
+        "enriched_file": enriched_output,
+        "report_file": report_file,
+        "enrichment": recorded["summary"]
+    }
+
+
+def remember_enrichment(cache, cache_key, result):
+    """
+    Adds a run's enrichment summary and its enriched file's size and mtime
+    to the cached analytics, so report_from_cache can skip steps 1-8 while
+    the input and that file stay as they are.
+    """
+    analytics = cache.get(cache_key)
+    if analytics is None:
+        return
+    stat = os.stat(result["enriched_file"])
+    cache.put(cache_key, dict(analytics, enrichment={
+        "summary": result["enrichment"],
+        "enriched_file": os.path.abspath(result["enriched_file"]),
+        "stamp": [stat.st_size, stat.st_mtime_ns]
+    }))
+
+
+def analyze_and_report(transactions, metrics, region=None, min_amount=None, max_amount=None,
+                       product_mapping=None, enriched_output=DEFAULT_ENRICHED_OUTPUT,
+                       report_output=DEFAULT_REPORT_OUTPUT, log=print, cache=None, cache_key=None,
+                       approximate=False, report_format="text"):
+    """
+    Steps 4-9 of the pipeline for already parsed transactions, in sequence.
+    `product_mapping` is a preloaded catalog; None looks up just the
+    products these transactions reference. With a ResultCache and the
+    input's analytics_key, the analysis is reused across runs.
+    `approximate` aggregates with sketches (ApproxSalesAggregator) instead
+    of exact per-customer sets; the report marks those figures as estimates.
+    `report_format` is 'text', 'json' or 'html'.
+    Returns a summary dict, or None when nothing survives validation.
+    """
+    analysis = analyze_transactions(transactions, metrics, region, min_amount, max_amount, log, cache,
+                                    cache_key, approximate)
+    if analysis is None:
+        return None
+    return enrich_and_report(analysis, metrics, product_mapping, enriched_output, report_output, log,
+                             report_format)
+
+
+async def analyze_and_report_async(transactions, metrics, catalog=None, region=None, min_amount=None,
+                                   max_amount=None, enriched_output=DEFAULT_ENRICHED_OUTPUT,
+                                   report_output=DEFAULT_REPORT_OUTPUT, log=print, cache=None,
+                                   cache_key=None, approximate=False, report_format="text", analysis=None):
+    """
+    analyze_and_report with the product fetch (step 6) overlapping
+    validation and analysis (steps 4-5), which run in the default executor;
+    the two join at enrichment, so wall time is about max(analysis, fetch)
+    rather than their sum.
+
+    `catalog` is a product mapping, a future from start_product_fetch
+    (e.g. the full catalog, started before parsing), or None to start
+    looking up the products these transactions reference right away. The
+    lookup then covers rows that validation or the filters drop as well;
+    those products are simply cached for later runs.
+
+    `analysis` is an analyze_transactions result computed already (e.g. by
+    ingest_in_parallel); steps 4-5 are then skipped. The time spent waiting
+    for a future catalog is recorded as the "fetch_products_wait" stage (a
+    shared batch catalog has no fetch_products stage of its own).
+    """
+    if catalog is None:
+        catalog = start_product_fetch(transactions, metrics)
+    if analysis is None:
+        analysis = await asyncio.to_thread(analyze_transactions, transactions, metrics, region, min_amount,
+                                           max_amount, log, cache, cache_key, approximate)
+    if analysis is None:
+        if isinstance(catalog, Future):
+            catalog.cancel()
+        return None
+    if isinstance(catalog, Future):
+        with metrics.stage("fetch_products_wait", trace_memory=False) as stage:
+            catalog = await asyncio.wrap_future(catalog)
+            stage["rows_out"] = len(catalog)
+    return await asyncio.to_thread(enrich_and_report, analysis, metrics, catalog, enriched_output,
+                                   report_output, log, report_format)
+
+
+def run_interactive(chunk_workers=1):
+    """
+    The prompted pipeline on DEFAULT_INPUT. With chunk_workers > 1, steps
+    1-5 run in that many processes (ingest_in_parallel) before the filter
+    prompts; choosing filters then re-runs steps 4-5 on the parsed rows.
+    """
     print("="*40)
     print("       SALES ANALYTICS SYSTEM")
     print("="*40)
 
+    # Per-stage timings/memory, written next to the report (see utils/metrics.py)
+    metrics = PipelineMetrics(profile_dir="output")
     try:
-        # -----------------------------
-        # 1. Read Sales Data
-        # -----------------------------
-        print("\n[1/10] Reading sales data...")
-        filename = "data/sales_data.txt"
-        raw_data = read_sales_data(filename, file_encoder="utf-8")
-        if not raw_data:
-            print(f"✗ No data read from {filename}. Exiting.")
-            return
-        print(f"✓ Successfully read {len(raw_data)} transactions")
+        filename = DEFAULT_INPUT
+        unfiltered = None
+        if chunk_workers > 1:
+            transactions, unfiltered, rejects = ingest_in_parallel(filename, "utf-8", metrics, chunk_workers)
+            if not len(transactions) and not any(rejects.values()):
+                print(f"✗ No data read from {filename}. Exiting.")
+                return
+        else:
+            # -----------------------------
+            # 1. Read Sales Data
+            # -----------------------------
+            print("\n[1/10] Reading sales data...")
+            rejects = new_parse_rejects()
+            with metrics.stage("read") as stage:
+                columns, row_count = read_columns(filename, "utf-8", rejects)
+                stage["rows_out"] = row_count
+            if not row_count:
+                print(f"✗ No data read from {filename}. Exiting.")
+                return
+            print(f"✓ Successfully read {row_count} transactions")
 
-        # -----------------------------
-        # 2. Parse Transactions
-        # -----------------------------
-        print("\n[2/10] Parsing and cleaning data...")
-        transactions = parse_transactions(raw_data)
-        print(f"✓ Parsed {len(transactions)} records")
+            # -----------------------------
+            # 2. Parse Transactions
+            # -----------------------------
+            print("\n[2/10] Parsing and cleaning data...")
+            with metrics.stage("parse", rows_in=row_count) as stage:
+                transactions = TransactionArrays.from_column_blocks(columns)
+                stage["rows_out"] = len(transactions)
+            del columns
+            print(f"✓ Parsed {len(transactions)} records{describe_rejects(rejects)}")
+
+        # Product lookups run in the background from here on, through the
+        # filter prompts and the analysis
+        catalog = start_product_fetch(transactions, metrics)
 
         # -----------------------------
         # 3. Display Filter Options
         # -----------------------------
-        regions = sorted(set(t["Region"] for t in transactions))
-        amounts = [t["Quantity"] * t["UnitPrice"] for t in transactions]
-        min_amt, max_amt = min(amounts), max(amounts)
+        with metrics.stage("filter_options", rows_in=len(transactions)):
+            regions = sorted(set(transactions.Region))
+            min_amt, max_amt = min(transactions.revenue), max(transactions.revenue)
         print("\n[3/10] Filter Options Available:")
         print(f"Regions: {', '.join(regions)}")
         print(f"Amount Range: ₹{min_amt:,.0f} - ₹{max_amt:,.0f}")
@@ -65,74 +481,339 @@ def main():
             max_amount_filter = float(max_amount_input) if max_amount_input else None
 
         # -----------------------------
-        # 4. Validate and Filter Transactions
+        # 4-9. Validate, Analyze, Enrich, Save, Report
         # -----------------------------
-        print("\n[4/10] Validating transactions...")
-        valid_tx, invalid_count, filter_summary = validate_and_filter(
-            transactions,
+        filtered = region_filter or min_amount_filter is not None or max_amount_filter is not None
+        if chunk_workers > 1 and unfiltered is None and not filtered:
+            # Parallel ingest found no valid transactions
+            catalog.cancel()
+            return
+        summary = asyncio.run(analyze_and_report_async(
+            transactions, metrics,
+            catalog=catalog,
             region=region_filter,
             min_amount=min_amount_filter,
-            max_amount=max_amount_filter
-        )
-        print(f"✓ Valid: {filter_summary['final_count']} | Invalid: {filter_summary['invalid']}")
-
-
-        if not valid_tx:
-            print("✗ No valid transactions after filtering. Exiting.")
+            max_amount=max_amount_filter,
+            analysis=None if filtered else unfiltered
+        ))
+        if summary is None:
             return
 
         # -----------------------------
-        # 5. Data Analysis
+        # 10. Complete
         # -----------------------------
-        print("\n[5/10] Analyzing sales data...")
-        total_revenue = calculate_total_revenue(valid_tx)
-        region_stats = region_wise_sales(valid_tx)
-        top_products = top_selling_products(valid_tx)
-        customer_stats = customer_analysis(valid_tx)
-        daily_stats = daily_sales_trend(valid_tx)
-        peak_day = find_peak_sales_day(valid_tx)
-        low_products = low_performing_products(valid_tx)
-        print("✓ Analysis complete")
+        print("\n[10/10] Process Complete!")
+        print("="*40)
 
-        # -----------------------------
-        # 6. Fetch Products from API
-        # -----------------------------
-        print("\n[6/10] Fetching product data from API...")
-        api_products = fetch_all_products()
-        product_mapping = create_product_mapping(api_products)
-        print(f"✓ Fetched {len(api_products)} products")
+    except Exception as e:
+        print(f"\n✗ An error occurred: {e}")
+    finally:
+        if metrics.stages:
+            json_path, prom_path = metrics.write("output")
+            print(f"Stage metrics: {json_path}, {prom_path}")
 
-        # -----------------------------
-        # 7. Enrich Sales Data
-        # -----------------------------
-        print("\n[7/10] Enriching sales data...")
-        enriched_tx = enrich_sales_data(valid_tx, product_mapping)
-        success_count = sum(1 for t in enriched_tx if t.get("API_Match"))
-        success_rate = (success_count / len(valid_tx) * 100) if valid_tx else 0
-        print(f"✓ Enriched {success_count}/{len(valid_tx)} transactions ({success_rate:.1f}%)")
 
-        # -----------------------------
-        # 8. Save Enriched Data
-        # -----------------------------
-        print("\n[8/10] Saving enriched data...")
-        enriched_file = save_enriched_data(enriched_tx, filename="data/enriched_sales_data.txt")
-        print(f"✓ Saved to: {enriched_file}")
+# -----------------------------
+# Batch mode
+# -----------------------------
 
-        # -----------------------------
-        # 9. Generate Report
-        # -----------------------------
-        print("\n[9/10] Generating report...")
-        report_file = generate_sales_report(enriched_tx, enriched_tx, output_file="output/sales_report.txt")
-        print(f"✓ Report saved to: {report_file}")
+_worker_catalog = None  # product mapping (or its future) shared by every file a worker processes
 
-        # -----------------------------
-        # 10. Complete
-        # -----------------------------
-        print("\n[10/10] Process Complete!")
-        print("="*40)
 
+def _init_worker(product_mapping):
+    global _worker_catalog
+    _worker_catalog = product_mapping
+
+
+def _output_path(template, filename):
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    return template.format(stem=stem)
+
+
+def process_file(filename, options):
+    """
+    Runs the whole pipeline for one input file without prompting.
+    Returns a summary dict for the batch log.
+    """
+    return asyncio.run(process_file_async(filename, options, _worker_catalog))
+
+
+async def process_file_async(filename, options, catalog=None):
+    """
+    process_file's pipeline: reading and parsing run in the default
+    executor, then analyze_and_report_async overlaps the product fetch
+    with the analysis. `catalog` is as for analyze_and_report_async.
+    With options["chunk_workers"] > 1, steps 1-5 run in that many
+    processes instead (ingest_in_parallel); with options["incremental"],
+    only the rows appended since the last run are read (ingest_incremental).
+    With options["cache_dir"], the input is fingerprinted before step 1 and
+    a cached run for the same content, encoding and filters skips straight
+    to the report (report_from_cache).
+    """
+    report_path = _output_path(options["report_output"], filename)
+    report_dir = os.path.dirname(report_path) or "."
+    metrics = PipelineMetrics(trace_memory=options["trace_memory"], profile_stage=options["profile_stage"],
+                              profile_dir=report_dir)
+    log = print if options["verbose"] else (lambda message: None)
+    summary = {"file": filename}
+    started = time.perf_counter()
+    try:
+        enriched_output = _output_path(options["enriched_output"], filename)
+        # --incremental keeps its own checkpoint
+        use_cache = options["cache_dir"] and not options["incremental"]
+        cache = ResultCache(cache_dir=options["cache_dir"]) if use_cache else None
+        cache_key = None
+        if cache:
+            with metrics.stage("cache_lookup"):
+                cache_key = analytics_key(dataset_fingerprint(filename, options["cache_dir"]), options["region"],
+                                          options["min_amount"], options["max_amount"], options["approximate"],
+                                          options["encoding"])
+                result = report_from_cache(cache.get(cache_key), metrics, enriched_output, report_path, log,
+                                           options["report_format"])
+            if result is not None:
+                summary["status"] = "ok"
+                summary.update(result)
+                return summary
+        analysis = None
+        if options["incremental"]:
+            transactions, analysis = await asyncio.to_thread(
+                ingest_incremental, filename, options["encoding"], metrics, options["region"],
+                options["min_amount"], options["max_amount"], log)
+            if analysis is None:
+                summary["status"] = "no valid transactions"
+                return summary
+        elif options["chunk_workers"] > 1:
+            transactions, analysis, rejects = await asyncio.to_thread(
+                ingest_in_parallel, filename, options["encoding"], metrics, options["chunk_workers"],
+                options["region"], options["min_amount"], options["max_amount"], options["approximate"], log,
+                cache, cache_key, False)
+            summary["rejects"] = rejects
+            if analysis is None:
+                summary["status"] = "no valid transactions"
+                return summary
+        else:
+            rejects = new_parse_rejects()
+            transactions = await asyncio.to_thread(read_transactions, filename, options["encoding"], rejects,
+                                                   metrics)
+            summary["rejects"] = rejects
+        result = await analyze_and_report_async(
+            transactions, metrics,
+            catalog=catalog,
+            region=options["region"],
+            min_amount=options["min_amount"],
+            max_amount=options["max_amount"],
+            enriched_output=enriched_output,
+            report_output=report_path,
+            log=log,
+            cache=cache,
+            cache_key=cache_key,
+            approximate=options["approximate"],
+            report_format=options["report_format"],
+            analysis=analysis
+        )
+        if result and cache_key:
+            remember_enrichment(cache, cache_key, result)
+        summary["status"] = "ok" if result else "no valid transactions"
+        summary.update(result or {})
     except Exception as e:
-        print(f"\n✗ An error occurred: {e}")
+        summary["status"] = f"error: {e}"
+    finally:
+        basename = os.path.splitext(os.path.basename(report_path))[0] + "_metrics"
+        metrics.write(report_dir, basename)
+        # Wall time, not the sum of the stages: the product fetch overlaps the others
+        summary["seconds"] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def expand_inputs(patterns):
+    """Paths and glob patterns -> list of distinct files, globs expanded in sorted order."""
+    filenames = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for filename in matches:
+            if filename not in filenames:
+                filenames.append(filename)
+    return filenames
+
+
+def run_batch(args):
+    """Processes every input file non-interactively. Returns the exit code."""
+    filenames = expand_inputs(args.inputs)
+    if not filenames:
+        print("✗ No input files matched.")
+        return 1
+    if len(filenames) > 1:
+        for template in (args.enriched_output, args.report_output):
+            if "{stem}" not in template:
+                print(f"✗ Output path '{template}' needs a {{stem}} placeholder when processing several files.")
+                return 1
+
+    # One catalog load for the whole batch: the cached full catalog, or
+    # None to let each file look up only the products it references
+    # (those lookups share data/product_catalog.sqlite). Run serially, the
+    # full catalog loads in the background while the first file is parsed.
+    product_mapping = start_product_fetch() if args.catalog == "full" else None
+
+    options = {
+        "region": args.region,
+        "min_amount": args.min_amount,
+        "max_amount": args.max_amount,
+        "enriched_output": args.enriched_output,
+        "report_output": args.report_output,
+        "encoding": args.encoding,
+        "trace_memory": not args.no_trace_memory,
+        "profile_stage": args.profile_stage,
+        "cache_dir": args.cache_dir,
+        "approximate": args.approximate,
+        "report_format": args.report_format,
+        "chunk_workers": args.chunk_workers,
+        "incremental": args.incremental,
+        "verbose": len(filenames) == 1
+    }
+    workers = min(args.workers, len(filenames))
+    if workers <= 1:
+        _init_worker(product_mapping)
+        summaries = [process_file(filename, options) for filename in filenames]
+    else:
+        if product_mapping is not None:
+            product_mapping = product_mapping.result()  # workers get the mapping itself
+        from concurrent.futures import ProcessPoolExecutor  # multiprocessing loads only when needed
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(product_mapping,)) as pool:
+            summaries = list(pool.map(process_file, filenames, [options] * len(filenames)))
+
+    failed = 0
+    for summary in summaries:
+        if summary["status"] == "ok":
+            print(f"✓ {summary['file']}: {summary['valid']} valid, {summary['invalid']} invalid, "
+                  f"{summary['enriched']} enriched, ₹{summary['total_revenue']:,.2f} "
+                  f"-> {summary['report_file']} ({summary['seconds']}s)")
+        else:
+            failed += 1
+            print(f"✗ {summary['file']}: {summary['status']}")
+    return 1 if failed else 0
+
+
+def run_partition_query(args):
+    """
+    --partition-store: ingests the inputs (if any) into the PartitionedStore,
+    then runs one report over the rows dated --start..--end. The analysis
+    comes from PartitionedStore.aggregate (only the partitions in range,
+    reusing their stored summaries); the rows in range are read for
+    enrichment. Returns the exit code.
+    """
+    store = PartitionedStore(args.partition_store, args.partition_by)
+    rejects = new_parse_rejects()
+    for filename in expand_inputs(args.inputs):
+        added = store.ingest(filename, args.encoding, rejects)
+        print(f"✓ {filename}: {added} rows ingested" if added else f"✓ {filename}: already ingested")
+    if any(rejects.values()):
+        print(f"✓ Ingested{describe_rejects(rejects)}")
+
+    report_path = _output_path(args.report_output, args.partition_store)
+    report_dir = os.path.dirname(report_path) or "."
+    metrics = PipelineMetrics(trace_memory=not args.no_trace_memory, profile_stage=args.profile_stage,
+                              profile_dir=report_dir)
+    catalog = start_product_fetch() if args.catalog == "full" else None
+    period = f"{args.start or 'start'} .. {args.end or 'end'}"
+    try:
+        print(f"\n[1-5/10] Querying {args.partition_store} for {period}...")
+        with metrics.stage("partition_query") as stage:
+            aggregator, filter_summary = store.aggregate(args.start, args.end, args.region, args.min_amount,
+                                                         args.max_amount)
+            valid_tx, _, _ = store.select(args.start, args.end, args.region, args.min_amount, args.max_amount)
+            analytics = compute_analytics(aggregator)
+            stage["rows_out"] = len(valid_tx)
+        print(f"✓ Valid: {filter_summary['final_count']} | Invalid: {filter_summary['invalid']}")
+        if not valid_tx:
+            print(f"✗ {period}: no valid transactions")
+            return 1
+        analysis = {
+            "valid_tx": valid_tx,
+            "filter_summary": filter_summary,
+            "aggregator": analytics['aggregator'],
+            "total_revenue": analytics['total_revenue']
+        }
+        summary = asyncio.run(analyze_and_report_async(
+            valid_tx, metrics,
+            catalog=catalog,
+            enriched_output=_output_path(args.enriched_output, args.partition_store),
+            report_output=report_path,
+            report_format=args.report_format,
+            analysis=analysis
+        ))
+    finally:
+        metrics.write(report_dir, os.path.splitext(os.path.basename(report_path))[0] + "_metrics")
+    print(f"✓ {period}: {summary['valid']} valid, {summary['invalid']} invalid, {summary['enriched']} enriched, "
+          f"₹{summary['total_revenue']:,.2f} -> {summary['report_file']}")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Sales analytics pipeline. With no inputs it runs interactively on "
+                    f"{DEFAULT_INPUT}; with inputs it runs non-interactively (batch mode)."
+    )
+    parser.add_argument("inputs", nargs="*", help="sales files or glob patterns (quote globs)")
+    parser.add_argument("--region", help="only keep transactions from this region")
+    parser.add_argument("--min-amount", type=float, help="minimum transaction amount")
+    parser.add_argument("--max-amount", type=float, help="maximum transaction amount")
+    parser.add_argument("--enriched-output", help="enriched data path, {stem} is the input file name "
+                        f"(default {DEFAULT_ENRICHED_OUTPUT}, or {BATCH_ENRICHED_OUTPUT} for several inputs)")
+    parser.add_argument("--report-output", help="report path, {stem} is the input file name "
+                        f"(default {DEFAULT_REPORT_OUTPUT}, or {BATCH_REPORT_OUTPUT} for several inputs)")
+    parser.add_argument("--workers", type=int, default=1, help="files processed in parallel (default 1)")
+    parser.add_argument("--chunk-workers", type=int, default=1,
+                        help="processes that read, validate and aggregate chunks of each file (default 1)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="parse only rows appended since the last run, merging them into checkpointed totals")
+    parser.add_argument("--partition-store", metavar="DIR",
+                        help="ingest the inputs into this date-partitioned store and report on --start..--end")
+    parser.add_argument("--partition-by", choices=GRANULARITIES, default="day",
+                        help="partition size of a new --partition-store (default day)")
+    parser.add_argument("--start", help="first Date (YYYY-MM-DD) of a --partition-store query")
+    parser.add_argument("--end", help="last Date (YYYY-MM-DD) of a --partition-store query")
+    parser.add_argument("--catalog", choices=["lookup", "full"], default="lookup",
+                        help="lookup: fetch only referenced products; full: load the cached full catalog once")
+    parser.add_argument("--report-format", choices=["text", "json", "html"], default="text",
+                        help="report format; the report path's extension follows it (default text)")
+    parser.add_argument("--encoding", default="utf-8", help="input file encoding")
+    parser.add_argument("--cache-dir", help="reuse analysis results stored here while an input file is unchanged")
+    parser.add_argument("--approximate", action="store_true",
+                        help="estimate distinct/top customers and order value quantiles with sketches")
+    parser.add_argument("--profile-stage", help="write a cProfile dump for this stage (e.g. report)")
+    parser.add_argument("--no-trace-memory", action="store_true", help="skip tracemalloc peak tracking")
+    args = parser.parse_args(argv)
+
+    several = len(args.inputs) > 1 or any(glob.has_magic(pattern) for pattern in args.inputs)
+    if args.enriched_output is None:
+        args.enriched_output = BATCH_ENRICHED_OUTPUT if several else DEFAULT_ENRICHED_OUTPUT
+    if args.report_output is None:
+        args.report_output = BATCH_REPORT_OUTPUT if several else DEFAULT_REPORT_OUTPUT
+    args.workers = max(1, args.workers)
+    args.chunk_workers = max(1, args.chunk_workers)
+    if args.workers > 1 and args.chunk_workers > 1:
+        parser.error("use either --workers (several files at once) or --chunk-workers (one file split up)")
+    if args.incremental and (args.chunk_workers > 1 or args.approximate):
+        parser.error("--incremental keeps exact totals in one process; drop --chunk-workers/--approximate")
+    if (args.start or args.end) and not args.partition_store:
+        parser.error("--start/--end query a --partition-store")
+    if args.partition_store and (args.incremental or args.approximate or args.chunk_workers > 1 or
+                                 args.workers > 1 or args.cache_dir):
+        parser.error("--partition-store runs on its own; drop --incremental/--approximate/--chunk-workers/"
+                     "--workers/--cache-dir")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.partition_store:
+        return run_partition_query(args)
+    if not args.inputs:
+        run_interactive(args.chunk_workers)
+        return 0
+    return run_batch(args)
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
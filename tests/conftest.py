@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.generate_sales_data import HEADER, write_sales_file  # noqa: E402
+
+# Hand-written rows with exact ties: P1/P2 sell the same quantity, C1/C2
+# spend the same amount, and North/South have equal sales
+TIE_ROWS = [
+    "T001|2024-12-01|P101|Widget B|2|100.0|C001|North",
+    "T002|2024-12-01|P102|Widget A|2|100.0|C002|South",
+    "T003|2024-12-02|P103|Gadget|1|50.0|C003|East",
+    "T004|2024-12-02|P101|Widget B|1|25.0|C003|East",
+    "T005|2024-12-03|P104|Gizmo|1|25.0|C004|West",
+]
+
+
+@pytest.fixture(scope="session")
+def sales_file(tmp_path_factory):
+    """A generated sales file in the dirty data/sales_data.txt format."""
+    return write_sales_file(str(tmp_path_factory.mktemp("sales") / "sales.txt"), 20000)
+
+
+@pytest.fixture
+def tie_file(tmp_path):
+    path = tmp_path / "ties.txt"
+    path.write_text(HEADER + "\n".join(TIE_ROWS) + "\n", encoding="utf-8")
+    return str(path)
@@ -0,0 +1,82 @@
+import math
+
+from utils.api_handler import enrich_sales_data, load_enriched_npz, save_enriched_data
+from utils.file_handler import parse_sales_file, validate_and_filter
+from utils.records import Transaction, TransactionArrays
+
+# Some generated ProductIDs match, one without a rating; the rest do not
+CATALOG = {
+    101: {"title": "Product 101", "category": "laptops", "brand": "Acme", "rating": 4.5},
+    102: {"title": "Product 102", "category": "mice", "brand": "Pipe|Co", "rating": 3.0},
+    103: {"title": "Product 103", "category": "cables", "brand": "Acme"},
+}
+
+
+def _old_writer(enriched_transactions, filename):
+    # save_enriched_data before the batched writer: one write() per row
+    with open(filename, 'w', encoding='utf-8', newline='') as file:
+        file.write("TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region|"
+                   "API_Category|API_Brand|API_Rating|API_Match\n")
+        for t in enriched_transactions:
+            file.write("|".join([
+                str(t.get("TransactionID", "")), str(t.get("Date", "")), str(t.get("ProductID", "")),
+                str(t.get("ProductName", "")), str(t.get("Quantity", 0)), str(t.get("UnitPrice", 0.0)),
+                str(t.get("CustomerID", "")), str(t.get("Region", "")), str(t.get("API_Category", "")),
+                str(t.get("API_Brand", "")), str(t.get("API_Rating", "")),
+                "Yes" if t.get("API_Match", False) else "No"
+            ]) + "\n")
+
+
+def _inputs(sales_file):
+    valid, _, _ = validate_and_filter(parse_sales_file(sales_file))
+    return {
+        "dicts": valid,
+        "records": [Transaction.from_dict(txn) for txn in valid],
+        "arrays": TransactionArrays.from_transactions(valid),
+    }
+
+
+def test_batched_writer_matches_old_writer(sales_file, tmp_path):
+    expected_path = tmp_path / "expected.txt"
+    for name, transactions in _inputs(sales_file).items():
+        enriched = enrich_sales_data(transactions, CATALOG)
+        _old_writer(enriched, expected_path)
+        expected = expected_path.read_bytes()
+        for batch_size, buffer_size in ((10000, 1 << 20), (7, 64)):
+            path = save_enriched_data(enriched, str(tmp_path / f"{name}_{batch_size}.txt"),
+                                      buffer_size=buffer_size, batch_size=batch_size)
+            assert open(path, "rb").read() == expected, name
+        # Already enriched dicts (not an EnrichedSales) take the generic path
+        path = save_enriched_data(list(enriched), str(tmp_path / f"{name}_dicts.txt"), batch_size=7)
+        assert open(path, "rb").read() == expected, name
+
+
+def test_append_writes_header_once(tie_file, tmp_path):
+    enriched = enrich_sales_data(parse_sales_file(tie_file), CATALOG)
+    path = str(tmp_path / "enriched.txt")
+    save_enriched_data(enriched, path, append=True)
+    save_enriched_data(enriched, path, append=True)
+    _old_writer(list(enriched) * 2, tmp_path / "expected.txt")
+    assert open(path, "rb").read() == (tmp_path / "expected.txt").read_bytes()
+
+
+def test_npz_round_trip(sales_file, tmp_path):
+    for name, transactions in _inputs(sales_file).items():
+        enriched = enrich_sales_data(transactions, CATALOG)
+        path = save_enriched_data(enriched, str(tmp_path / f"{name}.txt"), fmt="npz")
+        assert path.endswith(".npz")
+        columns = load_enriched_npz(path)
+        rows = list(enriched)
+        assert {len(column) for column in columns.values()} == {len(rows)}
+        for field in ("TransactionID", "Date", "ProductID", "ProductName", "CustomerID", "Region"):
+            assert columns[field].tolist() == [row[field] for row in rows]
+        assert columns["Quantity"].tolist() == [row["Quantity"] for row in rows]
+        assert columns["UnitPrice"].tolist() == [row["UnitPrice"] for row in rows]
+        assert columns["API_Match"].tolist() == [row["API_Match"] for row in rows]
+        assert columns["API_Category"].tolist() == [row["API_Category"] or "" for row in rows]
+        assert columns["API_Brand"].tolist() == [row["API_Brand"] or "" for row in rows]
+        ratings = columns["API_Rating"].tolist()
+        assert [math.isnan(r) for r in ratings] == [row["API_Rating"] is None for row in rows]
+        assert [r for r in ratings if not math.isnan(r)] == [row["API_Rating"] for row in rows
+                                                            if row["API_Rating"] is not None]
+        assert any(columns["API_Match"]) and not all(columns["API_Match"])
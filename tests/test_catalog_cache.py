@@ -0,0 +1,196 @@
+import json
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from utils import api_handler, catalog_cache, product_lookup
+from utils.catalog_cache import get_product_mapping, load_products
+from utils.product_lookup import ProductLookup, lookup_product_mapping
+
+PRODUCTS = [{"id": i, "title": f"Product {i}", "category": "c", "brand": "b", "rating": 4.5} for i in range(1, 6)]
+ETAG = '"catalog-v1"'
+
+
+class CatalogStub(BaseHTTPRequestHandler):
+    """dummyjson's /products, two items per page, with an ETag, and /products/<id>."""
+    requests = []
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path != "/products":
+            self.requests.append((path, None))
+            product_id = int(path.rsplit("/", 1)[1])
+            product = next((p for p in PRODUCTS if p["id"] == product_id), None)
+            if product:
+                self._send_json(product)
+            else:
+                self.send_error(404)
+            return
+        query = parse_qs(urlparse(self.path).query)
+        skip, limit = int(query["skip"][0]), min(int(query["limit"][0]), 2)
+        self.requests.append((skip, self.headers.get("If-None-Match")))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self._send_json({"products": PRODUCTS[skip:skip + limit], "total": len(PRODUCTS),
+                         "skip": skip, "limit": limit}, ETAG)
+
+    def _send_json(self, data, etag=None):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    CatalogStub.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CatalogStub)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_port}/products"
+    server.shutdown()
+    server.server_close()
+
+
+def _age(cache_path, seconds):
+    # Backdate the cached catalog
+    with closing(sqlite3.connect(cache_path)) as connection, connection:
+        connection.execute("UPDATE meta SET value = ? WHERE key = 'fetched_at'", (time.time() - seconds,))
+
+
+def _expected():
+    return {p["id"]: {"title": p["title"], "category": "c", "brand": "b", "rating": 4.5} for p in PRODUCTS}
+
+
+def test_fresh_cache_served_without_requests(stub, tmp_path):
+    _, url = stub
+    cache_path = str(tmp_path / "catalog.sqlite")
+    assert get_product_mapping(url, cache_path, ttl=60) == _expected()
+    assert sorted(skip for skip, _ in CatalogStub.requests) == [0, 2, 4]
+    CatalogStub.requests.clear()
+    assert get_product_mapping(url, cache_path, ttl=60) == _expected()
+    assert CatalogStub.requests == []
+
+
+def test_expired_cache_revalidated_with_etag(stub, tmp_path):
+    _, url = stub
+    cache_path = str(tmp_path / "catalog.sqlite")
+    get_product_mapping(url, cache_path, ttl=60)
+    _age(cache_path, 120)
+    CatalogStub.requests.clear()
+    assert get_product_mapping(url, cache_path, ttl=60, stale_while_revalidate=0) == _expected()
+    # One conditional request answered 304, no page refetch
+    assert CatalogStub.requests == [(0, ETAG)]
+    CatalogStub.requests.clear()
+    get_product_mapping(url, cache_path, ttl=60)
+    assert CatalogStub.requests == []  # the 304 renewed fetched_at
+
+
+def test_stale_while_revalidate_refreshes_in_daemon_thread(stub, tmp_path, monkeypatch):
+    _, url = stub
+    cache_path = str(tmp_path / "catalog.sqlite")
+    get_product_mapping(url, cache_path, ttl=60)
+    _age(cache_path, 120)
+    CatalogStub.requests.clear()
+    refreshed = []
+    revalidate = catalog_cache._background_revalidate
+
+    def recording_revalidate(*args):
+        revalidate(*args)
+        refreshed.append(threading.current_thread())
+    monkeypatch.setattr(catalog_cache, "_background_revalidate", recording_revalidate)
+    assert get_product_mapping(url, cache_path, ttl=60, stale_while_revalidate=600) == _expected()
+    for thread in threading.enumerate():
+        if thread.name == "catalog-revalidate":
+            thread.join(5)
+    (thread,) = refreshed
+    assert thread.daemon
+    assert CatalogStub.requests == [(0, ETAG)]
+
+
+def test_stale_copy_served_when_api_is_down(stub, tmp_path, monkeypatch):
+    server, url = stub
+    cache_path = str(tmp_path / "catalog.sqlite")
+    get_product_mapping(url, cache_path, ttl=60)
+    _age(cache_path, 120)
+    server.shutdown()
+    server.server_close()
+    monkeypatch.setattr(api_handler.time, "sleep", lambda seconds: None)  # no retry backoff
+    assert get_product_mapping(url, cache_path, ttl=60, stale_while_revalidate=0, timeout=1) == _expected()
+    assert get_product_mapping(url, str(tmp_path / "empty.sqlite"), timeout=1) == {}
+
+
+def test_cache_from_another_url_not_served_when_api_is_down(stub, tmp_path, monkeypatch):
+    server, url = stub
+    cache_path = str(tmp_path / "catalog.sqlite")
+    get_product_mapping(url, cache_path)
+    server.shutdown()
+    server.server_close()
+    monkeypatch.setattr(api_handler.time, "sleep", lambda seconds: None)  # no retry backoff
+    assert get_product_mapping(url.replace("/products", "/catalog"), cache_path, timeout=1) == {}
+    # The cached catalog itself is untouched
+    assert get_product_mapping(url, cache_path) == _expected()
+
+
+def _age_products(cache_path, seconds):
+    with closing(sqlite3.connect(cache_path)) as connection, connection:
+        connection.execute("UPDATE products SET fetched_at = ?", (time.time() - seconds,))
+
+
+def test_product_rows_expire_after_ttl(stub, tmp_path, monkeypatch):
+    server, url = stub
+    cache_path = str(tmp_path / "catalog.sqlite")
+    assert ProductLookup(url, cache_path, ttl=60).lookup([1, 2]) == {i: _expected()[i] for i in (1, 2)}
+    CatalogStub.requests.clear()
+    assert ProductLookup(url, cache_path, ttl=60).lookup([1, 2]) == {i: _expected()[i] for i in (1, 2)}
+    assert CatalogStub.requests == []
+
+    _age_products(cache_path, 120)
+    assert load_products([1, 2], cache_path, ttl=60) == ({}, set())
+    ProductLookup(url, cache_path, ttl=60).lookup([1, 2])
+    assert sorted(CatalogStub.requests) == [("/products/1", None), ("/products/2", None)]
+
+    # Expired rows are still used while the API is down
+    _age_products(cache_path, 120)
+    server.shutdown()
+    server.server_close()
+    monkeypatch.setattr(api_handler.time, "sleep", lambda seconds: None)
+    assert ProductLookup(url, cache_path, ttl=60, timeout=1).lookup([1, 2]) == {i: _expected()[i] for i in (1, 2)}
+
+
+def test_cache_without_fetched_at_is_migrated(tmp_path):
+    cache_path = str(tmp_path / "old.sqlite")
+    with closing(sqlite3.connect(cache_path)) as connection, connection:
+        connection.execute("CREATE TABLE products (id INTEGER PRIMARY KEY, title, category, brand, rating)")
+        connection.execute("INSERT INTO products VALUES (1, 'Old', 'c', 'b', 4.0)")
+    # Rows from before the column existed count as expired, but are still readable
+    assert load_products([1], cache_path, ttl=60) == ({}, set())
+    assert load_products([1], cache_path)[0] == {1: {"title": "Old", "category": "c", "brand": "b", "rating": 4.0}}
+
+
+def test_default_lookup_is_shared(stub, tmp_path, monkeypatch):
+    _, url = stub
+    cache_path = tmp_path / "catalog.sqlite"
+    monkeypatch.setattr(product_lookup, "_default_lookup", None)
+    monkeypatch.setattr(product_lookup, "ProductLookup", lambda: ProductLookup(url, str(cache_path)))
+    transactions = [{"ProductID": "P1"}, {"ProductID": "P2"}]
+    assert lookup_product_mapping(transactions) == {i: _expected()[i] for i in (1, 2)}
+    cache_path.unlink()
+    CatalogStub.requests.clear()
+    # Served from the shared instance's memory, not the (deleted) SQLite cache or the API
+    assert lookup_product_mapping(transactions) == {i: _expected()[i] for i in (1, 2)}
+    assert CatalogStub.requests == []
@@ -0,0 +1,131 @@
+import math
+
+import pytest
+
+from utils.columnar import TransactionTable
+from utils.data_processor import (
+    SalesAggregator,
+    calculate_total_revenue,
+    customer_analysis,
+    iter_ranked,
+    ranked_page,
+    region_wise_sales,
+    top_n,
+    top_selling_products
+)
+from utils.file_handler import parse_sales_file, validate_and_filter
+from utils.sketches import ApproxSalesAggregator
+
+
+def _aggregate(transactions):
+    return SalesAggregator().update(transactions)
+
+
+def test_merge_copies_entries(tie_file):
+    transactions = parse_sales_file(tie_file)
+    source = _aggregate(transactions[:2])
+    merged = SalesAggregator().merge(source)
+    source.update(transactions[2:])
+    assert merged.customer_stats == _aggregate(transactions[:2]).customer_stats
+    assert merged.date_stats == _aggregate(transactions[:2]).date_stats
+
+
+def test_merge_matches_single_pass(sales_file):
+    valid, _, _ = validate_and_filter(parse_sales_file(sales_file))
+    half = len(valid) // 2
+    merged = _aggregate(valid[:half]).merge(_aggregate(valid[half:]))
+    serial = _aggregate(valid)
+    for name in ('region_stats', 'product_stats', 'customer_stats', 'date_stats'):
+        # Equal entries in the same (first-appearance) key order
+        assert list(getattr(merged, name).items()) == list(getattr(serial, name).items())
+    assert merged.revenue_units == serial.revenue_units
+
+
+def test_merge_rejects_precomputed_distinct_counts(sales_file):
+    valid, _, _ = validate_and_filter(parse_sales_file(sales_file))
+    precomputed = TransactionTable.from_transactions(valid).aggregate()
+    with pytest.raises(ValueError):
+        SalesAggregator().merge(precomputed)
+    with pytest.raises(ValueError):
+        precomputed.merge(_aggregate(valid))
+
+
+def _with_amounts(tie_file, *unit_prices):
+    transactions = parse_sales_file(tie_file)
+    for txn, unit_price in zip(transactions, unit_prices):
+        txn['UnitPrice'] = unit_price
+    return transactions
+
+
+@pytest.mark.parametrize("unit_prices, expected", [
+    ((math.nan,), math.nan),
+    ((math.inf,), math.inf),
+    ((math.inf, -math.inf), math.nan),
+])
+def test_non_finite_amounts_propagate(tie_file, unit_prices, expected):
+    transactions = _with_amounts(tie_file, *unit_prices)
+    aggregators = [
+        _aggregate(transactions),
+        _aggregate(transactions[:2]).merge(_aggregate(transactions[2:])),
+        TransactionTable.from_transactions(transactions).aggregate(),
+        ApproxSalesAggregator().update(transactions),
+    ]
+    for aggregator in aggregators:
+        assert repr(calculate_total_revenue(aggregator)) == repr(expected)
+        # Only the affected rows' groups are non-finite
+        assert math.isfinite(region_wise_sales(aggregator)['West']['total_sales'])
+
+
+# (name, score) pairs with ties at 5 and 2, names out of alphabetical order
+RANKED = [("d", 5), ("b", 2), ("c", 5), ("a", 5), ("e", 1), ("f", 2), ("g", 0)]
+
+
+def _score(item):
+    return item[1]
+
+
+def test_top_n_ties():
+    assert top_n(RANKED, 3, _score) == [("d", 5), ("c", 5), ("a", 5)]
+    assert top_n(RANKED, 3, _score, tie_break="name") == [("a", 5), ("c", 5), ("d", 5)]
+    assert top_n(RANKED, 4, _score) == [("d", 5), ("c", 5), ("a", 5), ("b", 2)]
+    assert top_n(RANKED, 5, _score, tie_break="name")[3:] == [("b", 2), ("f", 2)]
+
+
+def test_top_n_full_and_oversized_rankings():
+    for tie_break in ("first", "name"):
+        full = top_n(RANKED, None, _score, tie_break)
+        assert len(full) == len(RANKED)
+        assert top_n(RANKED, 100, _score, tie_break) == full
+        assert top_n(iter(RANKED), 100, _score, tie_break) == full
+        assert list(iter_ranked(RANKED, _score, tie_break)) == full
+        assert top_n([], 3, _score, tie_break) == []
+    assert top_n(RANKED, None, _score) == sorted(RANKED, key=_score, reverse=True)
+
+
+def test_ranked_pages():
+    for tie_break in ("first", "name"):
+        full = top_n(RANKED, None, _score, tie_break)
+        pages = [ranked_page(RANKED, _score, page, 3, tie_break) for page in range(4)]
+        assert [len(page) for page in pages] == [3, 3, 1, 0]
+        assert sum(pages, []) == full
+        assert ranked_page(RANKED, _score, 0, len(RANKED), tie_break) == full
+
+
+def test_ranked_views_on_ties(tie_file):
+    transactions = parse_sales_file(tie_file)
+    assert [name for name, *_ in top_selling_products(transactions, 2)] == ["Widget B", "Widget A"]
+    # C001 and C002 spend the same; reversed, C002 appears first
+    reversed_transactions = transactions[::-1]
+    assert list(customer_analysis(reversed_transactions, 2)) == ["C002", "C001"]
+    assert list(customer_analysis(reversed_transactions, 2, "name")) == ["C001", "C002"]
+    assert list(customer_analysis(reversed_transactions, None, "name"))[:2] == ["C001", "C002"]
+    assert top_selling_products(transactions, None) == top_selling_products(transactions, 10)
+
+
+def test_invalid_tie_break():
+    with pytest.raises(ValueError):
+        top_n(RANKED, 3, _score, tie_break="last")
+    with pytest.raises(ValueError):
+        ranked_page(RANKED, _score, 0, tie_break="last")
+    with pytest.raises(ValueError):
+        top_selling_products([], 5, tie_break="random")
@@ -0,0 +1,126 @@
+import math
+
+from utils.file_handler import (
+    FilterView,
+    _new_filter_summary,
+    iter_parse_transactions,
+    iter_sales_columns,
+    iter_sales_data,
+    iter_validate_and_filter,
+    new_parse_rejects,
+    parse_sales_file,
+    validate_and_filter
+)
+from utils.records import TRANSACTION_FIELDS, TransactionArrays
+
+# Rows the tokenizer must treat exactly like the csv-based path
+EDGE_ROWS = [
+    "T101|2024-12-01|P101|Laptop, Pro|1,916|45,000.50|C001|North",
+    " T102 | 2024-12-01 | P102 | Mouse |2|500|C002| South ",
+    "T103|2024-12-01|P103|Cable|two|10|C003|East",
+    "T104|2024-12-01|P104|Cable|2|10|C003",
+    "T105|2024-12-01|P105|Cable|2|10|C003|East|extra",
+    "",
+    "T106|2024-12-01|P106|\"Quoted|Name\"|2|10|C004|West",
+    "T107|2024-12-01|P107|Tab\tName|3|1e3|C005|West",
+    "T108|2024-12-02|P108|Nan|1|nan|C006|North",
+]
+
+
+def _legacy(filename, rejects):
+    return list(iter_parse_transactions(iter_sales_data(filename, 'utf-8'), rejects))
+
+
+def _same_as_legacy(filename):
+    rejects, legacy_rejects = new_parse_rejects(), new_parse_rejects()
+    fast = parse_sales_file(filename, rejects=rejects)
+    legacy = _legacy(filename, legacy_rejects)
+    assert rejects == legacy_rejects
+    assert len(fast) == len(legacy)
+    for txn, expected in zip(fast, legacy):
+        # NaN != NaN, so compare the text of each field
+        assert ([repr(txn[name]) for name in TRANSACTION_FIELDS] ==
+                [repr(expected[name]) for name in TRANSACTION_FIELDS])
+    return fast
+
+
+def test_tokenizer_accepts_the_same_rows_as_legacy_parser(sales_file):
+    assert _same_as_legacy(sales_file)
+
+
+def test_tokenizer_edge_rows(tmp_path):
+    path = tmp_path / "edge.txt"
+    path.write_text("TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n" +
+                    "\r\n".join(EDGE_ROWS) + "\n", encoding="utf-8", newline="")
+    assert _same_as_legacy(str(path))
+
+
+def test_small_blocks_give_the_same_rows(sales_file):
+    rejects, block_rejects = new_parse_rejects(), new_parse_rejects()
+    whole = TransactionArrays.from_column_blocks(iter_sales_columns(sales_file, rejects=rejects))
+    blocks = TransactionArrays.from_column_blocks(
+        iter_sales_columns(sales_file, rejects=block_rejects, block_size=4096))
+    assert list(blocks.rows()) == list(whole.rows())
+    assert block_rejects == rejects
+
+
+FILTER_QUERIES = [
+    {},
+    {"region": "North"},
+    {"region": "Nowhere"},
+    {"region": ""},
+    {"min_amount": 1000},
+    {"max_amount": 500},
+    {"min_amount": 500, "max_amount": 500},
+    {"region": "South", "min_amount": 100, "max_amount": 20000},
+    {"region": "West", "min_amount": 10 ** 9},
+]
+
+
+def _filter_inputs(sales_file):
+    # The generated rows plus a NaN amount, an empty region and rows failing validation
+    transactions = parse_sales_file(sales_file)
+    extra = [
+        ("T900", "P101", "C001", 1, math.nan, "North"),
+        ("T901", "P102", "C002", 2, 500.0, ""),
+        ("T902", "P103", "C003", 1, 250.0, ""),
+        ("X903", "P104", "C004", 1, 100.0, "South"),
+        ("T904", "P105", "C005", 0, 100.0, "South"),
+    ]
+    transactions += [
+        {"TransactionID": tid, "Date": "2024-12-31", "ProductID": pid, "ProductName": "Edge", "Quantity": quantity,
+         "UnitPrice": unit_price, "CustomerID": cid, "Region": region}
+        for tid, pid, cid, quantity, unit_price, region in extra
+    ]
+    return transactions
+
+
+def _field_text(transactions):
+    # NaN != NaN, so compare the text of each field
+    return [[repr(txn[name]) for name in TRANSACTION_FIELDS] for txn in transactions]
+
+
+def test_filter_view_matches_validate_and_filter(sales_file):
+    transactions = _filter_inputs(sales_file)
+    arrays = TransactionArrays.from_transactions(transactions)
+    views = [FilterView(transactions), FilterView(arrays)]
+    for query in FILTER_QUERIES:
+        valid, invalid, summary = validate_and_filter(transactions, **query)
+        for view in views:
+            v_valid, v_invalid, v_summary = view.query(**query)
+            assert _field_text(v_valid) == _field_text(valid)
+            assert (v_invalid, v_summary) == (invalid, summary)
+    nan_rows = FilterView(transactions).query(min_amount=10 ** 9)[0]
+    assert [txn['TransactionID'] for txn in nan_rows] == ["T900"]
+
+
+def test_iter_validate_and_filter_matches_array_path(sales_file):
+    transactions = _filter_inputs(sales_file)
+    arrays = TransactionArrays.from_transactions(transactions)
+    for query in FILTER_QUERIES:
+        valid, invalid, summary = validate_and_filter(arrays, **query)
+        for source in (transactions, arrays):
+            streamed_summary = _new_filter_summary()
+            streamed = list(iter_validate_and_filter(source, summary=streamed_summary, **query))
+            assert _field_text(streamed) == _field_text(valid)
+            assert streamed_summary == summary and summary["invalid"] == invalid
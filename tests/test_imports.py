@@ -0,0 +1,46 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "main", "utils.api_handler", "utils.catalog_cache", "utils.columnar", "utils.data_processor",
+    "utils.file_handler", "utils.incremental", "utils.metrics", "utils.parallel", "utils.partitions",
+    "utils.product_lookup", "utils.records", "utils.report", "utils.result_cache", "utils.sales_db",
+    "utils.sales_index", "utils.sketches",
+]
+# The NumPy backends themselves; nothing else may import them at module level
+NUMPY_MODULES = ("utils.columnar", "utils.sales_index")
+LAZY_DEPENDENCIES = ("requests", "urllib3", "numpy")
+
+# Imports one module from an empty working directory, then reports the
+# heavy dependencies loaded and the paths now present
+_SCRIPT = """
+import json, os, sys
+sys.path.insert(0, {root!r})
+sys.dont_write_bytecode = True
+__import__({module!r})
+print(json.dumps({{
+    "loaded": sorted(name for name in {lazy!r} if name in sys.modules),
+    "paths": sorted(os.path.relpath(os.path.join(d, n)) for d, dirs, files in os.walk(".") for n in dirs + files)
+}}))
+"""
+
+
+def _import(module, cwd):
+    script = _SCRIPT.format(root=ROOT, module=module, lazy=LAZY_DEPENDENCIES)
+    result = subprocess.run([sys.executable, "-c", script], cwd=cwd, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_import_is_lazy_and_creates_nothing(module, tmp_path):
+    before = sorted(os.listdir(os.path.join(ROOT, "utils")))
+    expected_loaded = ["numpy"] if module in NUMPY_MODULES else []
+    assert _import(module, tmp_path) == {"loaded": expected_loaded, "paths": []}
+    # Nothing created next to the modules either
+    assert sorted(os.listdir(os.path.join(ROOT, "utils"))) == before
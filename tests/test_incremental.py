@@ -0,0 +1,121 @@
+import sqlite3
+from contextlib import closing
+
+import main
+from utils.data_processor import SalesAggregator
+from utils.file_handler import parse_sales_file, validate_and_filter
+from utils.incremental import default_checkpoint_path, incremental_aggregate
+
+STATS = ('region_stats', 'product_stats', 'customer_stats', 'date_stats')
+
+
+def _single_pass(filename, **filters):
+    seen = set()
+    unique = []
+    for txn in parse_sales_file(filename):
+        if txn['TransactionID'] not in seen:
+            seen.add(txn['TransactionID'])
+            unique.append(txn)
+    valid, _, summary = validate_and_filter(unique, **filters)
+    return SalesAggregator().update(valid), summary
+
+
+def _append_in_parts(source, target, parts, **filters):
+    with open(source, encoding="utf-8") as file:
+        lines = file.readlines()
+    step = -(-len(lines) // parts)
+    new_counts = []
+    for start in range(0, len(lines), step):
+        with open(target, "a", encoding="utf-8") as file:
+            # Re-append the previous part's last line: a duplicate ID to skip
+            file.writelines(lines[max(1, start - 1):start] + lines[start:start + step])
+        aggregator, summary, new_transactions = incremental_aggregate(target, **filters)
+        new_counts.append(len(new_transactions))
+    return aggregator, summary, new_counts
+
+
+def test_appended_parts_match_single_pass(sales_file, tmp_path):
+    for filters in ({}, {"region": "North", "min_amount": 1000}):
+        target = str(tmp_path / f"sales_{len(filters)}.txt")
+        aggregator, summary, new_counts = _append_in_parts(sales_file, target, 4, **filters)
+        expected, expected_summary = _single_pass(target, **filters)
+        for name in STATS:
+            assert list(getattr(aggregator, name).items()) == list(getattr(expected, name).items())
+        assert aggregator.revenue_units == expected.revenue_units
+        assert summary["final_count"] == expected_summary["final_count"] == sum(new_counts)
+        assert summary["duplicates"] == 3
+
+
+def test_checkpoint_is_sqlite_with_one_row_per_id(tie_file):
+    incremental_aggregate(tie_file)
+    with open(tie_file, "a", encoding="utf-8") as file:
+        file.write("T006|2024-12-04|P105|Doohickey|1|10.0|C005|North\n")
+    aggregator, _, new_transactions = incremental_aggregate(tie_file)
+    assert [txn['TransactionID'] for txn in new_transactions] == ["T006"]
+    assert aggregator.transaction_count == 6
+    with closing(sqlite3.connect(default_checkpoint_path(tie_file))) as connection:
+        ids = [row[0] for row in connection.execute("SELECT transaction_id FROM seen_ids ORDER BY 1")]
+    assert ids == ["T001", "T002", "T003", "T004", "T005", "T006"]
+
+
+def test_rewritten_file_starts_over(tie_file):
+    incremental_aggregate(tie_file)
+    with open(tie_file, encoding="utf-8") as file:
+        lines = file.readlines()
+    with open(tie_file, "w", encoding="utf-8") as file:
+        file.writelines(lines[:3])
+    aggregator, summary, new_transactions = incremental_aggregate(tie_file)
+    assert len(new_transactions) == aggregator.transaction_count == 2
+    assert summary["duplicates"] == 0
+
+
+def test_unterminated_last_line_is_read_once(tie_file):
+    with open(tie_file, encoding="utf-8") as file:
+        text = file.read().rstrip("\n")
+    with open(tie_file, "w", encoding="utf-8") as file:
+        file.write(text)
+    aggregator, _, new_transactions = incremental_aggregate(tie_file)
+    assert [txn['TransactionID'] for txn in new_transactions][-1] == "T005"
+    assert incremental_aggregate(tie_file)[2] == []
+
+    # A new line after it: only T006 is new, T005 is not a duplicate
+    with open(tie_file, "a", encoding="utf-8") as file:
+        file.write("\nT006|2024-12-04|P105|Doohickey|1|10.0|C005|North")
+    aggregator, summary, new_transactions = incremental_aggregate(tie_file)
+    assert [txn['TransactionID'] for txn in new_transactions] == ["T006"]
+    assert summary["duplicates"] == 0
+    assert aggregator.transaction_count == 6
+
+    # A line caught half-written is re-read once the rest is appended
+    with open(tie_file, "a", encoding="utf-8") as file:
+        file.write("\nT007|2024-12-04|P105|Doohickey|1")
+    incremental_aggregate(tie_file)
+    with open(tie_file, "a", encoding="utf-8") as file:
+        file.write("0|10.0|C005|North\n")
+    aggregator, summary, _ = incremental_aggregate(tie_file)
+    expected, expected_summary = _single_pass(tie_file)
+    assert list(aggregator.product_stats.items()) == list(expected.product_stats.items())
+    assert aggregator.product_stats["Doohickey"]["total_quantity"] == 11
+    assert summary == dict(expected_summary, duplicates=0)
+
+
+def _enrichment_lines(report):
+    return [line.strip() for line in report.read_text(encoding="utf-8").splitlines()
+            if line.strip().startswith(("Records Processed", "Total Products Enriched", "Success Rate"))]
+
+
+def test_report_enrichment_covers_every_run(tie_file, tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "fetch_products", lambda *args, **kwargs: {101: {"title": "Widget B"}})
+    report = tmp_path / "report.txt"
+    args = main.parse_args([tie_file, "--incremental", "--no-trace-memory", "--report-output", str(report),
+                            "--enriched-output", str(tmp_path / "enriched.txt")])
+    assert main.run_batch(args) == 0
+    first = _enrichment_lines(report)
+    assert main.run_batch(args) == 0  # nothing appended
+    assert _enrichment_lines(report) == first
+
+    with open(tie_file, "a", encoding="utf-8") as file:
+        file.write("T006|2024-12-04|P101|Widget B|1|10.0|C005|North\n")
+    assert main.run_batch(args) == 0
+    assert _enrichment_lines(report) == ["Records Processed: 6", "Total Products Enriched: 6",
+                                         "Success Rate: 50.00%"]
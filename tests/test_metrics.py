@@ -0,0 +1,80 @@
+import json
+import re
+
+from utils.metrics import PipelineMetrics
+
+METRIC_NAMES = {
+    "sales_pipeline_stage_wall_seconds", "sales_pipeline_stage_cpu_seconds", "sales_pipeline_stage_rows_in",
+    "sales_pipeline_stage_rows_out", "sales_pipeline_stage_peak_memory_bytes",
+}
+# One exposition-format sample: name{stage="escaped value"} number
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)\{stage="((?:[^"\\\n]|\\[\\"n])*)"\} (\S+)$')
+
+
+def _metrics():
+    metrics = PipelineMetrics(profile_stage=None)
+    with metrics.stage("parse", rows_in=10) as stage:
+        stage["rows_out"] = 8
+    with metrics.stage("fetch_products", trace_memory=False) as stage:
+        stage["rows_out"] = 3
+    with metrics.stage('odd "stage"\\name'):
+        pass
+    return metrics
+
+
+def _samples(text):
+    # {metric: {stage label: value}}, checking the HELP/TYPE lines precede each metric's samples
+    samples = {}
+    declared = []
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            declared.append(line.split()[2])
+        elif line.startswith("# TYPE "):
+            _, _, name, kind = line.split()
+            assert (name, kind) == (declared[-1], "gauge")
+        elif line:
+            match = SAMPLE.match(line)
+            assert match, line
+            name, stage, value = match.groups()
+            assert name == declared[-1]
+            float(value)
+            samples.setdefault(name, {})[stage] = value
+    assert len(declared) == len(set(declared))
+    return samples
+
+
+def test_prometheus_exposition():
+    samples = _samples(_metrics().to_prometheus())
+    assert set(samples) == METRIC_NAMES
+    stages = {"parse", "fetch_products", 'odd \\"stage\\"\\\\name'}
+    for name in ("sales_pipeline_stage_wall_seconds", "sales_pipeline_stage_cpu_seconds"):
+        assert set(samples[name]) == stages
+    assert samples["sales_pipeline_stage_rows_in"] == {"parse": "10"}
+    assert samples["sales_pipeline_stage_rows_out"] == {"parse": "8", "fetch_products": "3"}
+    # Untraced stages have no memory sample
+    assert set(samples["sales_pipeline_stage_peak_memory_bytes"]) == stages - {"fetch_products"}
+
+
+def test_write_json_and_prom(tmp_path):
+    metrics = _metrics()
+    json_path, prom_path = metrics.write(str(tmp_path), "run")
+    assert (json_path, prom_path) == (str(tmp_path / "run.json"), str(tmp_path / "run.prom"))
+    with open(json_path, encoding="utf-8") as file:
+        data = json.load(file)
+    assert [stage["stage"] for stage in data["stages"]] == ["parse", "fetch_products", 'odd "stage"\\name']
+    assert data["stages"][0]["rows_in"] == 10 and data["stages"][0]["rows_out"] == 8
+    assert data["total_wall_seconds"] == round(sum(s["wall_seconds"] for s in data["stages"]), 6)
+    assert all(s["cpu_seconds"] >= 0 for s in data["stages"])
+    with open(prom_path, encoding="utf-8") as file:
+        assert file.read() == metrics.to_prometheus()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["run.json", "run.prom"]
+
+
+def test_profile_stage_dump(tmp_path):
+    metrics = PipelineMetrics(trace_memory=False, profile_stage="report", profile_dir=str(tmp_path))
+    with metrics.stage("report"):
+        sum(range(1000))
+    (record,) = metrics.stages
+    assert record["profile"] == str(tmp_path / "profile_report.prof")
+    assert (tmp_path / "profile_report.prof").exists()
+    assert "peak_memory_bytes" not in record
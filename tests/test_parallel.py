@@ -0,0 +1,76 @@
+import pytest
+
+from utils.data_processor import SalesAggregator, customer_analysis, region_wise_sales, top_selling_products
+from utils.file_handler import new_parse_rejects, parse_sales_file, validate_and_filter
+from utils.parallel import parallel_aggregate, parallel_ingest
+from utils.records import TRANSACTION_FIELDS
+
+FILTERS = [{}, {"region": "North", "min_amount": 1000}, {"max_amount": 100}]
+STATS = ('region_stats', 'product_stats', 'customer_stats', 'date_stats')
+
+
+def _serial(filename, **filters):
+    rejects = new_parse_rejects()
+    transactions = parse_sales_file(filename, rejects=rejects)
+    valid, invalid, summary = validate_and_filter(transactions, **filters)
+    return transactions, valid, SalesAggregator().update(valid), summary, rejects
+
+
+def _rows(transactions):
+    return [tuple(txn[name] for name in TRANSACTION_FIELDS) for txn in transactions]
+
+
+def _assert_same_aggregates(parallel, serial):
+    for name in STATS:
+        # Same entries in the same key order, so rankings break ties alike
+        assert list(getattr(parallel, name).items()) == list(getattr(serial, name).items())
+    assert parallel.revenue_units == serial.revenue_units
+    assert top_selling_products(parallel) == top_selling_products(serial)
+    assert _customers(parallel) == _customers(serial)
+
+
+def _customers(aggregator):
+    # products_bought comes from a set, so only its contents are comparable
+    return [(customer_id, {**stats, 'products_bought': set(stats['products_bought'])})
+            for customer_id, stats in customer_analysis(aggregator).items()]
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_parallel_ingest_matches_serial(sales_file, filters):
+    transactions, valid, aggregator, summary, rejects = _serial(sales_file, **filters)
+    p_transactions, p_valid, p_aggregator, p_summary, p_rejects = parallel_ingest(
+        sales_file, workers=2, chunks_per_worker=3, **filters)
+    assert list(p_transactions.rows()) == _rows(transactions)
+    assert list(p_valid.rows()) == _rows(valid)
+    assert p_summary == summary
+    assert p_rejects == rejects
+    _assert_same_aggregates(p_aggregator, aggregator)
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_parallel_ingest_valid_rows_only(sales_file, filters):
+    transactions, valid, aggregator, summary, rejects = _serial(sales_file, **filters)
+    p_transactions, p_valid, p_aggregator, p_summary, p_rejects = parallel_ingest(
+        sales_file, workers=2, chunks_per_worker=3, all_rows=False, **filters)
+    assert p_transactions is None
+    assert list(p_valid.rows()) == _rows(valid)
+    assert p_summary == summary and p_summary["total_input"] == len(transactions)
+    assert p_rejects == rejects
+    _assert_same_aggregates(p_aggregator, aggregator)
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_parallel_aggregate_matches_serial(sales_file, filters):
+    _, _, aggregator, summary, _ = _serial(sales_file, **filters)
+    p_aggregator, p_summary = parallel_aggregate(sales_file, workers=2, chunks_per_worker=3, **filters)
+    assert p_summary == summary
+    _assert_same_aggregates(p_aggregator, aggregator)
+
+
+def test_parallel_ingest_keeps_tie_order(tie_file):
+    _, _, aggregator, _, _ = _serial(tie_file)
+    # One row per chunk, so every tie is split across partial aggregates
+    _, _, p_aggregator, _, _ = parallel_ingest(tie_file, workers=2, chunks_per_worker=4)
+    _assert_same_aggregates(p_aggregator, aggregator)
+    assert [name for name, *_ in top_selling_products(p_aggregator)][:2] == ["Widget B", "Widget A"]
+    assert list(region_wise_sales(p_aggregator))[:2] == ["North", "South"]
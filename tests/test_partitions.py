@@ -0,0 +1,62 @@
+import pytest
+
+from utils.data_processor import SalesAggregator
+from utils.file_handler import new_parse_rejects, parse_sales_file, validate_and_filter
+from utils.partitions import PartitionedStore
+
+
+def _serial(filename, start=None, end=None, **filters):
+    rows = [txn for txn in parse_sales_file(filename)
+            if (start is None or txn['Date'] >= start) and (end is None or txn['Date'] <= end)]
+    valid, _, summary = validate_and_filter(rows, **filters)
+    return SalesAggregator().update(valid), summary
+
+
+def test_range_aggregate_matches_serial(sales_file, tmp_path):
+    store = PartitionedStore(str(tmp_path / "store"))
+    store.ingest(sales_file)
+    for start, end, filters in [("2024-12-05", "2024-12-20", {}), ("2024-12-10", None, {"region": "North"})]:
+        aggregator, summary = store.aggregate(start, end, **filters)
+        expected, expected_summary = _serial(sales_file, start, end, **filters)
+        # Same entries; partitions hold rows in date order, so key order may differ
+        assert aggregator.customer_stats == expected.customer_stats
+        assert aggregator.product_stats == expected.product_stats
+        assert aggregator.revenue_units == expected.revenue_units
+        assert summary["final_count"] == expected_summary["final_count"]
+
+
+def test_ingest_counts_rejects_and_runs_once(sales_file, tmp_path):
+    store = PartitionedStore(str(tmp_path / "store"))
+    rejects = new_parse_rejects()
+    added = store.ingest(sales_file, rejects=rejects)
+    expected_rejects = new_parse_rejects()
+    assert added == len(parse_sales_file(sales_file, rejects=expected_rejects))
+    assert rejects == expected_rejects
+    assert store.ingest(sales_file) == 0
+
+
+def test_interrupted_ingest_is_rolled_back(sales_file, tie_file, tmp_path, monkeypatch):
+    root = str(tmp_path / "store")
+    store = PartitionedStore(root)
+    store.ingest(tie_file)
+    before = {key: store.metadata(key)["bytes"] for key in store.keys()}
+    refresh = PartitionedStore._refresh_metadata
+    calls = []
+
+    def crash_after_three(self, key):
+        calls.append(key)
+        if len(calls) > 3:
+            raise KeyboardInterrupt
+        return refresh(self, key)
+    monkeypatch.setattr(PartitionedStore, "_refresh_metadata", crash_after_three)
+    with pytest.raises(KeyboardInterrupt):
+        store.ingest(sales_file)
+    monkeypatch.setattr(PartitionedStore, "_refresh_metadata", refresh)
+
+    store = PartitionedStore(root)  # truncates the partial appends, drops new partitions
+    assert {key: store.metadata(key)["bytes"] for key in store.keys()} == before
+    store.ingest(sales_file)
+    aggregator, _ = store.aggregate()
+    expected = [_serial(filename)[0] for filename in (tie_file, sales_file)]
+    assert aggregator.revenue_units == sum(part.revenue_units for part in expected)
+    assert aggregator.transaction_count == sum(part.transaction_count for part in expected)
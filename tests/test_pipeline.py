@@ -0,0 +1,116 @@
+import threading
+import time
+from pathlib import Path
+
+import main
+from utils.metrics import PipelineMetrics
+
+
+def _slow_fetch(*args, **kwargs):
+    time.sleep(0.2)
+    return {}
+
+
+def test_product_fetch_thread_does_not_block_exit(monkeypatch):
+    monkeypatch.setattr(main, "fetch_products", _slow_fetch)
+    future = main.start_product_fetch()
+    fetch_threads = [thread for thread in threading.enumerate() if thread.name == "product-fetch"]
+    assert fetch_threads and all(thread.daemon for thread in fetch_threads)
+    assert future.result() == {}
+
+
+def test_batch_records_wait_for_shared_catalog(sales_file, tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "fetch_products", _slow_fetch)
+    recorded = []
+    monkeypatch.setattr(PipelineMetrics, "write", lambda self, *args: recorded.append(self.stages))
+    args = main.parse_args([sales_file, "--catalog", "full", "--no-trace-memory",
+                            "--enriched-output", str(tmp_path / "enriched.txt"),
+                            "--report-output", str(tmp_path / "report.txt")])
+    assert main.run_batch(args) == 0
+    (stages,) = recorded
+    assert "fetch_products_wait" in [stage["stage"] for stage in stages]
+
+
+def _run_interactive(sales_file, tmp_path, monkeypatch, answers, chunk_workers=1):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main, "DEFAULT_INPUT", sales_file)
+    monkeypatch.setattr(main, "fetch_products", lambda *args, **kwargs: {})
+    replies = iter(answers)
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(replies))
+    main.run_interactive(chunk_workers=chunk_workers)
+    return tmp_path / main.DEFAULT_REPORT_OUTPUT
+
+
+def test_interactive_unfiltered_run_writes_report(sales_file, tmp_path, monkeypatch, capsys):
+    report = _run_interactive(sales_file, tmp_path, monkeypatch, ["n"])
+    assert "[10/10] Process Complete!" in capsys.readouterr().out
+    assert report.exists()
+
+
+def test_interactive_parallel_run_matches_serial(sales_file, tmp_path, monkeypatch):
+    serial = _run_interactive(sales_file, tmp_path, monkeypatch, ["n"]).read_text(encoding="utf-8")
+    parallel = _run_interactive(sales_file, tmp_path, monkeypatch, ["n"], chunk_workers=2).read_text(encoding="utf-8")
+    assert _figures(parallel) == _figures(serial)
+
+
+def _figures(report):
+    return [line for line in report.splitlines() if "Generated" not in line]
+
+
+def test_batch_run_with_nan_unit_price(tie_file, tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "fetch_products", lambda *args, **kwargs: {})
+    with open(tie_file, "a", encoding="utf-8") as file:
+        file.write("T006|2024-12-04|P105|Doohickey|1|nan|C005|North\n")
+    report = tmp_path / "report.txt"
+    args = main.parse_args([tie_file, "--no-trace-memory", "--enriched-output", str(tmp_path / "enriched.txt"),
+                            "--report-output", str(report)])
+    assert main.run_batch(args) == 0
+    assert "nan" in report.read_text(encoding="utf-8")
+
+
+def test_parse_args_output_defaults(tmp_path):
+    single = main.parse_args(["sales.txt"])
+    assert (single.enriched_output, single.report_output) == (main.DEFAULT_ENRICHED_OUTPUT,
+                                                              main.DEFAULT_REPORT_OUTPUT)
+    # Several inputs, or one glob, take the {stem} templates
+    for inputs in (["a.txt", "b.txt"], [str(tmp_path / "*.txt")]):
+        args = main.parse_args(inputs)
+        assert (args.enriched_output, args.report_output) == (main.BATCH_ENRICHED_OUTPUT, main.BATCH_REPORT_OUTPUT)
+
+
+def test_expand_inputs(tmp_path):
+    for name in ("b.txt", "a.txt", "c.csv"):
+        (tmp_path / name).write_text("", encoding="utf-8")
+    a, b, c = (str(tmp_path / name) for name in ("a.txt", "b.txt", "c.csv"))
+    missing = str(tmp_path / "missing.txt")
+    # Globs expand sorted, plain paths are kept as given (even if missing), repeats are dropped
+    assert main.expand_inputs([str(tmp_path / "*.txt"), c, a, missing]) == [a, b, c, missing]
+    assert main.expand_inputs([str(tmp_path / "*.json")]) == []
+
+
+def test_batch_reports_per_file_errors_without_aborting(tie_file, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(main, "fetch_products", lambda *args, **kwargs: {})
+    batch = tmp_path / "batch"
+    batch.mkdir()
+    for name in ("one.txt", "two.txt"):
+        (batch / name).write_bytes(Path(tie_file).read_bytes())
+    (batch / "bad.txt").write_bytes(b"TransactionID|Date\n\xff\xfe\n")
+    missing = str(tmp_path / "missing.txt")
+    args = main.parse_args([str(batch / "*.txt"), missing, "--no-trace-memory",
+                            "--enriched-output", str(tmp_path / "out" / "enriched_{stem}.txt"),
+                            "--report-output", str(tmp_path / "out" / "{stem}_report.txt")])
+    assert main.run_batch(args) == 1
+    out = capsys.readouterr().out
+    for name in ("one", "two"):
+        assert f"✓ {batch / (name + '.txt')}: 5 valid" in out
+        assert (tmp_path / "out" / f"{name}_report.txt").exists()
+    assert f"✗ {batch / 'bad.txt'}: " in out
+    assert f"✗ {missing}: " in out
+    assert not (tmp_path / "out" / "bad_report.txt").exists()
+
+
+def test_batch_rejects_outputs_without_stem(tie_file, tmp_path, capsys):
+    args = main.parse_args([tie_file, tie_file + ".copy", "--report-output", str(tmp_path / "report.txt")])
+    assert main.run_batch(args) == 1
+    assert "needs a {stem} placeholder" in capsys.readouterr().out
+    assert main.run_batch(main.parse_args([str(tmp_path / "*.none")])) == 1
@@ -0,0 +1,33 @@
+import pickle
+
+import pytest
+
+from utils.records import Transaction
+
+ROW = ("T001", "2024-12-01", "P101", "Widget", 2, 100.0, "C001", "North")
+
+
+def test_index_and_slice_keys_read_the_tuple():
+    txn = Transaction(*ROW)
+    assert txn[0] == "T001"
+    assert txn[-1] == 200.0
+    assert txn[:8] == ROW
+    assert txn["Quantity"] == 2
+    with pytest.raises(KeyError):
+        txn["revenue"]
+    with pytest.raises(IndexError):
+        txn[9]
+
+
+def test_replace_recomputes_revenue():
+    txn = Transaction(*ROW)._replace(Quantity=3, Region="South")
+    assert isinstance(txn, Transaction)
+    assert (txn.Quantity, txn.Region, txn.revenue) == (3, "South", 300.0)
+    with pytest.raises(ValueError):
+        txn._replace(revenue=1.0)
+    assert Transaction._make(ROW).revenue == 200.0
+
+
+def test_pickle_round_trip():
+    txn = Transaction(*ROW)
+    assert pickle.loads(pickle.dumps(txn)) == txn
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from utils.api_handler import enrichment_summary, generate_sales_report
+from utils.data_processor import SalesAggregator, calculate_total_revenue, region_wise_sales
+from utils.file_handler import parse_sales_file
+from utils.report import build_report_data, render_html, render_report, render_text
+
+
+def _transaction(i, product, region, quantity=1, unit_price=10.0):
+    return {"TransactionID": f"T{i:03}", "Date": f"2024-12-{i % 28 + 1:02}", "ProductID": f"P{i}",
+            "ProductName": product, "Quantity": quantity, "UnitPrice": unit_price, "CustomerID": f"C{i % 7}",
+            "Region": region}
+
+
+def _enrichment(failed):
+    return {"total": 100, "success_count": 100 - sum(failed.values()), "failed_products": failed}
+
+
+def test_json_report_parses(tie_file, tmp_path):
+    transactions = parse_sales_file(tie_file)
+    path = generate_sales_report(None, SalesAggregator().update(transactions), str(tmp_path / "report.txt"),
+                                 fmt="json", enrichment=enrichment_summary(transactions))
+    assert path.endswith("report.json")
+    with open(path, encoding="utf-8") as file:
+        data = json.load(file)
+    assert data["summary"]["total_revenue"] == calculate_total_revenue(transactions)
+    assert [r["region"] for r in data["regions"]] == list(region_wise_sales(transactions))
+    assert data["top_products"][0] == {"product": "Widget B", "quantity": 3, "revenue": 225.0}
+    assert data["enrichment"]["failed_products"][0] == {"product": "Widget B", "count": 2}
+
+
+def test_html_escapes_names():
+    transactions = [_transaction(1, "<b>Bolt & Nut</b>", "<script>x</script>"),
+                    _transaction(2, 'Quote "Q"', "North")]
+    page = render_html(build_report_data(SalesAggregator().update(transactions),
+                                         _enrichment({"<i>Gone</i>": 2})))
+    assert "<b>" not in page and "<script>" not in page and "<i>" not in page
+    assert "&lt;b&gt;Bolt &amp; Nut&lt;/b&gt;" in page
+    assert "&lt;script&gt;x&lt;/script&gt;" in page
+    assert "&lt;i&gt;Gone&lt;/i&gt; (2 transactions)" in page
+    assert "Quote &quot;Q&quot;" in page
+
+
+def test_long_lists_are_capped():
+    # 30 products selling under 5 units, 25 failed products
+    aggregator = SalesAggregator().update([_transaction(i, f"Product {i}", "North") for i in range(30)])
+    enrichment = _enrichment({f"Product {i}": 1 for i in range(25)})
+    data = build_report_data(aggregator, enrichment, list_limit=10)
+    assert data["low_products"] == [f"Product {i}" for i in range(10)]
+    assert data["more_low_products"] == 20
+    assert [p["product"] for p in data["enrichment"]["failed_products"]] == [f"Product {i}" for i in range(10)]
+    assert data["enrichment"]["more_failed_products"] == 15
+    text = render_text(data)
+    assert " ... and 20 more" in text and " ... and 15 more" in text
+    assert "… and 20 more" in render_html(data)
+
+    uncapped = build_report_data(aggregator, enrichment, list_limit=None)
+    assert len(uncapped["low_products"]) == 30 and uncapped["more_low_products"] == 0
+    assert len(uncapped["enrichment"]["failed_products"]) == 25
+    exact = build_report_data(aggregator, enrichment, list_limit=30)
+    assert exact["more_low_products"] == 0 and "more" not in render_text(exact)
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        render_report({}, "pdf")
@@ -0,0 +1,39 @@
+import main
+from utils.result_cache import analytics_key
+
+
+def _run(sales_file, tmp_path, *extra):
+    args = main.parse_args([sales_file, "--cache-dir", str(tmp_path / "cache"), "--no-trace-memory",
+                            "--enriched-output", str(tmp_path / "enriched.txt"),
+                            "--report-output", str(tmp_path / "report.txt"), *extra])
+    return main.run_batch(args)
+
+
+def test_analytics_key_covers_encoding():
+    assert analytics_key("abc", file_encoder="utf-8") == analytics_key("abc", file_encoder="UTF8")
+    assert analytics_key("abc", file_encoder="utf-8") != analytics_key("abc", file_encoder="latin-1")
+
+
+def test_cache_hit_skips_reading(sales_file, tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "fetch_products", lambda *args, **kwargs: {})
+    assert _run(sales_file, tmp_path) == 0
+    report = (tmp_path / "report.txt").read_text(encoding="utf-8")
+
+    def not_read(*args, **kwargs):
+        raise AssertionError("input read on a cache hit")
+    monkeypatch.setattr(main, "read_transactions", not_read)
+    (tmp_path / "report.txt").unlink()
+    assert _run(sales_file, tmp_path) == 0
+    assert _figures(tmp_path / "report.txt") == _figures_text(report)
+
+    # Another encoding is a different key, so the input is read (and not_read fails the run)
+    assert _run(sales_file, tmp_path, "--encoding", "latin-1") == 1
+
+
+def _figures_text(report):
+    # Everything but the generation timestamp
+    return [line for line in report.splitlines() if "Generated" not in line]
+
+
+def _figures(path):
+    return _figures_text(path.read_text(encoding="utf-8"))
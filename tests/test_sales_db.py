@@ -0,0 +1,82 @@
+import math
+
+import pytest
+
+from utils.data_processor import (
+    calculate_total_revenue,
+    customer_analysis,
+    daily_sales_trend,
+    low_performing_products,
+    region_wise_sales,
+    top_selling_products
+)
+from utils.file_handler import parse_sales_file, validate_and_filter
+from utils.sales_db import SalesDatabase
+
+FILTERS = [{}, {"region": "North", "min_amount": 1000}]
+
+
+def _customers(customer_stats):
+    # The database lists products_bought in first-appearance order, the aggregator in set order
+    return [(customer_id, {**stats, 'products_bought': set(stats['products_bought'])})
+            for customer_id, stats in customer_stats.items()]
+
+
+def _assert_same_views(db, valid):
+    assert db.calculate_total_revenue() == calculate_total_revenue(valid)
+    assert list(db.region_wise_sales().items()) == list(region_wise_sales(valid).items())
+    for tie_break in ("first", "name"):
+        assert db.top_selling_products(None, tie_break) == top_selling_products(valid, None, tie_break)
+        assert (_customers(db.customer_analysis(None, tie_break)) ==
+                _customers(customer_analysis(valid, None, tie_break)))
+    assert _customers(db.customer_analysis(3)) == _customers(customer_analysis(valid, 3))
+    assert list(db.daily_sales_trend().items()) == list(daily_sales_trend(valid).items())
+    assert db.low_performing_products(50) == low_performing_products(valid, 50)
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_views_match_data_processor(sales_file, tmp_path, filters):
+    valid, _, _ = validate_and_filter(parse_sales_file(sales_file), **filters)
+    with SalesDatabase(str(tmp_path / "sales.sqlite")) as db:
+        assert db.load(valid, batch_size=1000) == len(valid)
+        _assert_same_views(db, valid)
+
+
+def test_ties_keep_first_appearance_order(tie_file, tmp_path):
+    valid, _, _ = validate_and_filter(parse_sales_file(tie_file))
+    with SalesDatabase(str(tmp_path / "sales.sqlite")) as db:
+        db.load(valid)
+        _assert_same_views(db, valid)
+        assert [name for name, *_ in db.top_selling_products(2)] == ["Widget B", "Widget A"]
+        assert list(db.region_wise_sales())[:2] == ["North", "South"]
+
+
+def test_empty_database(tmp_path):
+    with SalesDatabase(str(tmp_path / "sales.sqlite")) as db:
+        _assert_same_views(db, [])
+        assert len(db) == 0
+
+
+def test_reload_appends_unless_replaced(tie_file, tmp_path):
+    valid, _, _ = validate_and_filter(parse_sales_file(tie_file))
+    with SalesDatabase(str(tmp_path / "sales.sqlite")) as db:
+        db.load(valid)
+        db.load(valid)
+        assert len(db) == 2 * len(valid)
+        assert db.calculate_total_revenue() == round(2 * calculate_total_revenue(valid), 2)
+        db.load(valid, replace=True)
+        assert len(db) == len(valid)
+        _assert_same_views(db, valid)
+
+
+def test_non_finite_revenue(tie_file, tmp_path):
+    valid, _, _ = validate_and_filter(parse_sales_file(tie_file))
+    valid[0]['UnitPrice'] = math.inf
+    valid[1]['UnitPrice'] = math.nan
+    with SalesDatabase(str(tmp_path / "sales.sqlite")) as db:
+        db.load(valid)
+        assert math.isnan(db.calculate_total_revenue())
+        regions = db.region_wise_sales()
+        assert regions['North']['total_sales'] == math.inf
+        assert math.isnan(regions['South']['total_sales'])
+        assert regions['East']['total_sales'] == region_wise_sales(valid)['East']['total_sales']
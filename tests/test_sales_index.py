@@ -0,0 +1,62 @@
+import shutil
+
+from utils.file_handler import parse_sales_file, validate_and_filter
+from utils.records import TRANSACTION_FIELDS
+from utils.sales_index import SalesFileIndex
+
+
+def _rows(transactions):
+    # NaN != NaN, so compare the text of each field
+    return [[repr(txn[name]) for name in TRANSACTION_FIELDS] for txn in transactions]
+
+
+def _index(filename, tmp_path):
+    return SalesFileIndex(filename, index_path=str(tmp_path / "sales.index.npz"))
+
+
+def test_lookup_matches_linear_scan(sales_file, tmp_path):
+    transactions = parse_sales_file(sales_file)
+    ids = [txn['TransactionID'] for txn in transactions[::997]]
+    with _index(sales_file, tmp_path) as index:
+        for tid in ids:
+            assert _rows(index.lookup(tid)) == _rows(txn for txn in transactions if txn['TransactionID'] == tid)
+
+
+def test_select_matches_linear_scan(sales_file, tmp_path):
+    transactions = parse_sales_file(sales_file)
+    dates = sorted({txn['Date'] for txn in transactions})
+    start, end = dates[len(dates) // 4], dates[len(dates) // 2]
+    with _index(sales_file, tmp_path) as index:
+        assert _rows(index.date_range(start, end)) == _rows(txn for txn in transactions
+                                                            if start <= txn['Date'] <= end)
+        assert len(index.date_range()) == len(transactions)
+        valid, invalid, summary = index.select(start, end, region="North", min_amount=1000)
+        expected = validate_and_filter([txn for txn in transactions if start <= txn['Date'] <= end],
+                                       region="North", min_amount=1000)
+        assert (_rows(valid), invalid, summary) == (_rows(expected[0]), expected[1], expected[2])
+
+
+def test_missing_keys(tie_file, tmp_path):
+    with _index(tie_file, tmp_path) as index:
+        assert index.lookup("T999") == []
+        assert index.lookup("") == []
+        assert index.date_range("2025-01-01", "2025-12-31") == []
+        assert index.date_range("2024-12-03", "2024-12-01") == []
+
+
+def test_stale_sidecar_is_rebuilt(tie_file, tmp_path):
+    filename = str(tmp_path / "sales.txt")
+    shutil.copy(tie_file, filename)
+    with _index(filename, tmp_path) as index:
+        assert index.rebuilt and len(index) == 5
+    with _index(filename, tmp_path) as index:
+        assert not index.rebuilt
+
+    with open(filename, "a", encoding="utf-8") as file:
+        file.write("T006|2024-12-04|P105|Doohickey|1|10.0|C005|North\n"
+                   "T001|2024-12-04|P105|Doohickey|3|10.0|C005|North\n")
+    with _index(filename, tmp_path) as index:
+        assert index.rebuilt and len(index) == 7
+        assert [txn['Quantity'] for txn in index.lookup("T001")] == [2, 3]
+        assert [txn['ProductName'] for txn in index.lookup("T006")] == ["Doohickey"]
+        assert [txn['TransactionID'] for txn in index.date_range("2024-12-03")] == ["T005", "T006", "T001"]
@@ -0,0 +1,28 @@
+from utils.file_handler import parse_sales_file, validate_and_filter
+from utils.sketches import ApproxSalesAggregator
+
+
+def _snapshot(aggregator):
+    # Every entry's plain values and HyperLogLog registers
+    return [{key: {field: bytes(value.registers) if hasattr(value, 'registers') else value
+                   for field, value in entry.items()}
+             for key, entry in stats.items()}
+            for stats in (aggregator.region_stats, aggregator.product_stats, aggregator.date_stats)]
+
+
+def test_merge_leaves_sources_untouched(sales_file):
+    valid, _, _ = validate_and_filter(parse_sales_file(sales_file))
+    half = len(valid) // 2
+    first = ApproxSalesAggregator().update(valid[:half])
+    second = ApproxSalesAggregator().update(valid[half:])
+    first_before, second_before = _snapshot(first), _snapshot(second)
+
+    merged = ApproxSalesAggregator().merge(first).merge(second)
+    assert _snapshot(first) == first_before
+    assert _snapshot(second) == second_before
+
+    # Updating the merged aggregator does not reach the sources, nor the reverse
+    merged.update(valid[:100])
+    second.update(valid[:100])
+    assert _snapshot(first) == first_before
+    assert _snapshot(merged) == _snapshot(ApproxSalesAggregator().update(valid).update(valid[:100]))
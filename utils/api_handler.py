@@ -1,13 +1,93 @@
-import requests
 import os
-def fetch_all_products():
-    url = "https://dummyjson.com/products?limit=100"
+import time
+from collections import Counter
+from itertools import islice
+
+from utils.records import TransactionArrays, field_values
+from utils.report import LIST_LIMIT, RENDERERS, build_report_data, render_report
+
+PRODUCTS_URL = "https://dummyjson.com/products"
+REQUEST_TIMEOUT = 10  # seconds
+PAGE_SIZE = 100
+MAX_WORKERS = 8  # concurrent page requests
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5  # retry n waits BACKOFF_FACTOR * 2**n seconds
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def create_session(pool_size=MAX_WORKERS):
+    """
+    requests.Session with a keep-alive connection pool big enough for
+    `pool_size` concurrent requests.
+    """
+    # requests is imported on first use: runs served from the catalog
+    # cache never pay for loading it
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_with_retries(session, url, params=None, headers=None, timeout=REQUEST_TIMEOUT,
+                     retries=MAX_RETRIES, backoff=BACKOFF_FACTOR):
+    """
+    session.get with exponential backoff on connection errors, timeouts and
+    retryable status codes. Other responses are returned as they are.
+    """
+    import requests
+
+    for attempt in range(retries + 1):
+        try:
+            response = session.get(url, params=params, headers=headers, timeout=timeout)
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt == retries:
+                raise
+        time.sleep(backoff * 2 ** attempt)
+
+
+def iter_product_pages(url=PRODUCTS_URL, page_size=PAGE_SIZE, max_workers=MAX_WORKERS,
+                       timeout=REQUEST_TIMEOUT, retries=MAX_RETRIES, session=None, first_page=None):
+    """
+    Yields (skip, products) for every page of the catalog. The first page
+    gives `total`; the rest are requested concurrently (at most max_workers
+    in flight) and yielded as they arrive, not in skip order.
+    `first_page` is an already fetched first-page JSON body, if any.
+    """
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    session = session or create_session(max_workers)
+
+    def fetch_page(skip):
+        response = get_with_retries(session, url, params={"limit": page_size, "skip": skip},
+                                    timeout=timeout, retries=retries)
+        response.raise_for_status()
+        return response.json()
+
+    data = first_page if first_page is not None else fetch_page(0)
+    products = data.get('products', [])
+    yield data.get('skip', 0), products
+
+    total = data.get('total', len(products))
+    step = data.get('limit') or page_size  # the API may cap the page size
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(fetch_page, skip) for skip in range(len(products), total, step)]
+        for future in as_completed(futures):
+            page = future.result()
+            yield page.get('skip', 0), page.get('products', [])
+
+
+def fetch_all_products(url=PRODUCTS_URL, timeout=REQUEST_TIMEOUT, page_size=PAGE_SIZE, max_workers=MAX_WORKERS):
+    import requests
+
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise error for bad responses
-        print(response.status_code) #if status code is 200, request is successful, if 500, server error
-        data = response.json()
-        products = data.get('products', [])
+        pages = dict(iter_product_pages(url, page_size, max_workers, timeout))
+        products = [product for skip in sorted(pages) for product in pages[skip]]
         print(f"Successfully fetched {len(products)} products.")
         return products
     except requests.exceptions.RequestException as e:
@@ -15,8 +95,10 @@ def fetch_all_products():
         return []
 
 
-def create_product_mapping(api_products):
-    product_mapping = {}
+def create_product_mapping(api_products, product_mapping=None):
+    # Pass an existing mapping to extend it page by page
+    if product_mapping is None:
+        product_mapping = {}
     for product in api_products:
         product_id = product['id']
         product_info = {
@@ -28,214 +110,267 @@ def create_product_mapping(api_products):
         product_mapping[product_id] = product_info
     return product_mapping
 
-def enrich_sales_data(transactions, product_mapping):
-    enriched_transactions = []
 
-    for transaction in transactions:
-        enriched = transaction.copy()
+def fetch_product_mapping(url=PRODUCTS_URL, timeout=REQUEST_TIMEOUT, page_size=PAGE_SIZE,
+                          max_workers=MAX_WORKERS, session=None, first_page=None):
+    """
+    Full catalog as a product mapping, built page by page as responses
+    arrive. Raises requests.exceptions.RequestException on failure.
+    """
+    product_mapping = {}
+    for skip, products in iter_product_pages(url, page_size, max_workers, timeout,
+                                             session=session, first_page=first_page):
+        create_product_mapping(products, product_mapping)
+    return product_mapping
+
+def parse_product_id(product_id_str):
+    """'P101' -> 101; None for anything that is not P followed by a number."""
+    if isinstance(product_id_str, str) and product_id_str.startswith("P"):
+        try:
+            return int(product_id_str[1:])
+        except ValueError:
+            pass  # Invalid numeric part
+    return None
+
+
+class EnrichedSales:
+    """
+    Result of enrich_sales_data: the original transactions plus one
+    ProductID -> catalog row index (None for no match). Nothing is copied
+    per row; the API_* fields are resolved when a row is read.
+    """
+
+    def __init__(self, transactions, product_index):
+        self.transactions = transactions
+        self.product_index = product_index
+
+    def __len__(self):
+        return len(self.transactions)
+
+    def __iter__(self):
+        for transaction in self.transactions:
+            yield self.row(transaction)
+
+    def __getitem__(self, i):
+        return self.row(self.transactions[i])
+
+    def product_info(self, transaction):
+        return self.product_index.get(transaction.get("ProductID", ""))
+
+    def row(self, transaction):
+        # Transient enriched dict, in the shape enrich_sales_data used to return
+        product_info = self.product_info(transaction)
+        enriched = dict(transaction)
+        if product_info:
+            enriched["API_Category"] = product_info.get("category")
+            enriched["API_Brand"] = product_info.get("brand")
+            enriched["API_Rating"] = product_info.get("rating")
+            enriched["API_Match"] = True
+        else:
+            enriched.update({"API_Category": None, "API_Brand": None, "API_Rating": None, "API_Match": False})
+        return enriched
 
-        # Default enrichment values
-        enriched.update({
-            "API_Category": None,
-            "API_Brand": None,
-            "API_Rating": None,
-            "API_Match": False
-        })
+    def match_count(self):
+        product_index = self.product_index
+        return sum(1 for product_id in field_values(self.transactions, "ProductID") if product_index.get(product_id))
 
-        product_id_str = transaction.get("ProductID", "")
+    def unmatched(self):
+        return (t for t in self.transactions if not self.product_info(t))
 
-        if isinstance(product_id_str, str) and product_id_str.startswith("P"):
-            try:
-                product_id = int(product_id_str[1:])
-                product_info = product_mapping.get(product_id)
 
-                if product_info:
-                    enriched["API_Category"] = product_info.get("category")
-                    enriched["API_Brand"] = product_info.get("brand")
-                    enriched["API_Rating"] = product_info.get("rating")
-                    enriched["API_Match"] = True
+def build_product_index(transactions, product_mapping):
+    """
+    ProductID string -> product_info (or None), parsing each distinct
+    ProductID once. Memory is O(distinct products), not O(rows).
+    """
+    product_index = {}
+    for product_id_str in field_values(transactions, "ProductID"):
+        if product_id_str not in product_index:
+            product_id = parse_product_id(product_id_str)
+            product_index[product_id_str] = product_mapping.get(product_id) if product_id is not None else None
+    return product_index
 
-            except ValueError:
-                pass  # Invalid numeric part
 
-        enriched_transactions.append(enriched)
+def enrich_sales_data(transactions, product_mapping):
+    if not isinstance(transactions, (list, tuple, TransactionArrays)):
+        transactions = list(transactions)
+    return EnrichedSales(transactions, build_product_index(transactions, product_mapping))
+
+ENRICHED_HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region|API_Category|API_Brand|API_Rating|API_Match\n"
+WRITE_BUFFER_SIZE = 1 << 20  # bytes
+WRITE_BATCH_SIZE = 10000  # rows joined per write() call
 
-    return enriched_transactions
 
-def save_enriched_data(enriched_transactions, filename='data/enriched_sales_data.txt'):
+def _enrichment_suffix(product_info):
+    # "|API_Category|API_Brand|API_Rating|API_Match\n" for one catalog row
+    if product_info:
+        return f"|{product_info.get('category')}|{product_info.get('brand')}|{product_info.get('rating')}|Yes\n"
+    return "|None|None|None|No\n"
+
+
+def _enriched_line_formatter(enriched_transactions):
+    """
+    Returns (rows, format_line) where format_line(row) gives one output
+    line. For EnrichedSales the API_* tail is built once per ProductID and
+    rows are the plain transactions, so no enriched dicts are created.
+    """
+    if isinstance(enriched_transactions, EnrichedSales):
+        suffixes = {pid: _enrichment_suffix(info) for pid, info in enriched_transactions.product_index.items()}
+        if isinstance(enriched_transactions.transactions, TransactionArrays):
+            # Rows are plain field tuples read off the columns
+            def format_line(row):
+                return "|".join(map(str, row)) + suffixes[row[2]]
+            return enriched_transactions.transactions.rows(), format_line
+
+        def format_line(t):
+            get = t.get
+            return "|".join((
+                str(get("TransactionID", "")), str(get("Date", "")), str(get("ProductID", "")),
+                str(get("ProductName", "")), str(get("Quantity", 0)), str(get("UnitPrice", 0.0)),
+                str(get("CustomerID", "")), str(get("Region", ""))
+            )) + suffixes[get("ProductID", "")]
+        return enriched_transactions.transactions, format_line
+
+    def format_line(t):
+        get = t.get
+        return "|".join((
+            str(get("TransactionID", "")), str(get("Date", "")), str(get("ProductID", "")),
+            str(get("ProductName", "")), str(get("Quantity", 0)), str(get("UnitPrice", 0.0)),
+            str(get("CustomerID", "")), str(get("Region", "")), str(get("API_Category", "")),
+            str(get("API_Brand", "")), str(get("API_Rating", "")),
+            "Yes" if get("API_Match", False) else "No"
+        )) + "\n"
+    return enriched_transactions, format_line
+
+
+def _save_enriched_npz(enriched_transactions, filename):
+    import numpy as np
+
+    if isinstance(enriched_transactions, EnrichedSales):
+        transactions = enriched_transactions.transactions
+        product_index = enriched_transactions.product_index
+        product_infos = [product_index.get(pid) or {} for pid in field_values(transactions, "ProductID")]
+    else:
+        transactions = enriched_transactions
+        product_infos = [
+            {'category': t.get("API_Category"), 'brand': t.get("API_Brand"), 'rating': t.get("API_Rating")}
+            if t.get("API_Match") else {}
+            for t in enriched_transactions
+        ]
+
+    def text_column(name):
+        return np.array(list(field_values(transactions, name)), dtype=str)
+
+    np.savez(
+        filename,
+        TransactionID=text_column("TransactionID"),
+        Date=text_column("Date"),
+        ProductID=text_column("ProductID"),
+        ProductName=text_column("ProductName"),
+        Quantity=np.array(list(field_values(transactions, "Quantity", 0)), dtype=np.int64),
+        UnitPrice=np.array(list(field_values(transactions, "UnitPrice", 0.0)), dtype=np.float64),
+        CustomerID=text_column("CustomerID"),
+        Region=text_column("Region"),
+        API_Category=np.array([info.get('category') or "" for info in product_infos], dtype=str),
+        API_Brand=np.array([info.get('brand') or "" for info in product_infos], dtype=str),
+        API_Rating=np.array([info.get('rating', np.nan) for info in product_infos], dtype=np.float64),
+        API_Match=np.array([bool(info) for info in product_infos], dtype=bool)
+    )
+
+
+def load_enriched_npz(filename):
+    """Column name -> NumPy array, as written by save_enriched_data(..., fmt='npz')."""
+    import numpy as np
+
+    with np.load(filename) as data:
+        return {name: data[name] for name in data.files}
+
+
+def save_enriched_data(enriched_transactions, filename='data/enriched_sales_data.txt', fmt='text',
+                       buffer_size=WRITE_BUFFER_SIZE, batch_size=WRITE_BATCH_SIZE, append=False):
     """
     Saves enriched transactions to a text file in the 'data' folder.
     Ensures folder exists.
+    fmt='text' writes the pipe-delimited format in batches of `batch_size`
+    rows through a `buffer_size` byte buffer; fmt='npz' writes one NumPy
+    array per column (empty string / NaN where the API had no match) that
+    load_enriched_npz reads back without any text parsing. append=True
+    (text only) adds the rows to an existing file, writing the header only
+    when the file is new.
     """
     # Ensure folder exists
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
-
-    with open(filename, 'w', encoding='utf-8', newline='') as file:
-        header = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region|API_Category|API_Brand|API_Rating|API_Match\n"
-        file.write(header)
-        for t in enriched_transactions:
-            line = "|".join([
-                str(t.get("TransactionID", "")),
-                str(t.get("Date", "")),
-                str(t.get("ProductID", "")),
-                str(t.get("ProductName", "")),
-                str(t.get("Quantity", 0)),
-                str(t.get("UnitPrice", 0.0)),
-                str(t.get("CustomerID", "")),
-                str(t.get("Region", "")),
-                str(t.get("API_Category", "")),
-                str(t.get("API_Brand", "")),
-                str(t.get("API_Rating", "")),
-                "Yes" if t.get("API_Match", False) else "No"
-            ]) + "\n"
-            file.write(line)
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+
+    if fmt == 'npz':
+        if not filename.endswith('.npz'):
+            filename = os.path.splitext(filename)[0] + '.npz'
+        _save_enriched_npz(enriched_transactions, filename)
+        return filename
+    if fmt != 'text':
+        raise ValueError(f"Unknown enriched data format: {fmt}")
+
+    rows, format_line = _enriched_line_formatter(enriched_transactions)
+    rows = iter(rows)
+    with open(filename, 'a' if append else 'w', encoding='utf-8', newline='', buffering=buffer_size) as file:
+        if not file.tell():
+            file.write(ENRICHED_HEADER)
+        while True:
+            chunk = "".join(map(format_line, islice(rows, batch_size)))
+            if not chunk:
+                break
+            file.write(chunk)
     return filename
 
 
-import os
-from datetime import datetime
-from collections import defaultdict
-def generate_sales_report(enriched_transactions, transactions, output_file='output/sales_report.txt'):
+def enrichment_summary(enriched_transactions):
+    """
+    {'total', 'success_count', 'failed_products'} for build_report_data;
+    failed_products maps each unmatched product name to its number of
+    transactions, in order of first appearance.
+    """
+    total = len(enriched_transactions)
+    if isinstance(enriched_transactions, EnrichedSales):
+        product_index = enriched_transactions.product_index
+        transactions = enriched_transactions.transactions
+        # One counted (ProductID, ProductName) pair per distinct product, not per row
+        pairs = Counter(zip(field_values(transactions, "ProductID"), field_values(transactions, "ProductName", "Unknown")))
+        failed_products = {}
+        for (product_id, name), count in pairs.items():
+            if not product_index.get(product_id):
+                failed_products[name] = failed_products.get(name, 0) + count
+    else:
+        failed_products = Counter(t.get("ProductName", "Unknown") for t in enriched_transactions if not t.get("API_Match"))
+    return {
+        'total': total,
+        'success_count': total - sum(failed_products.values()),
+        'failed_products': dict(failed_products)
+    }
+
+
+def generate_sales_report(enriched_transactions, aggregator, output_file='output/sales_report.txt', fmt='text',
+                          list_limit=LIST_LIMIT, enrichment=None):
     """
     Generates a comprehensive report in the 'output' folder.
     Ensures folder exists.
+    `aggregator` is the SalesAggregator built during analysis (a plain
+    transaction list is still accepted and aggregated once here), or an
+    ApproxSalesAggregator, in which case estimates are marked as such.
+    fmt is 'text', 'json' or 'html' (the extension follows the format);
+    each is rendered from the same build_report_data result and written
+    in one call. Failed products are listed once each with their count,
+    and long lists stop after `list_limit` entries. `enrichment` is an
+    enrichment_summary computed already (enriched_transactions may then be
+    None).
     """
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    total_records = len(transactions)
-
-    # -----------------------------
-    # Pre-processing
-    # -----------------------------
-    total_revenue = 0.0
-    dates = []
-    region_sales = defaultdict(float)
-    region_transactions = defaultdict(int)
-    product_qty = defaultdict(int)
-    product_revenue = defaultdict(float)
-    customer_spend = defaultdict(float)
-    customer_orders = defaultdict(set)
-    daily_data = defaultdict(lambda: {"revenue": 0.0, "transactions": 0, "customers": set()})
-
-    for t in transactions:
-        quantity = t.get("Quantity", 0)
-        unit_price = t.get("UnitPrice", 0.0)
-        revenue = quantity * unit_price
-        total_revenue += revenue
-
-        date = t.get("Date", "N/A")
-        dates.append(date)
-
-        region = t.get("Region", "Unknown")
-        region_sales[region] += revenue
-        region_transactions[region] += 1
-
-        product = t.get("ProductName", "Unknown")
-        product_qty[product] += quantity
-        product_revenue[product] += revenue
-
-        customer = t.get("CustomerID", "Unknown")
-        customer_spend[customer] += revenue
-        customer_orders[customer].add(date)
-
-        daily_data[date]["revenue"] += revenue
-        daily_data[date]["transactions"] += 1
-        daily_data[date]["customers"].add(customer)
-
-    total_transactions = total_records
-    avg_order_value = total_revenue / total_transactions if total_transactions else 0
-    date_range = f"{min(dates)} to {max(dates)}" if dates else "N/A"
-
-    # -----------------------------
-    # Top entities
-    # -----------------------------
-    top_products = sorted(product_revenue.items(), key=lambda x: x[1], reverse=True)[:5]
-    top_customers = sorted(customer_spend.items(), key=lambda x: x[1], reverse=True)[:5]
-
-    best_selling_day = max(daily_data.items(), key=lambda x: x[1]["revenue"])[0] if daily_data else "N/A"
-    low_products = [p for p, qty in product_qty.items() if qty < 5]  # low quantity products
-
-    # -----------------------------
-    # API Enrichment Summary
-    # -----------------------------
-    enriched_total = len(enriched_transactions)
-    success_count = sum(1 for t in enriched_transactions if t.get("API_Match"))
-    failed_products = [t.get("ProductName", "Unknown") for t in enriched_transactions if not t.get("API_Match")]
-    success_rate = (success_count / enriched_total * 100) if enriched_total else 0
-
-    # -----------------------------
-    # Report Writing
-    # -----------------------------
+    if fmt not in RENDERERS:
+        raise ValueError(f"Unknown report format: {fmt}")
+    if fmt != 'text' and not output_file.endswith('.' + fmt):
+        output_file = os.path.splitext(output_file)[0] + '.' + fmt
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    if enrichment is None:
+        enrichment = enrichment_summary(enriched_transactions)
+    data = build_report_data(aggregator, enrichment, list_limit=list_limit)
+    content = render_report(data, fmt)
     with open(output_file, "w", encoding="utf-8") as f:
-        f.write("=" * 44 + "\n")
-        f.write("       SALES ANALYTICS REPORT\n")
-        f.write(f"     Generated: {now}\n")
-        f.write(f"     Records Processed: {total_records}\n")
-        f.write("=" * 44 + "\n\n")
-
-        # OVERALL SUMMARY
-        f.write("OVERALL SUMMARY\n")
-        f.write("-" * 44 + "\n")
-        f.write(f"Total Revenue:        ₹{total_revenue:,.2f}\n")
-        f.write(f"Total Transactions:   {total_transactions}\n")
-        f.write(f"Average Order Value:  ₹{avg_order_value:,.2f}\n")
-        f.write(f"Date Range:           {date_range}\n\n")
-
-        # REGION-WISE PERFORMANCE
-        f.write("REGION-WISE PERFORMANCE\n")
-        f.write("-" * 44 + "\n")
-        f.write(f"{'Region':10}{'Sales':15}{'% of Total':12}{'Transactions'}\n")
-        for region, sales in sorted(region_sales.items(), key=lambda x: x[1], reverse=True):
-            percent = (sales / total_revenue * 100) if total_revenue else 0
-            f.write(f"{region:10}₹{sales:13,.2f}  {percent:8.2f}%     {region_transactions[region]}\n")
-        f.write("\n")
-
-        # TOP PRODUCTS
-        f.write("TOP 5 PRODUCTS\n")
-        f.write("-" * 44 + "\n")
-        f.write(f"{'Rank':5}{'Product':25}{'Qty Sold':10}{'Revenue'}\n")
-        for i, (prod, rev) in enumerate(top_products, 1):
-            f.write(f"{i:<5}{prod:25}{product_qty[prod]:<10}₹{rev:,.2f}\n")
-        f.write("\n")
-
-        # TOP CUSTOMERS
-        f.write("TOP 5 CUSTOMERS\n")
-        f.write("-" * 44 + "\n")
-        f.write(f"{'Rank':5}{'Customer ID':15}{'Total Spent':15}{'Orders'}\n")
-        for i, (cust, spent) in enumerate(top_customers, 1):
-            f.write(f"{i:<5}{cust:15}₹{spent:13,.2f}  {len(customer_orders[cust])}\n")
-        f.write("\n")
-
-        # DAILY SALES TREND
-        f.write("DAILY SALES TREND\n")
-        f.write("-" * 44 + "\n")
-        f.write(f"{'Date':12}{'Revenue':15}{'Txns':8}{'Customers'}\n")
-        for date in sorted(daily_data):
-            d = daily_data[date]
-            f.write(f"{date:12}₹{d['revenue']:13,.2f}  {d['transactions']:<8}{len(d['customers'])}\n")
-        f.write("\n")
-
-        # PRODUCT PERFORMANCE ANALYSIS
-        f.write("PRODUCT PERFORMANCE ANALYSIS\n")
-        f.write("-" * 44 + "\n")
-        f.write(f"Best Selling Day: {best_selling_day}\n")
-        f.write("Low Performing Products:\n")
-        for p in low_products:
-            f.write(f" - {p}\n")
-        f.write("\nAverage Transaction Value per Region:\n")
-        for r in region_sales:
-            avg = region_sales[r] / region_transactions[r]
-            f.write(f" - {r}: ₹{avg:,.2f}\n")
-        f.write("\n")
-
-        # API ENRICHMENT SUMMARY
-        f.write("API ENRICHMENT SUMMARY\n")
-        f.write("-" * 44 + "\n")
-        f.write(f"Total Products Enriched: {enriched_total}\n")
-        f.write(f"Success Rate: {success_rate:.2f}%\n")
-        f.write("Failed Products:\n")
-        for p in failed_products:
-            f.write(f" - {p}\n")
-
+        f.write(content)
     return output_file
-
@@ -0,0 +1,227 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+
+from utils.api_handler import PAGE_SIZE, PRODUCTS_URL, REQUEST_TIMEOUT, create_session, fetch_product_mapping, get_with_retries
+
+DEFAULT_CACHE_PATH = "data/product_catalog.sqlite"
+DEFAULT_TTL = 24 * 60 * 60  # seconds a cached catalog is served without revalidation
+DEFAULT_STALE_WHILE_REVALIDATE = 60 * 60  # after the TTL, serve stale and refresh in the background
+DEFAULT_NEGATIVE_TTL = 24 * 60 * 60  # how long a product id the API 404'd on is remembered
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    title,
+    category,
+    brand,
+    rating,
+    fetched_at REAL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+CREATE TABLE IF NOT EXISTS missing_products (
+    id INTEGER PRIMARY KEY,
+    checked_at REAL
+);
+"""
+
+
+def _connect(cache_path):
+    directory = os.path.dirname(cache_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    connection = sqlite3.connect(cache_path)
+    connection.executescript(_SCHEMA)
+    # Caches from before product rows had a fetched_at get the column, NULL
+    if "fetched_at" not in {row[1] for row in connection.execute("PRAGMA table_info(products)")}:
+        connection.execute("ALTER TABLE products ADD COLUMN fetched_at REAL")
+    return connection
+
+
+@contextmanager
+def _transaction(cache_path):
+    # A connection's own context manager only commits or rolls back; the
+    # connection is closed here as well
+    with closing(_connect(cache_path)) as connection, connection:
+        yield connection
+
+
+def load_cached_mapping(cache_path=DEFAULT_CACHE_PATH):
+    """
+    Returns (product_mapping, meta) from the cache, or (None, {}) if there
+    is no usable cache. meta holds url, fetched_at, etag and last_modified.
+    """
+    if not os.path.exists(cache_path):
+        return None, {}
+    try:
+        with _transaction(cache_path) as connection:
+            meta = dict(connection.execute("SELECT key, value FROM meta"))
+            if "fetched_at" not in meta:
+                return None, {}
+            product_mapping = {
+                product_id: {'title': title, 'category': category, 'brand': brand, 'rating': rating}
+                for product_id, title, category, brand, rating
+                in connection.execute("SELECT id, title, category, brand, rating FROM products")
+            }
+        return product_mapping, meta
+    except sqlite3.DatabaseError as e:
+        print(f"Ignoring unreadable product cache {cache_path}: {e}")
+        return None, {}
+
+
+def save_mapping(product_mapping, meta, cache_path=DEFAULT_CACHE_PATH):
+    now = time.time()
+    with _transaction(cache_path) as connection:
+        connection.execute("DELETE FROM products")
+        connection.executemany(
+            "INSERT INTO products (id, title, category, brand, rating, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+            ((product_id, info.get('title'), info.get('category'), info.get('brand'), info.get('rating'), now)
+             for product_id, info in product_mapping.items())
+        )
+        connection.execute("DELETE FROM meta")
+        connection.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", meta.items())
+
+
+def load_products(product_ids, cache_path=DEFAULT_CACHE_PATH, negative_ttl=DEFAULT_NEGATIVE_TTL, ttl=None):
+    """
+    Looks up individual products in the cache. Returns (found, missing):
+    the cached rows as a product mapping, and the ids recently confirmed
+    not to exist. Ids in neither are unknown to the cache. With `ttl`,
+    rows fetched more than ttl seconds ago are left out of found as well.
+    """
+    product_ids = list(product_ids)
+    if not product_ids or not os.path.exists(cache_path):
+        return {}, set()
+    found = {}
+    missing = set()
+    # NULL fetched_at (rows cached before it was recorded) never counts as fresh
+    fresh_clause, fresh_params = ("", []) if ttl is None else (" AND fetched_at > ?", [time.time() - ttl])
+    with _transaction(cache_path) as connection:
+        # SQLite caps bound parameters per statement, so query in slices
+        for i in range(0, len(product_ids), 500):
+            batch = product_ids[i:i + 500]
+            placeholders = ",".join("?" * len(batch))
+            for product_id, title, category, brand, rating in connection.execute(
+                    f"SELECT id, title, category, brand, rating FROM products WHERE id IN ({placeholders}){fresh_clause}",
+                    batch + fresh_params):
+                found[product_id] = {'title': title, 'category': category, 'brand': brand, 'rating': rating}
+            missing.update(product_id for (product_id,) in connection.execute(
+                f"SELECT id FROM missing_products WHERE id IN ({placeholders}) AND checked_at > ?",
+                batch + [time.time() - negative_ttl]))
+    return found, missing
+
+
+def save_products(product_mapping, missing_ids=(), cache_path=DEFAULT_CACHE_PATH):
+    """
+    Adds individually fetched products (and ids the API does not know) to
+    the cache without touching the full-catalog metadata.
+    """
+    now = time.time()
+    with _transaction(cache_path) as connection:
+        connection.executemany(
+            "INSERT OR REPLACE INTO products (id, title, category, brand, rating, fetched_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            ((product_id, info.get('title'), info.get('category'), info.get('brand'), info.get('rating'), now)
+             for product_id, info in product_mapping.items())
+        )
+        connection.executemany("DELETE FROM missing_products WHERE id = ?", ((i,) for i in product_mapping))
+        connection.executemany(
+            "INSERT OR REPLACE INTO missing_products (id, checked_at) VALUES (?, ?)",
+            ((product_id, now) for product_id in missing_ids)
+        )
+
+
+def _touch(meta, cache_path):
+    # A 304 for the full catalog confirms its rows as well
+    meta = dict(meta, fetched_at=time.time())
+    with _transaction(cache_path) as connection:
+        connection.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", meta.items())
+        connection.execute("UPDATE products SET fetched_at = ?", (meta["fetched_at"],))
+
+
+def revalidate(url=PRODUCTS_URL, cache_path=DEFAULT_CACHE_PATH, timeout=REQUEST_TIMEOUT,
+               cached_mapping=None, meta=None):
+    """
+    Conditional GET of the first catalog page using the cached ETag /
+    Last-Modified. Returns the current mapping: the cached one on 304,
+    otherwise the full catalog fetched page by page.
+    Raises requests.exceptions.RequestException when the API can't be reached.
+    """
+    meta = meta or {}
+    headers = {}
+    if cached_mapping is not None and meta.get("url") == url:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    session = create_session()
+    response = get_with_retries(session, url, params={"limit": PAGE_SIZE, "skip": 0},
+                                headers=headers, timeout=timeout)
+    if response.status_code == 304 and headers:
+        _touch(meta, cache_path)
+        return cached_mapping
+    response.raise_for_status()
+    product_mapping = fetch_product_mapping(url, timeout, session=session, first_page=response.json())
+    new_meta = {"url": url, "fetched_at": time.time()}
+    if response.headers.get("ETag"):
+        new_meta["etag"] = response.headers["ETag"]
+    if response.headers.get("Last-Modified"):
+        new_meta["last_modified"] = response.headers["Last-Modified"]
+    save_mapping(product_mapping, new_meta, cache_path)
+    return product_mapping
+
+
+def _background_revalidate(url, cache_path, timeout, cached_mapping, meta):
+    import requests
+
+    try:
+        revalidate(url, cache_path, timeout, cached_mapping, meta)
+    except requests.exceptions.RequestException as e:
+        print(f"Background product catalog refresh failed: {e}")
+
+
+def get_product_mapping(url=PRODUCTS_URL, cache_path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL,
+                        stale_while_revalidate=DEFAULT_STALE_WHILE_REVALIDATE, timeout=REQUEST_TIMEOUT):
+    """
+    Cached replacement for create_product_mapping(fetch_all_products()).
+
+    - younger than `ttl`: served from the cache, no network call
+    - within `stale_while_revalidate` after that: served from the cache
+      while a background thread revalidates it
+    - older: revalidated first (ETag / If-Modified-Since)
+    - API unreachable: the stale cached copy is served if there is one
+      and it was fetched from the same `url`
+    """
+    cached_mapping, meta = load_cached_mapping(cache_path)
+    if meta.get("url") != url:
+        cached_mapping = None  # a catalog cached from another URL is never served for this one
+    if cached_mapping is not None:
+        age = time.time() - float(meta["fetched_at"])
+        if age < ttl:
+            return cached_mapping
+        if age < ttl + stale_while_revalidate:
+            # Daemon: a run that finishes first does not wait for the refresh
+            threading.Thread(
+                target=_background_revalidate,
+                args=(url, cache_path, timeout, cached_mapping, meta),
+                name="catalog-revalidate",
+                daemon=True
+            ).start()
+            return cached_mapping
+
+    import requests  # only once the network is involved
+
+    try:
+        return revalidate(url, cache_path, timeout, cached_mapping, meta)
+    except requests.exceptions.RequestException as e:
+        if cached_mapping is not None:
+            print(f"Failed to refresh product catalog ({e}); using cached copy")
+            return cached_mapping
+        print(f"Failed to fetch products: {e}")
+        return {}
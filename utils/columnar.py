@@ -0,0 +1,179 @@
+import math
+from array import array
+
+import numpy as np
+
+from utils.data_processor import SalesAggregator, _to_units
+
+
+def _encode(index, value, codes):
+    # Dictionary-encode one value; codes follow first-appearance order so
+    # ties come out in the same order as the dict based aggregator
+    code = index.get(value)
+    if code is None:
+        code = index[value] = len(index)
+    codes.append(code)
+
+
+def _sum_units(values):
+    try:
+        return _to_units(math.fsum(values))
+    except ValueError:
+        # fsum refuses inf + -inf; the float sum gives the nan a running total would
+        return _to_units(sum(values))
+
+
+def _to_datetime64(date):
+    try:
+        return np.datetime64(date, 'D')
+    except ValueError:
+        return np.datetime64('NaT')
+
+
+class TransactionTable:
+    """
+    Columnar store for parsed transactions.
+
+    Quantity/UnitPrice are NumPy arrays, Region/ProductID/ProductName/
+    CustomerID/Date are dictionary-encoded int32 codes, and the per-group
+    totals are computed with np.bincount / ufunc.at instead of per-row dict
+    updates. Pass a table anywhere data_processor expects transactions.
+    """
+
+    def __init__(self, transaction_ids, quantity, unit_price, columns):
+        self.transaction_ids = transaction_ids
+        self.quantity = quantity
+        self.unit_price = unit_price
+        self.revenue = quantity * unit_price
+        # columns: name -> (codes, categories)
+        self.columns = columns
+        date_categories = columns['Date'][1]
+        self.date_values = np.array([_to_datetime64(d) for d in date_categories], dtype='datetime64[D]')
+        self._aggregate = None
+
+    @classmethod
+    def from_transactions(cls, transactions):
+        names = ('Date', 'ProductID', 'ProductName', 'CustomerID', 'Region')
+        indexes = {name: {} for name in names}
+        codes = {name: array('i') for name in names}
+        transaction_ids = []
+        quantity = array('q')
+        unit_price = array('d')
+        for txn in transactions:
+            transaction_ids.append(txn.get("TransactionID", ""))
+            quantity.append(txn.get("Quantity", 0))
+            unit_price.append(txn.get("UnitPrice", 0))
+            _encode(indexes['Date'], txn.get("Date", "Unknown"), codes['Date'])
+            _encode(indexes['ProductID'], txn.get("ProductID", ""), codes['ProductID'])
+            _encode(indexes['ProductName'], txn.get("ProductName", "Unknown"), codes['ProductName'])
+            _encode(indexes['CustomerID'], txn.get("CustomerID", "Unknown"), codes['CustomerID'])
+            _encode(indexes['Region'], txn.get("Region", "Unknown"), codes['Region'])
+        columns = {
+            name: (np.frombuffer(codes[name], dtype=np.int32), list(indexes[name]))
+            for name in names
+        }
+        return cls(
+            np.array(transaction_ids, dtype=str),
+            np.frombuffer(quantity, dtype=np.int64),
+            np.frombuffer(unit_price, dtype=np.float64),
+            columns
+        )
+
+    def __len__(self):
+        return len(self.quantity)
+
+    def __iter__(self):
+        # Row view for code that still wants dicts (enrichment, writers)
+        decoded = {name: (codes, categories) for name, (codes, categories) in self.columns.items()}
+        for i in range(len(self)):
+            row = {name: categories[codes[i]] for name, (codes, categories) in decoded.items()}
+            yield {
+                'TransactionID': str(self.transaction_ids[i]),
+                'Date': row['Date'],
+                'ProductID': row['ProductID'],
+                'ProductName': row['ProductName'],
+                'Quantity': int(self.quantity[i]),
+                'UnitPrice': float(self.unit_price[i]),
+                'CustomerID': row['CustomerID'],
+                'Region': row['Region']
+            }
+
+    @property
+    def date(self):
+        return self.date_values[self.columns['Date'][0]]
+
+    def _group_revenue_units(self, name):
+        # Exact per-group revenue (math.fsum over each group's rows) so the
+        # totals match SalesAggregator's fixed-point sums bit for bit
+        codes, categories = self.columns[name]
+        order = np.argsort(codes, kind='stable')
+        values = self.revenue[order].tolist()
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(categories))))).tolist()
+        return [_sum_units(values[bounds[i]:bounds[i + 1]]) for i in range(len(categories))]
+
+    def _group_count(self, name):
+        codes, categories = self.columns[name]
+        return np.bincount(codes, minlength=len(categories))
+
+    def _pair_counts(self, name, other):
+        # Number of distinct `other` values per `name` group
+        codes, categories = self.columns[name]
+        other_codes, other_categories = self.columns[other]
+        pairs = np.unique(codes.astype(np.int64) * len(other_categories) + other_codes)
+        return np.bincount(pairs // max(len(other_categories), 1), minlength=len(categories))
+
+    def aggregate(self):
+        """
+        Returns a SalesAggregator filled from vectorized group-bys. Distinct
+        counts are stored as ints, so the result is read-only (do not add()).
+        """
+        if self._aggregate is not None:
+            return self._aggregate
+        aggregator = SalesAggregator()
+        aggregator.transaction_count = len(self)
+        aggregator.revenue_units = _sum_units(self.revenue.tolist())
+        dates = [d for d, n in zip(self.columns['Date'][1], self._group_count('Date')) if n]
+        if dates:
+            aggregator.min_date = min(dates)
+            aggregator.max_date = max(dates)
+
+        regions = self.columns['Region'][1]
+        for region, sales, count in zip(regions, self._group_revenue_units('Region'),
+                                        self._group_count('Region').tolist()):
+            aggregator.region_stats[region] = {'total_sales': sales, 'transaction_count': count}
+
+        name_codes, products = self.columns['ProductName']
+        product_quantity = np.zeros(len(products), dtype=np.int64)
+        np.add.at(product_quantity, name_codes, self.quantity)
+        for product, qty, revenue in zip(products, product_quantity.tolist(),
+                                         self._group_revenue_units('ProductName')):
+            aggregator.product_stats[product] = {'total_quantity': qty, 'total_revenue': revenue}
+
+        customer_codes, customers = self.columns['CustomerID']
+        products_bought = [[] for _ in customers]
+        n_products = max(len(products), 1)
+        pairs = np.unique(customer_codes.astype(np.int64) * n_products + name_codes)
+        for customer_code, product_code in zip((pairs // n_products).tolist(), (pairs % n_products).tolist()):
+            products_bought[customer_code].append(products[product_code])
+        for customer, spent, count, bought, order_dates in zip(
+                customers, self._group_revenue_units('CustomerID'),
+                self._group_count('CustomerID').tolist(), products_bought,
+                self._pair_counts('CustomerID', 'Date').tolist()):
+            aggregator.customer_stats[customer] = {
+                'total_spent': spent,
+                'purchase_count': count,
+                'products_bought': bought,
+                'order_dates': order_dates
+            }
+
+        for date, revenue, count, unique_customers in zip(
+                self.columns['Date'][1], self._group_revenue_units('Date'),
+                self._group_count('Date').tolist(), self._pair_counts('Date', 'CustomerID').tolist()):
+            aggregator.date_stats[date] = {
+                'revenue': revenue,
+                'transaction_count': count,
+                'unique_customers': unique_customers
+            }
+
+        self._aggregate = aggregator
+        return aggregator
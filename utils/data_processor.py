@@ -1,107 +1,345 @@
-def calculate_total_revenue(transactions):
-    total_revenue = 0.0
-    for txn in transactions:
-        quantity = txn.get("Quantity", 0)
-        unit_price = txn.get("UnitPrice", 0)
-        total_revenue += quantity * unit_price
-    return round(total_revenue, 2)
+import heapq
+from itertools import islice
 
+from utils.records import Transaction, TransactionArrays
 
-def region_wise_sales(transactions):
-    region_stats = {}
-    total_sales = 0.0
-    for txn in transactions:
-        region = txn.get("Region", "Unknown")
+# Revenue is accumulated as an exact fixed-point integer (units of 2**-64)
+# rather than a running float, so totals do not depend on the order rows
+# were added in: merging per-chunk aggregators gives exactly the serial result.
+# A NaN or infinite amount (e.g. a "nan" UnitPrice, which validation lets
+# through) is kept as a float instead, so every sum it reaches becomes
+# nan/inf just as a float total would.
+_REVENUE_SCALE = 2 ** 64
+
+
+def _to_units(amount):
+    try:
+        return int(amount * _REVENUE_SCALE)
+    except (ValueError, OverflowError):
+        return float(amount)
+
+
+def _from_units(units):
+    return units / _REVENUE_SCALE
+
+
+class SalesAggregator:
+    """
+    Builds every region/product/customer/day accumulator in a single pass
+    over the transactions. The analysis functions below are views over it.
+    Revenue fields in the *_stats dicts are fixed-point units (see _to_units).
+    """
+
+    def __init__(self):
+        self.revenue_units = 0
+        self.transaction_count = 0
+        self.min_date = None
+        self.max_date = None
+        self.region_stats = {}
+        self.product_stats = {}
+        self.customer_stats = {}
+        self.date_stats = {}
+
+    def add(self, txn):
+        if txn.__class__ is Transaction:
+            self._add(txn.Quantity, _to_units(txn.revenue), txn.Date, txn.Region, txn.ProductName, txn.CustomerID)
+            return
         quantity = txn.get("Quantity", 0)
         unit_price = txn.get("UnitPrice", 0)
-        sales_amount = quantity * unit_price
-        if region not in region_stats:
-            region_stats[region] = {
-                'total_sales': 0.0,
+        self._add(quantity, _to_units(quantity * unit_price), txn.get("Date", "Unknown"),
+                  txn.get("Region", "Unknown"), txn.get("ProductName", "Unknown"), txn.get("CustomerID", "Unknown"))
+
+    def _add(self, quantity, revenue, date, region, product, customer_id):
+        self.revenue_units += revenue
+        self.transaction_count += 1
+        if self.min_date is None or date < self.min_date:
+            self.min_date = date
+        if self.max_date is None or date > self.max_date:
+            self.max_date = date
+
+        region_entry = self.region_stats.get(region)
+        if region_entry is None:
+            region_entry = self.region_stats[region] = {
+                'total_sales': 0,
                 'transaction_count': 0
             }
-        region_stats[region]['total_sales'] += sales_amount
-        region_stats[region]['transaction_count'] += 1
-        total_sales += sales_amount
-    for region, stats in region_stats.items():
-        stats['percentage'] = round((stats['total_sales'] / total_sales) * 100, 2) if total_sales > 0 else 0.0
+        region_entry['total_sales'] += revenue
+        region_entry['transaction_count'] += 1
+
+        product_entry = self.product_stats.get(product)
+        if product_entry is None:
+            product_entry = self.product_stats[product] = {
+                'total_quantity': 0,
+                'total_revenue': 0
+            }
+        product_entry['total_quantity'] += quantity
+        product_entry['total_revenue'] += revenue
+
+        customer_entry = self.customer_stats.get(customer_id)
+        if customer_entry is None:
+            customer_entry = self.customer_stats[customer_id] = {
+                'total_spent': 0,
+                'purchase_count': 0,
+                'products_bought': set(),
+                'order_dates': set()
+            }
+        customer_entry['total_spent'] += revenue
+        customer_entry['purchase_count'] += 1
+        customer_entry['products_bought'].add(product)
+        customer_entry['order_dates'].add(date)
+
+        date_entry = self.date_stats.get(date)
+        if date_entry is None:
+            date_entry = self.date_stats[date] = {
+                'revenue': 0,
+                'transaction_count': 0,
+                'unique_customers': set()
+            }
+        date_entry['revenue'] += revenue
+        date_entry['transaction_count'] += 1
+        date_entry['unique_customers'].add(customer_id)
+
+    @property
+    def total_revenue(self):
+        return _from_units(self.revenue_units)
+
+    def update(self, transactions):
+        if isinstance(transactions, TransactionArrays):
+            # Straight from the columns; no per-row record objects
+            for quantity, revenue, date, region, product, customer_id in zip(
+                    transactions.Quantity, transactions.revenue, transactions.Date, transactions.Region,
+                    transactions.ProductName, transactions.CustomerID):
+                self._add(quantity, _to_units(revenue), date, region, product, customer_id)
+            return self
+        for txn in transactions:
+            self.add(txn)
+        return self
+
+    def to_state(self):
+        """JSON-serialisable snapshot of every accumulator (sets become lists)."""
+        def plain(stats):
+            return {
+                key: {field: list(value) if isinstance(value, set) else value for field, value in entry.items()}
+                for key, entry in stats.items()
+            }
+        return {
+            'revenue_units': self.revenue_units,
+            'transaction_count': self.transaction_count,
+            'min_date': self.min_date,
+            'max_date': self.max_date,
+            'region_stats': plain(self.region_stats),
+            'product_stats': plain(self.product_stats),
+            'customer_stats': plain(self.customer_stats),
+            'date_stats': plain(self.date_stats)
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        def restored(stats):
+            return {
+                key: {field: set(value) if isinstance(value, list) else value for field, value in entry.items()}
+                for key, entry in stats.items()
+            }
+        aggregator = cls()
+        aggregator.revenue_units = state['revenue_units']
+        aggregator.transaction_count = state['transaction_count']
+        aggregator.min_date = state['min_date']
+        aggregator.max_date = state['max_date']
+        aggregator.region_stats = restored(state['region_stats'])
+        aggregator.product_stats = restored(state['product_stats'])
+        aggregator.customer_stats = restored(state['customer_stats'])
+        aggregator.date_stats = restored(state['date_stats'])
+        return aggregator
+
+    def merge(self, other):
+        """
+        Folds another aggregator (e.g. one built from a later chunk of the
+        same file) into this one. Keys new to self are appended in other's
+        order, so merging chunks in file order keeps first-appearance order.
+        Entries are copied, so `other` can still be updated afterwards.
+        Distinct counts must still be sets on both sides: precomputed
+        counts (columnar.TransactionTable.aggregate) raise ValueError.
+        """
+        _check_mergeable(self)
+        _check_mergeable(other)
+        self.revenue_units += other.revenue_units
+        self.transaction_count += other.transaction_count
+        if other.min_date is not None and (self.min_date is None or other.min_date < self.min_date):
+            self.min_date = other.min_date
+        if other.max_date is not None and (self.max_date is None or other.max_date > self.max_date):
+            self.max_date = other.max_date
+        for stats, other_stats in ((self.region_stats, other.region_stats),
+                                   (self.product_stats, other.product_stats),
+                                   (self.customer_stats, other.customer_stats),
+                                   (self.date_stats, other.date_stats)):
+            for key, other_entry in other_stats.items():
+                entry = stats.get(key)
+                if entry is None:
+                    stats[key] = {field: set(value) if isinstance(value, set) else value
+                                  for field, value in other_entry.items()}
+                    continue
+                for field, value in other_entry.items():
+                    if isinstance(value, set):
+                        entry[field] |= value
+                    else:
+                        entry[field] += value
+        return self
+
+
+_DISTINCT_FIELDS = ('products_bought', 'order_dates', 'unique_customers')
+
+
+def _check_mergeable(aggregator):
+    # Adding up precomputed distinct counts would count shared customers,
+    # products and dates twice
+    for stats in (aggregator.customer_stats, aggregator.date_stats):
+        for entry in stats.values():
+            for field in _DISTINCT_FIELDS:
+                if field in entry and not isinstance(entry[field], set):
+                    raise ValueError(f"Cannot merge an aggregator whose {field} is precomputed "
+                                     f"({type(entry[field]).__name__}); build it with SalesAggregator.update")
+
+
+def _as_aggregator(transactions):
+    # Accept a raw transaction list, an already built aggregator, or anything
+    # that can build one itself (e.g. columnar.TransactionTable); the
+    # sketch-based sketches.ApproxSalesAggregator passes through as well
+    if isinstance(transactions, SalesAggregator) or getattr(transactions, 'approximate', False):
+        return transactions
+    if hasattr(transactions, 'aggregate'):
+        return transactions.aggregate()
+    return SalesAggregator().update(transactions)
+
+
+def _distinct_count(values):
+    # Distinct counts are sets while aggregating, plain ints once precomputed,
+    # HyperLogLog estimates in approximate mode (len() is the estimate)
+    return values if isinstance(values, int) else len(values)
+
+
+# RANKING
+#
+# Rankings are descending by a numeric key. tie_break="first" keeps tied
+# items in input (first-appearance) order, exactly like the stable
+# sorted(..., reverse=True) it replaces; tie_break="name" orders ties by
+# the item's key (item[0]) ascending.
+
+TIE_BREAKS = ("first", "name")
+
+
+def _check_tie_break(tie_break):
+    if tie_break not in TIE_BREAKS:
+        raise ValueError(f"tie_break must be one of {TIE_BREAKS}, got {tie_break!r}")
+
+
+def top_n(items, n, key, tie_break="first"):
+    """
+    The n highest-ranked items: heapq selection in O(M log n) instead of
+    sorting all M items. n=None returns the full ranking (a sort).
+    """
+    _check_tie_break(tie_break)
+    if tie_break == "first":
+        if n is None:
+            return sorted(items, key=key, reverse=True)
+        return heapq.nlargest(n, items, key=key)
+    def by_name(item):
+        return (-key(item), item[0])
+    if n is None:
+        return sorted(items, key=by_name)
+    return heapq.nsmallest(n, items, key=by_name)
+
+
+def iter_ranked(items, key, tie_break="first"):
+    """
+    Lazily yields items in rank order: O(M) to build the heap, then
+    O(log M) per item taken, so reading the first pages is cheap.
+    """
+    _check_tie_break(tie_break)
+    if tie_break == "first":
+        heap = [(-key(item), i, item) for i, item in enumerate(items)]
+    else:
+        heap = [(-key(item), item[0], i, item) for i, item in enumerate(items)]
+    heapq.heapify(heap)
+    while heap:
+        yield heapq.heappop(heap)[-1]
+
+
+def ranked_page(items, key, page, page_size=20, tie_break="first"):
+    """Items ranked page*page_size .. (page+1)*page_size - 1 (page counts from 0)."""
+    start = page * page_size
+    return list(islice(iter_ranked(items, key, tie_break), start, start + page_size))
+
+
+def _product_quantity(item):
+    return item[1]['total_quantity']
+
+
+def _customer_spent(item):
+    return round(_from_units(item[1]['total_spent']), 2)
+
+
+def calculate_total_revenue(transactions):
+    aggregator = _as_aggregator(transactions)
+    return round(aggregator.total_revenue, 2)
+
+
+def region_wise_sales(transactions):
+    aggregator = _as_aggregator(transactions)
+    total_sales = aggregator.total_revenue
+    region_stats = {}
+    for region, stats in aggregator.region_stats.items():
+        sales = _from_units(stats['total_sales'])
+        region_stats[region] = {
+            'total_sales': sales,
+            'transaction_count': stats['transaction_count'],
+            'percentage': round((sales / total_sales) * 100, 2) if total_sales > 0 else 0.0
+        }
     sorted_region_stats = dict(sorted(region_stats.items(), key=lambda item: item[1]['total_sales'], reverse=True))
     return sorted_region_stats
 
 
-def top_selling_products(transactions, n=5):
-    product_stats = {}
-    for txn in transactions:
-        product = txn.get("ProductName", "Unknown")
-        quantity = txn.get("Quantity", 0)
-        unit_price = txn.get("UnitPrice", 0)
-        revenue = quantity * unit_price
-        if product not in product_stats:
-            product_stats[product] = {
-                'total_quantity': 0,
-                'total_revenue': 0.0
-            }
-        product_stats[product]['total_quantity'] += quantity
-        product_stats[product]['total_revenue'] += revenue
-    sorted_products = sorted(product_stats.items(), key=lambda item: item[1]['total_quantity'], reverse=True)
+def top_selling_products(transactions, n=5, tie_break="first"):
+    aggregator = _as_aggregator(transactions)
     top_n_products = [
-        (product, stats['total_quantity'], round(stats['total_revenue'], 2))
-        for product, stats in sorted_products[:n]
+        (product, stats['total_quantity'], round(_from_units(stats['total_revenue']), 2))
+        for product, stats in top_n(aggregator.product_stats.items(), n, _product_quantity, tie_break)
     ]
     return top_n_products
 
 
-def customer_analysis(transactions):
+def customer_analysis(transactions, n=None, tie_break="first"):
+    """
+    Per-customer stats ordered by total_spent, highest first. With `n`,
+    only the top n customers are selected (heap) and built.
+    """
+    aggregator = _as_aggregator(transactions)
     customer_stats = {}
-    for txn in transactions:
-        customer_id = txn.get("CustomerID", "Unknown")
-        product = txn.get("ProductName", "Unknown")
-        quantity = txn.get("Quantity", 0)
-        unit_price = txn.get("UnitPrice", 0)
-        amount_spent = quantity * unit_price
-        if customer_id not in customer_stats:
-            customer_stats[customer_id] = {
-                'total_spent': 0.0,
-                'purchase_count': 0,
-                'products_bought': set()
-            }
-        customer_stats[customer_id]['total_spent'] += amount_spent
-        customer_stats[customer_id]['purchase_count'] += 1
-        customer_stats[customer_id]['products_bought'].add(product)
-    for customer_id, stats in customer_stats.items():
-        stats['avg_order_value'] = round(stats['total_spent'] / stats['purchase_count'], 2) if stats['purchase_count'] > 0 else 0.0
-        stats['products_bought'] = list(stats['products_bought'])
-        stats['total_spent'] = round(stats['total_spent'], 2)
-    sorted_customer_stats = dict(sorted(customer_stats.items(), key=lambda item: item[1]['total_spent'], reverse=True))
-    return sorted_customer_stats
+    for customer_id, stats in top_n(aggregator.customer_stats.items(), n, _customer_spent, tie_break):
+        total_spent = _from_units(stats['total_spent'])
+        customer_stats[customer_id] = {
+            'total_spent': round(total_spent, 2),
+            'purchase_count': stats['purchase_count'],
+            'products_bought': list(stats['products_bought']),
+            'avg_order_value': round(total_spent / stats['purchase_count'], 2) if stats['purchase_count'] > 0 else 0.0
+        }
+    return customer_stats
 
 
 def daily_sales_trend(transactions):
+    aggregator = _as_aggregator(transactions)
     date_stats = {}
-    for txn in transactions:
-        date = txn.get("Date", "Unknown")
-        customer_id = txn.get("CustomerID", "Unknown")
-        quantity = txn.get("Quantity", 0)
-        unit_price = txn.get("UnitPrice", 0)
-        revenue = quantity * unit_price
-        if date not in date_stats:
-            date_stats[date] = {
-                'revenue': 0.0,
-                'transaction_count': 0,
-                'unique_customers': set()
-            }
-        date_stats[date]['revenue'] += revenue
-        date_stats[date]['transaction_count'] += 1
-        date_stats[date]['unique_customers'].add(customer_id)
-    for date, stats in date_stats.items():
-        stats['unique_customers'] = len(stats['unique_customers'])
-        stats['revenue'] = round(stats['revenue'], 2)
+    for date, stats in aggregator.date_stats.items():
+        date_stats[date] = {
+            'revenue': round(_from_units(stats['revenue']), 2),
+            'transaction_count': stats['transaction_count'],
+            'unique_customers': _distinct_count(stats['unique_customers'])
+        }
     sorted_date_stats = dict(sorted(date_stats.items(), key=lambda item: item[0]))
     return sorted_date_stats
 
 
 def find_peak_sales_day(transactions):
-    date_stats = daily_sales_trend(transactions)   
+    date_stats = daily_sales_trend(transactions)
     peak_date = None
     max_revenue = 0.0
     for date, stats in date_stats.items():
@@ -113,26 +351,14 @@ def find_peak_sales_day(transactions):
         return (peak_date, peak_stats['revenue'], peak_stats['transaction_count'])
     else:
         return (None, 0.0, 0)
-    
+
 
 def low_performing_products(transactions, threshold=10):
-    product_stats = {}
-    for txn in transactions:
-        product = txn.get("ProductName", "Unknown")
-        quantity = txn.get("Quantity", 0)
-        unit_price = txn.get("UnitPrice", 0)
-        revenue = quantity * unit_price
-        if product not in product_stats:
-            product_stats[product] = {
-                'total_quantity': 0,
-                'total_revenue': 0.0
-            }
-        product_stats[product]['total_quantity'] += quantity
-        product_stats[product]['total_revenue'] += revenue
+    aggregator = _as_aggregator(transactions)
     low_performers = [
-        (product, stats['total_quantity'], round(stats['total_revenue'], 2))
-        for product, stats in product_stats.items()
+        (product, stats['total_quantity'], round(_from_units(stats['total_revenue']), 2))
+        for product, stats in aggregator.product_stats.items()
         if stats['total_quantity'] < threshold
     ]
     low_performers.sort(key=lambda x: x[1])  # Sort by TotalQuantity ascending
-    return low_performers
\ No newline at end of file
+    return low_performers
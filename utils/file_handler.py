@@ -1,63 +1,288 @@
 import csv
-import os
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_DIR = os.path.join(BASE_DIR, "data")
-OUTPUT_DIR = os.path.join(BASE_DIR, "output")
+import io
+from bisect import bisect_left, bisect_right
+from itertools import compress, repeat
+from operator import and_, not_
 
-os.makedirs(DATA_DIR, exist_ok=True)
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+from utils.records import Transaction, TransactionArrays
 
 
 # READ SALES DATA
 
-def read_sales_data(filename,file_encoder): 
-    try: 
-        data = [] 
-        with open(file=filename, mode='r', encoding=file_encoder,newline='\n',) as file: 
-            file_content=csv.reader(file,delimiter='|') 
-            header=next(file_content,None) #skip header 
-            for row in file_content: 
-                if row and any(field.strip() 
-                    for field in row): 
-                     data.append('|'.join(row))
-            return data 
-    except UnicodeDecodeError: 
-        print(f'{filename} file is not in UTF-8 encoding') 
-        return data 
-    except FileNotFoundError: 
-        print(f'{filename} file does not exist') 
-        return data
+def iter_sales_lines(lines, skip_header=True):
+    """
+    Yields the '|'-joined, non-blank rows from an iterable of text lines
+    (an open file, or the lines of one chunk of a file).
+    """
+    file_content = csv.reader(lines, delimiter='|')
+    if skip_header:
+        header = next(file_content, None)  # skip header
+    for row in file_content:
+        if row and any(field.strip() for field in row):
+            yield '|'.join(row)
+
+
+def iter_sales_data(filename, file_encoder='utf-8'):
+    """
+    Lazily yields the '|'-joined data rows of a sales file (header skipped).
+    Nothing beyond the current row is held in memory.
+    """
+    try:
+        with open(file=filename, mode='r', encoding=file_encoder, newline='\n') as file:
+            yield from iter_sales_lines(file)
+    except UnicodeDecodeError:
+        print(f'{filename} file is not in UTF-8 encoding')
+    except FileNotFoundError:
+        print(f'{filename} file does not exist')
+
+
+def read_sales_data(filename, file_encoder):
+    return list(iter_sales_data(filename, file_encoder))
 
 
 # PARSE TRANSACTIONS
 
-def parse_transactions(raw_lines): 
-    transactions = [] 
-    for line in raw_lines: 
-         fields = line.split('|') 
-         if len(fields) != 8:
-              continue # Skip rows with incorrect number of fields 
-         transaction_id = fields[0].strip() 
-         date = fields[1].strip() 
-         product_id = fields[2].strip() 
-         product_name = fields[3].replace(',', ' ').strip() # Remove commas in ProductName 
-         try: 
-              quantity = int(fields[4].replace(',', '').strip()) # Remove commas and convert to int 
-              unit_price = float(fields[5].replace(',', '').strip()) # Remove commas and convert to float 
-         except ValueError: 
-              continue # Skip rows with invalid numeric data 
-         customer_id = fields[6].strip() 
-         region = fields[7].strip() 
-         transaction = { 'TransactionID': transaction_id, 
-                        'Date': date, 
-                        'ProductID': product_id, 
-                        'ProductName': product_name, 
-                        'Quantity': quantity, 
-                        'UnitPrice': unit_price, 
-                        'CustomerID': customer_id, 
-                        'Region': region }
-         transactions.append(transaction) 
-    return transactions
+def new_parse_rejects():
+    return {"field_count": 0, "bad_number": 0}
+
+
+def iter_parse_transactions(raw_lines, rejects=None):
+    for line in raw_lines:
+        fields = line.split('|')
+        if len(fields) != 8:
+            if rejects is not None:
+                rejects["field_count"] += 1
+            continue  # Skip rows with incorrect number of fields
+        transaction_id = fields[0].strip()
+        date = fields[1].strip()
+        product_id = fields[2].strip()
+        product_name = fields[3].replace(',', ' ').strip()  # Remove commas in ProductName
+        try:
+            quantity = int(fields[4].replace(',', '').strip())  # Remove commas and convert to int
+            unit_price = float(fields[5].replace(',', '').strip())  # Remove commas and convert to float
+        except ValueError:
+            if rejects is not None:
+                rejects["bad_number"] += 1
+            continue  # Skip rows with invalid numeric data
+        customer_id = fields[6].strip()
+        region = fields[7].strip()
+        yield {'TransactionID': transaction_id,
+               'Date': date,
+               'ProductID': product_id,
+               'ProductName': product_name,
+               'Quantity': quantity,
+               'UnitPrice': unit_price,
+               'CustomerID': customer_id,
+               'Region': region}
+
+
+def parse_transactions(raw_lines):
+    return list(iter_parse_transactions(raw_lines))
+
+
+# FAST PATH TOKENIZER
+#
+# Same rows accepted and rejected as iter_parse_transactions(iter_sales_data()),
+# but the file is read in binary blocks and each block is tokenized with a
+# handful of C-level str operations: every good line is joined into one
+# '|'-separated list, columns are taken with slices, and the numeric columns
+# are de-comma'd and converted in bulk. Anything the csv module would treat
+# specially (quotes, NUL, bare '\r') falls back to the csv path.
+
+PARSE_BLOCK_SIZE = 1 << 20
+_CONVERT_SLICE = 64
+_RARE_WHITESPACE = '\t\x0b\x0c\x1c\x1d\x1e\x1f'
+_TRANSACTION_KEYS = ('TransactionID', 'Date', 'ProductID', 'ProductName',
+                     'Quantity', 'UnitPrice', 'CustomerID', 'Region')
+
+
+def _needs_strip(text):
+    # Cheap substring scans instead of a regex: does any field start or end
+    # with whitespace? (False positives only cost the extra strip calls.)
+    return (not text.isascii() or ' |' in text or '| ' in text or '\n ' in text or ' \n' in text
+            or text.startswith(' ') or text.endswith(' ')
+            or any(char in text for char in _RARE_WHITESPACE))
+
+
+def _is_blank(fields):
+    return not ''.join(fields).strip()
+
+
+def _convert_column(values, convert):
+    """
+    Converts a column in bulk. Returns (converted, ok) where ok is None if
+    every value converted, else a per-value list of flags (failed values
+    are None in `converted`).
+    """
+    # De-comma a whole column at once ('|' cannot occur inside a field)
+    joined = '|'.join(values)
+    if ',' in joined:
+        values = joined.replace(',', '').split('|')
+    try:
+        return list(map(convert, values)), None
+    except ValueError:
+        pass
+    # A few bad values: convert in small slices and only go value by value
+    # through the slices that fail
+    converted = []
+    ok = []
+    for start in range(0, len(values), _CONVERT_SLICE):
+        chunk = values[start:start + _CONVERT_SLICE]
+        try:
+            converted += list(map(convert, chunk))
+            ok += repeat(True, len(chunk))
+            continue
+        except ValueError:
+            pass
+        for value in chunk:
+            try:
+                converted.append(convert(value))
+                ok.append(True)
+            except ValueError:
+                converted.append(None)
+                ok.append(False)
+    return converted, ok
+
+
+def tokenize_sales_text(text, skip_header=False, rejects=None):
+    """
+    Tokenizes decoded sales lines (no quotes, NUL or bare '\r') into a
+    tuple of 8 column lists in _TRANSACTION_KEYS order, numbers converted.
+    Rejected rows are counted into `rejects` (see new_parse_rejects);
+    blank rows are skipped without being counted, like iter_sales_lines.
+    """
+    if rejects is None:
+        rejects = new_parse_rejects()
+    lines = text.split('\n')
+    if text.endswith('\n'):
+        lines.pop()
+    if skip_header and lines:
+        del lines[0]
+
+    pipe_counts = list(map(str.count, lines, repeat('|')))
+    if pipe_counts.count(7) != len(pipe_counts):
+        for line in compress(lines, map((7).__ne__, pipe_counts)):
+            if line.replace('|', '').strip():
+                rejects["field_count"] += 1
+        lines = list(compress(lines, map((7).__eq__, pipe_counts)))
+
+    flat = '|'.join(lines).split('|') if lines else []
+    columns = [flat[i::8] for i in range(8)]
+    del flat
+    if _needs_strip(text):
+        for i in (0, 1, 2, 3, 6, 7):
+            columns[i] = list(map(str.strip, columns[i]))
+    names = '|'.join(columns[3])
+    if ',' in names:
+        columns[3] = list(map(str.strip, names.replace(',', ' ').split('|')))
+
+    quantities, quantity_ok = _convert_column(columns[4], int)
+    unit_prices, price_ok = _convert_column(columns[5], float)
+    if quantity_ok is None and price_ok is None:
+        columns[4] = quantities
+        columns[5] = unit_prices
+        return tuple(columns)
+
+    if quantity_ok is None or price_ok is None:
+        keep = quantity_ok or price_ok
+    else:
+        keep = list(map(and_, quantity_ok, price_ok))
+    for i in compress(range(len(keep)), map(not_, keep)):
+        if not _is_blank([column[i] for column in columns]):
+            rejects["bad_number"] += 1
+    columns[4] = quantities
+    columns[5] = unit_prices
+    return tuple(list(compress(column, keep)) for column in columns)
+
+
+def _csv_columns(text, skip_header, rejects):
+    # Reference path for text the fast tokenizer does not handle
+    transactions = iter_parse_transactions(
+        iter_sales_lines(io.StringIO(text, newline='\n'), skip_header), rejects)
+    rows = [tuple(txn.values()) for txn in transactions]
+    return tuple(map(list, zip(*rows))) if rows else tuple([] for _ in _TRANSACTION_KEYS)
+
+
+def sales_text_columns(text, skip_header=False, rejects=None):
+    """
+    Column tuple for a complete piece of decoded sales text (a whole file
+    or a chunk cut on line boundaries), taking the csv path when needed.
+    """
+    if rejects is None:
+        rejects = new_parse_rejects()
+    if '\r' in text:
+        text = text.replace('\r\n', '\n')
+    if '"' in text or '\r' in text or '\x00' in text:
+        return _csv_columns(text, skip_header, rejects)
+    return tokenize_sales_text(text, skip_header, rejects)
+
+
+def columns_to_transactions(columns):
+    """Transaction dicts for a column tuple from the tokenizer."""
+    return [
+        {'TransactionID': t, 'Date': d, 'ProductID': p, 'ProductName': n,
+         'Quantity': q, 'UnitPrice': u, 'CustomerID': c, 'Region': r}
+        for t, d, p, n, q, u, c, r in zip(*columns)
+    ]
+
+
+def iter_sales_columns(filename, file_encoder='utf-8', rejects=None, block_size=PARSE_BLOCK_SIZE):
+    """
+    Yields one tuple of 8 column lists per block of a sales file (header
+    skipped), in file order. Counts rejected rows into `rejects`.
+    """
+    if rejects is None:
+        rejects = new_parse_rejects()
+    if '\n'.encode(file_encoder) != b'\n':
+        # Multi-byte newline (e.g. UTF-16): blocks can't be cut on b'\n'
+        text = '\n'.join(iter_sales_data(filename, file_encoder))
+        yield _csv_columns(text, False, rejects)
+        return
+    try:
+        with open(filename, 'rb') as file:
+            remainder = b''
+            offset = 0
+            first = True
+            while True:
+                block = file.read(block_size)
+                if not block and not remainder:
+                    break
+                if block:
+                    data = remainder + block
+                    cut = data.rfind(b'\n') + 1
+                    if cut == 0:
+                        remainder = data
+                        continue
+                    data, remainder = data[:cut], data[cut:]
+                else:
+                    data, remainder = remainder, b''  # last line without a newline
+                if b'"' in data:
+                    # A quoted field may span lines: hand the rest of the
+                    # file to the csv module
+                    file.seek(offset)
+                    rest = io.TextIOWrapper(file, encoding=file_encoder, newline='\n')
+                    yield _csv_columns(rest.read(), first, rejects)
+                    return
+                offset += len(data)
+                yield sales_text_columns(data.decode(file_encoder), first, rejects)
+                first = False
+    except UnicodeDecodeError:
+        print(f'{filename} file is not in UTF-8 encoding')
+    except FileNotFoundError:
+        print(f'{filename} file does not exist')
+
+
+def iter_fast_transactions(filename, file_encoder='utf-8', rejects=None, block_size=PARSE_BLOCK_SIZE):
+    """
+    Drop-in for iter_parse_transactions(iter_sales_data(filename)) built on
+    iter_sales_columns; yields the same transaction dicts.
+    """
+    for columns in iter_sales_columns(filename, file_encoder, rejects, block_size):
+        yield from columns_to_transactions(columns)
+
+
+def parse_sales_file(filename, file_encoder='utf-8', rejects=None):
+    return list(iter_fast_transactions(filename, file_encoder, rejects))
 
 # VALIDATE & FILTER
 
@@ -111,45 +336,176 @@ def parse_transactions(raw_lines):
 #     return valid_transactions, invalid_count, filter_summary
 
 
-def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
-    valid_transactions = []
-    invalid_count = 0
+def _new_filter_summary():
+    return {"total_input": 0, "invalid": 0, "final_count": 0}
 
-    try:
-        # Validation
-        for tx in transactions:
+
+def iter_validate_and_filter(transactions, region=None, min_amount=None, max_amount=None, summary=None):
+    """
+    Streaming form of validate_and_filter: yields the transactions that pass
+    validation and the optional region/amount filters one at a time.
+    Counts are accumulated into `summary` (a filter_summary dict) as rows flow.
+    """
+    if summary is None:
+        summary = _new_filter_summary()
+    for tx in transactions:
+        summary["total_input"] += 1
+        if tx.__class__ is Transaction:
+            # Records: attribute reads, amount already computed at parse time
+            if (tx.Quantity <= 0 or tx.UnitPrice <= 0 or
+                not tx.TransactionID.startswith('T') or
+                not tx.ProductID.startswith('P') or
+                not tx.CustomerID.startswith('C')):
+                summary["invalid"] += 1
+                continue
+            tx_region = tx.Region
+            amt = tx.revenue
+        else:
             if (tx['Quantity'] <= 0 or tx['UnitPrice'] <= 0 or
                 not tx['TransactionID'].startswith('T') or
                 not tx['ProductID'].startswith('P') or
                 not tx['CustomerID'].startswith('C')):
-                invalid_count += 1
+                summary["invalid"] += 1
                 continue
-            valid_transactions.append(tx)
-
-        # Filter by region
-        if region:
-            valid_transactions = [tx for tx in valid_transactions if tx['Region'] == region]
-
-        # Filter by amount
+            tx_region = tx['Region']
+            amt = None
+        if region and tx_region != region:
+            continue
         if min_amount is not None or max_amount is not None:
-            def amount_filter(tx):
+            if amt is None:
                 amt = tx['Quantity'] * tx['UnitPrice']
-                if min_amount is not None and amt < min_amount:
-                    return False
-                if max_amount is not None and amt > max_amount:
-                    return False
-                return True
-            valid_transactions = [tx for tx in valid_transactions if amount_filter(tx)]
-
-        # Filter summary
-        filter_summary = {
-            "total_input": len(transactions),
-            "invalid": invalid_count,
-            "final_count": len(valid_transactions)
-        }
-
-        return valid_transactions, invalid_count, filter_summary
+            if min_amount is not None and amt < min_amount:
+                continue
+            if max_amount is not None and amt > max_amount:
+                continue
+        summary["final_count"] += 1
+        yield tx
+
+
+def _valid_array_rows(arrays, region, min_amount, max_amount, summary):
+    # iter_validate_and_filter over TransactionArrays columns: keep flag per row
+    keep = []
+    by_amount = min_amount is not None or max_amount is not None
+    for transaction_id, product_id, customer_id, quantity, unit_price, tx_region, amt in zip(
+            arrays.TransactionID, arrays.ProductID, arrays.CustomerID, arrays.Quantity, arrays.UnitPrice,
+            arrays.Region, arrays.revenue):
+        if (quantity <= 0 or unit_price <= 0 or
+            not transaction_id.startswith('T') or
+            not product_id.startswith('P') or
+            not customer_id.startswith('C')):
+            summary["invalid"] += 1
+            keep.append(False)
+            continue
+        keep.append(not ((region and tx_region != region) or
+                         (by_amount and not _amount_in_range(amt, min_amount, max_amount))))
+    summary["total_input"] += len(keep)
+    summary["final_count"] += sum(keep)
+    return keep
+
+
+def validate_and_filter(transactions, region=None, min_amount=None, max_amount=None):
+    """
+    (valid transactions, invalid count, filter_summary). Accepts transaction
+    dicts or Transaction records (returned as a list), or TransactionArrays
+    (returned as a TransactionArrays of the surviving rows).
+    """
+    filter_summary = _new_filter_summary()
+    try:
+        if isinstance(transactions, TransactionArrays):
+            keep = _valid_array_rows(transactions, region, min_amount, max_amount, filter_summary)
+            return transactions.mask(keep), filter_summary["invalid"], filter_summary
+        valid_transactions = list(iter_validate_and_filter(
+            transactions, region, min_amount, max_amount, filter_summary))
+        return valid_transactions, filter_summary["invalid"], filter_summary
 
     except Exception as e:
         # Always return something so main.py doesn’t crash
         return [], 0, {"total_input": 0, "invalid": 0, "final_count": 0}
+
+
+def _amount_in_range(amount, min_amount, max_amount):
+    # Same comparisons as iter_validate_and_filter (a NaN amount passes)
+    return not ((min_amount is not None and amount < min_amount) or
+                (max_amount is not None and amount > max_amount))
+
+
+class FilterView:
+    """
+    validate_and_filter for many filter combinations over one dataset.
+    Validation runs once; region and amount filters are then answered from
+    a region -> row ids index and a sorted amount array (bisect), so each
+    query only touches the rows it returns.
+
+        view = FilterView(transactions)
+        valid, invalid_count, filter_summary = view.query(region="North", min_amount=1000)
+
+    query() returns exactly what validate_and_filter would for the same
+    arguments, rows in input order.
+    """
+
+    def __init__(self, transactions):
+        self.summary = _new_filter_summary()
+        self.rows = list(iter_validate_and_filter(transactions, summary=self.summary))
+        self.region_rows = {}
+        self.row_amounts = [tx['Quantity'] * tx['UnitPrice'] for tx in self.rows]
+        for row_id, tx in enumerate(self.rows):
+            row_ids = self.region_rows.get(tx['Region'])
+            if row_ids is None:
+                row_ids = self.region_rows[tx['Region']] = set()
+            row_ids.add(row_id)
+        # NaN amounts can't be ordered but pass every amount filter
+        self.nan_rows = [row_id for row_id, amount in enumerate(self.row_amounts) if amount != amount]
+        nan_rows = set(self.nan_rows)
+        self.amount_rows = sorted((row_id for row_id in range(len(self.rows)) if row_id not in nan_rows),
+                                  key=self.row_amounts.__getitem__)
+        self.amounts = [self.row_amounts[row_id] for row_id in self.amount_rows]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _amount_rows(self, min_amount, max_amount):
+        first = 0 if min_amount is None else bisect_left(self.amounts, min_amount)
+        last = len(self.amounts) if max_amount is None else bisect_right(self.amounts, max_amount)
+        return self.amount_rows[first:last] + self.nan_rows
+
+    def query(self, region=None, min_amount=None, max_amount=None):
+        by_amount = min_amount is not None or max_amount is not None
+        row_ids = None
+        if by_amount:
+            row_ids = self._amount_rows(min_amount, max_amount)
+        if region:
+            region_rows = self.region_rows.get(region, set())
+            if row_ids is None:
+                row_ids = region_rows
+            elif len(region_rows) < len(row_ids):
+                # Fewer rows in the region than in the amount range: check
+                # the region's amounts instead of probing every range row
+                row_ids = [i for i in region_rows
+                           if _amount_in_range(self.row_amounts[i], min_amount, max_amount)]
+            else:
+                row_ids = region_rows.intersection(row_ids)
+
+        if row_ids is None:
+            valid_transactions = list(self.rows)
+        else:
+            valid_transactions = [self.rows[i] for i in sorted(row_ids)]
+        filter_summary = dict(self.summary, final_count=len(valid_transactions))
+        return valid_transactions, filter_summary["invalid"], filter_summary
+
+
+# STREAMING PIPELINE
+
+def stream_transactions(filename, file_encoder='utf-8', region=None, min_amount=None, max_amount=None, summary=None,
+                        rejects=None):
+    """
+    read -> parse -> validate -> filter as one chain of lazy iterators, so it
+    can feed a SalesAggregator directly with memory bounded by one block:
+
+        summary = {"total_input": 0, "invalid": 0, "final_count": 0}
+        aggregator = SalesAggregator().update(stream_transactions(path, summary=summary))
+
+    Parsing goes through the block tokenizer; `rejects` collects its
+    per-reason counts (see new_parse_rejects).
+    """
+    transactions = iter_fast_transactions(filename, file_encoder, rejects)
+    return iter_validate_and_filter(transactions, region, min_amount, max_amount, summary)
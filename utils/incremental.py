@@ -0,0 +1,242 @@
+import hashlib
+import json
+import os
+import sqlite3
+from contextlib import closing
+
+from utils.file_handler import sales_text_columns, columns_to_transactions, iter_validate_and_filter, _new_filter_summary
+from utils.data_processor import SalesAggregator
+
+CHECKPOINT_VERSION = 2
+HASH_WINDOW = 64 * 1024  # bytes before the checkpoint offset that must be unchanged
+ID_QUERY_BATCH = 500  # TransactionIDs per "IN (...)" lookup, under SQLite's variable limit
+
+# Seen TransactionIDs are only ever inserted; each aggregate entry is one
+# row upserted when a run touches its key (rowid keeps first-appearance
+# order); meta holds the offset, hashes, filters, filter summary, the
+# aggregator's scalar totals and the enrichment summary as JSON values
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS seen_ids (
+    transaction_id TEXT PRIMARY KEY
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS stats (
+    kind TEXT,
+    key TEXT,
+    entry TEXT,
+    PRIMARY KEY (kind, key)
+);
+"""
+
+# SalesAggregator dict -> the transaction field that keys it
+_STATS_KEYS = {
+    'region_stats': 'Region',
+    'product_stats': 'ProductName',
+    'customer_stats': 'CustomerID',
+    'date_stats': 'Date'
+}
+_SCALARS = ('revenue_units', 'transaction_count', 'min_date', 'max_date')
+
+
+def default_checkpoint_path(filename):
+    return filename + ".checkpoint.sqlite"
+
+
+def _hash_range(file, start, end):
+    file.seek(start)
+    return hashlib.sha256(file.read(end - start)).hexdigest()
+
+
+def _prefix_hashes(file, offset):
+    # The header line plus the last HASH_WINDOW bytes before `offset`: enough
+    # to notice a rewritten or truncated file without re-reading all of it
+    file.seek(0)
+    header_end = len(file.readline())
+    return _hash_range(file, 0, min(header_end, offset)), _hash_range(file, max(0, offset - HASH_WINDOW), offset)
+
+
+def _connect(checkpoint_path):
+    directory = os.path.dirname(checkpoint_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    connection = sqlite3.connect(checkpoint_path)
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+def load_checkpoint(connection):
+    """The checkpoint's meta values ({} if empty or from another version)."""
+    try:
+        meta = {key: json.loads(value) for key, value in connection.execute("SELECT key, value FROM meta")}
+    except (sqlite3.DatabaseError, ValueError) as e:
+        print(f"Ignoring unreadable checkpoint: {e}")
+        return {}
+    return meta if meta.get("version") == CHECKPOINT_VERSION else {}
+
+
+def _load_aggregator(connection, meta):
+    aggregator = SalesAggregator()
+    for name in _SCALARS:
+        setattr(aggregator, name, meta[name])
+    for kind, key, entry in connection.execute("SELECT kind, key, entry FROM stats ORDER BY rowid"):
+        getattr(aggregator, kind)[key] = {
+            field: set(value) if isinstance(value, list) else value for field, value in json.loads(entry).items()
+        }
+    return aggregator
+
+
+def _known_ids(connection, ids):
+    # The subset of `ids` already recorded by earlier runs
+    known = set()
+    for start in range(0, len(ids), ID_QUERY_BATCH):
+        batch = ids[start:start + ID_QUERY_BATCH]
+        known.update(row[0] for row in connection.execute(
+            f"SELECT transaction_id FROM seen_ids WHERE transaction_id IN ({', '.join('?' * len(batch))})", batch))
+    return known
+
+
+def save_checkpoint(connection, meta, aggregator, new_ids, new_transactions):
+    """
+    Records one run in a single SQLite transaction: inserts the new
+    TransactionIDs, upserts only the aggregate entries new_transactions
+    touched, and replaces the meta values.
+    """
+    meta = dict(meta, **{name: getattr(aggregator, name) for name in _SCALARS})
+    with connection:
+        connection.executemany("INSERT OR IGNORE INTO seen_ids VALUES (?)", ((tid,) for tid in new_ids))
+        for kind, field in _STATS_KEYS.items():
+            stats = getattr(aggregator, kind)
+            touched = dict.fromkeys(txn[field] for txn in new_transactions)
+            connection.executemany(
+                "INSERT INTO stats VALUES (?, ?, ?) ON CONFLICT (kind, key) DO UPDATE SET entry = excluded.entry",
+                ((kind, key, json.dumps({field: list(value) if isinstance(value, set) else value
+                                         for field, value in stats[key].items()}))
+                 for key in touched))
+        connection.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                               ((key, json.dumps(value)) for key, value in meta.items()))
+
+
+def _checkpoint_matches(checkpoint, file, size, filters):
+    if not checkpoint or checkpoint["filters"] != filters:
+        return False
+    offset = checkpoint["offset"]
+    if offset > size:
+        return False  # truncated or replaced
+    if checkpoint.get("tail") and offset < size:
+        # The last run read an unterminated final line; unless the append
+        # starts a new line, it continued that line, which is re-read from 0
+        file.seek(offset)
+        if file.read(1) not in (b"\n", b"\r"):
+            return False
+    return list(_prefix_hashes(file, offset)) == [checkpoint["header_hash"], checkpoint["prefix_hash"]]
+
+
+def incremental_aggregate(filename, checkpoint_path=None, region=None, min_amount=None, max_amount=None,
+                          file_encoder='utf-8'):
+    """
+    Aggregates an append-only sales file, parsing only what was appended
+    since the last run. The checkpoint is an SQLite file holding the byte
+    offset reached, hashes of the data before it, the filter summary, the
+    aggregates (one row per region/product/customer/day) and every
+    TransactionID seen (rows whose ID was already seen are skipped as
+    duplicates). A run inserts its new IDs and rewrites only the aggregate
+    rows its transactions touched, all in one SQLite transaction.
+
+    Returns (aggregator, filter_summary, new_transactions) where
+    new_transactions are the valid, filtered rows added by this run. A
+    final line without a newline is read like any other and its length
+    kept as "tail": if a later append continues that line rather than
+    starting a new one, the row may have changed, so that run starts again
+    from byte 0, as it does when the file was rewritten or the filters
+    changed.
+    """
+    checkpoint_path = checkpoint_path or default_checkpoint_path(filename)
+    filters = {"region": region, "min_amount": min_amount, "max_amount": max_amount}
+    if not os.path.exists(filename):
+        print(f'{filename} file does not exist')
+        return SalesAggregator(), _new_filter_summary(), []
+
+    with closing(_connect(checkpoint_path)) as connection, open(filename, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        checkpoint = load_checkpoint(connection)
+        if _checkpoint_matches(checkpoint, file, size, filters):
+            offset = checkpoint["offset"]
+            aggregator = _load_aggregator(connection, checkpoint)
+            filter_summary = checkpoint["filter_summary"]
+        else:
+            offset = 0
+            aggregator = SalesAggregator()
+            filter_summary = dict(_new_filter_summary(), duplicates=0)
+            with connection:
+                for table in ("meta", "seen_ids", "stats"):
+                    connection.execute(f"DELETE FROM {table}")
+
+        file.seek(offset)
+        data = file.read()
+        new_offset = offset + len(data)
+        # Bytes after the last newline; a run that read nothing keeps the last run's tail
+        tail = len(data) - (data.rfind(b"\n") + 1)
+        if tail == len(data) and offset:
+            tail += checkpoint.get("tail", 0)
+        header_hash, prefix_hash = _prefix_hashes(file, new_offset)
+
+        try:
+            text = data.decode(file_encoder)
+        except UnicodeDecodeError:
+            print(f'{filename} file is not in UTF-8 encoding')
+            return aggregator, filter_summary, []
+
+        transactions = columns_to_transactions(sales_text_columns(text, skip_header=(offset == 0)))
+        ids = [txn['TransactionID'] for txn in transactions]
+        seen_ids = _known_ids(connection, ids) if offset else set()
+        new_ids = []
+
+        def unseen(transactions):
+            for txn in transactions:
+                if txn['TransactionID'] in seen_ids:
+                    filter_summary["duplicates"] += 1
+                    continue
+                seen_ids.add(txn['TransactionID'])
+                new_ids.append(txn['TransactionID'])
+                yield txn
+
+        new_transactions = list(iter_validate_and_filter(
+            unseen(transactions), region, min_amount, max_amount, filter_summary))
+        aggregator.update(new_transactions)
+
+        save_checkpoint(connection, {
+            "version": CHECKPOINT_VERSION,
+            "filters": filters,
+            "offset": new_offset,
+            "header_hash": header_hash,
+            "prefix_hash": prefix_hash,
+            "tail": tail,
+            "filter_summary": filter_summary
+        }, aggregator, new_ids, new_transactions)
+    return aggregator, filter_summary, new_transactions
+
+
+def record_enrichment(checkpoint_path, enrichment):
+    """
+    Adds one run's enrichment_summary (of its new rows) to the totals kept
+    in the checkpoint and returns the combined summary, which covers every
+    row in the enriched output as the checkpoint's aggregates do. The
+    totals are cleared whenever incremental_aggregate starts over.
+    """
+    with closing(_connect(checkpoint_path)) as connection:
+        row = connection.execute("SELECT value FROM meta WHERE key = 'enrichment'").fetchone()
+        if row is None:
+            combined = enrichment
+        else:
+            combined = json.loads(row[0])
+            combined['total'] += enrichment['total']
+            combined['success_count'] += enrichment['success_count']
+            failed_products = combined['failed_products']
+            for product, count in enrichment['failed_products'].items():
+                failed_products[product] = failed_products.get(product, 0) + count
+        with connection:
+            connection.execute("INSERT OR REPLACE INTO meta VALUES ('enrichment', ?)", (json.dumps(combined),))
+    return combined
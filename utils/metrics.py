@@ -0,0 +1,113 @@
+import cProfile
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+_PROMETHEUS_METRICS = [
+    # (metric name, stage record key, help text)
+    ("sales_pipeline_stage_wall_seconds", "wall_seconds", "Wall-clock time spent in the stage"),
+    ("sales_pipeline_stage_cpu_seconds", "cpu_seconds", "Process CPU time spent in the stage"),
+    ("sales_pipeline_stage_rows_in", "rows_in", "Rows entering the stage"),
+    ("sales_pipeline_stage_rows_out", "rows_out", "Rows leaving the stage"),
+    ("sales_pipeline_stage_peak_memory_bytes", "peak_memory_bytes", "tracemalloc peak during the stage"),
+]
+
+
+def _label_value(value):
+    # Exposition format escapes for a quoted label value
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class PipelineMetrics:
+    """
+    Records wall time, CPU time, rows in/out and the tracemalloc peak of
+    each pipeline stage:
+
+        metrics = PipelineMetrics(profile_stage="report")
+        with metrics.stage("parse", rows_in=len(raw_data)) as stage:
+            transactions = parse_transactions(raw_data)
+            stage["rows_out"] = len(transactions)
+        metrics.write("output")
+
+    The stage named `profile_stage` also gets a cProfile dump
+    (<profile_dir>/profile_<stage>.prof). A stage that runs alongside
+    others in another thread should pass trace_memory=False: the
+    tracemalloc peak is process-wide, and starting/stopping tracing there
+    would corrupt the other stages' figures.
+    """
+
+    def __init__(self, trace_memory=True, profile_stage=None, profile_dir="output"):
+        self.trace_memory = trace_memory
+        self.profile_stage = profile_stage
+        self.profile_dir = profile_dir
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name, rows_in=None, trace_memory=True):
+        record = {"stage": name, "rows_in": rows_in, "rows_out": None}
+        trace_memory = self.trace_memory and trace_memory
+        started_tracing = False
+        if trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+        profiler = cProfile.Profile() if name == self.profile_stage else None
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        if profiler:
+            profiler.enable()
+        try:
+            yield record
+        finally:
+            if profiler:
+                profiler.disable()
+            record["wall_seconds"] = round(time.perf_counter() - wall_start, 6)
+            record["cpu_seconds"] = round(time.process_time() - cpu_start, 6)
+            if trace_memory:
+                record["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+                if started_tracing:
+                    tracemalloc.stop()
+            if profiler:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                record["profile"] = os.path.join(self.profile_dir, f"profile_{name}.prof")
+                profiler.dump_stats(record["profile"])
+            self.stages.append(record)
+
+    def as_dict(self):
+        return {
+            "started_at": self.started_at,
+            "total_wall_seconds": round(sum(s["wall_seconds"] for s in self.stages), 6),
+            "stages": self.stages
+        }
+
+    def to_prometheus(self):
+        lines = []
+        for metric, key, help_text in _PROMETHEUS_METRICS:
+            samples = [(s["stage"], s[key]) for s in self.stages if s.get(key) is not None]
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            for stage, value in samples:
+                lines.append(f'{metric}{{stage="{_label_value(stage)}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, output_dir="output", basename="pipeline_metrics"):
+        """
+        Writes <basename>.json and a Prometheus textfile-collector file
+        <basename>.prom; both are replaced atomically.
+        Returns the two paths.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        json_path = os.path.join(output_dir, basename + ".json")
+        prom_path = os.path.join(output_dir, basename + ".prom")
+        for path, content in ((json_path, json.dumps(self.as_dict(), indent=2)), (prom_path, self.to_prometheus())):
+            with open(path + ".tmp", "w", encoding="utf-8") as file:
+                file.write(content)
+            os.replace(path + ".tmp", path)
+        return json_path, prom_path
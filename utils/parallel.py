@@ -0,0 +1,143 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.file_handler import sales_text_columns, new_parse_rejects, _new_filter_summary, _valid_array_rows
+from utils.data_processor import SalesAggregator
+from utils.records import TransactionArrays
+
+
+def chunk_ranges(filename, n_chunks):
+    """
+    Splits a file into up to n_chunks (start, end) byte ranges whose
+    boundaries fall just after a newline, so no line spans two chunks.
+    """
+    size = os.path.getsize(filename)
+    if size == 0:
+        return []
+    n_chunks = max(1, min(n_chunks, size))
+    ranges = []
+    start = 0
+    with open(filename, 'rb') as file:
+        for i in range(1, n_chunks + 1):
+            if start >= size:
+                break
+            end = size if i == n_chunks else max(start, size * i // n_chunks)
+            if end < size:
+                file.seek(end)
+                file.readline()  # move to the start of the next line
+                end = file.tell()
+            if end > start:
+                ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _aggregate_chunk(task):
+    # Runs in a worker process: parse, validate, filter and aggregate one
+    # byte range. Returns the partial aggregates, filter summary and parse
+    # rejects, plus (columns, keep flags) of the parsed rows when keep_rows
+    # is "all", or the columns of the valid rows alone when it is "valid"
+    filename, start, end, file_encoder, region, min_amount, max_amount, aggregator_class, keep_rows = task
+    aggregator = aggregator_class()
+    rejects = new_parse_rejects()
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        data = file.read(end - start)
+    try:
+        text = data.decode(file_encoder)
+    except UnicodeDecodeError:
+        print(f'{filename} file is not in UTF-8 encoding (bytes {start}-{end} skipped)')
+        return aggregator, _new_filter_summary(), rejects, None
+    transactions = TransactionArrays.from_columns(sales_text_columns(text, skip_header=(start == 0), rejects=rejects))
+    summary = _new_filter_summary()
+    keep = _valid_array_rows(transactions, region, min_amount, max_amount, summary)
+    valid = transactions.mask(keep)
+    aggregator.update(valid)
+    if keep_rows == "all":
+        return aggregator, summary, rejects, (transactions.columns(), keep)
+    return aggregator, summary, rejects, ((valid.columns(), None) if keep_rows == "valid" else None)
+
+
+def _run_chunks(filename, workers, file_encoder, region, min_amount, max_amount, executor, chunks_per_worker,
+                aggregator_class, keep_rows):
+    # Runs the chunk tasks and merges their results in file order
+    workers = workers or os.cpu_count() or 1
+    if '\n'.encode(file_encoder) == b'\n':
+        ranges = chunk_ranges(filename, workers * chunks_per_worker)
+    else:
+        # Multi-byte newline (e.g. UTF-16): the file can't be cut on b'\n'
+        ranges = [(0, os.path.getsize(filename))]
+    tasks = [
+        (filename, start, end, file_encoder, region, min_amount, max_amount, aggregator_class, keep_rows)
+        for start, end in ranges
+    ]
+    aggregator = aggregator_class()
+    filter_summary = _new_filter_summary()
+    rejects = new_parse_rejects()
+    blocks = []
+    keep = []
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        for partial, summary, chunk_rejects, rows in executor.map(_aggregate_chunk, tasks):
+            aggregator.merge(partial)
+            for key, value in summary.items():
+                filter_summary[key] += value
+            for key, value in chunk_rejects.items():
+                rejects[key] += value
+            if rows is not None:
+                blocks.append(rows[0])
+                if rows[1] is not None:
+                    keep.extend(rows[1])
+    finally:
+        if own_executor:
+            executor.shutdown()
+    return aggregator, filter_summary, rejects, blocks, keep
+
+
+def parallel_aggregate(filename, workers=None, file_encoder='utf-8', region=None,
+                       min_amount=None, max_amount=None, executor=None, chunks_per_worker=4,
+                       aggregator_class=SalesAggregator):
+    """
+    Parallel equivalent of
+        SalesAggregator().update(stream_transactions(filename, ...))
+    Returns (aggregator, filter_summary). Partial aggregates are merged in
+    file order, so rankings and tie order match the serial path.
+    Pass `executor` to reuse one process pool across several files, and
+    aggregator_class=sketches.ApproxSalesAggregator to merge sketches
+    instead of exact per-customer sets.
+    """
+    if not os.path.exists(filename):
+        print(f'{filename} file does not exist')
+        return aggregator_class(), _new_filter_summary()
+    aggregator, filter_summary, _, _, _ = _run_chunks(filename, workers, file_encoder, region, min_amount, max_amount,
+                                                   executor, chunks_per_worker, aggregator_class, None)
+    return aggregator, filter_summary
+
+
+def parallel_ingest(filename, workers=None, file_encoder='utf-8', region=None, min_amount=None,
+                    max_amount=None, executor=None, chunks_per_worker=4, aggregator_class=SalesAggregator,
+                    all_rows=True):
+    """
+    Steps 1-5 of the pipeline across worker processes: parallel_aggregate
+    that also brings back the parsed rows and the parse rejects.
+    Returns (transactions, valid_tx, aggregator, filter_summary, rejects),
+    where transactions is every parsed row as a TransactionArrays and
+    valid_tx the rows passing validation and the filters, the same as
+    validate_and_filter and SalesAggregator.update give on one core.
+    With all_rows=False the workers send back the valid rows only and
+    transactions is None (filter_summary["total_input"] still counts every
+    parsed row): enough when the filters are fixed up front.
+    """
+    if not os.path.exists(filename):
+        print(f'{filename} file does not exist')
+        empty = TransactionArrays.from_column_blocks([])
+        return empty if all_rows else None, empty, aggregator_class(), _new_filter_summary(), new_parse_rejects()
+    aggregator, filter_summary, rejects, blocks, keep = _run_chunks(
+        filename, workers, file_encoder, region, min_amount, max_amount, executor, chunks_per_worker,
+        aggregator_class, "all" if all_rows else "valid")
+    if not all_rows:
+        return None, TransactionArrays.from_column_blocks(blocks), aggregator, filter_summary, rejects
+    transactions = TransactionArrays.from_column_blocks(blocks)
+    return transactions, transactions.mask(keep), aggregator, filter_summary, rejects
@@ -0,0 +1,278 @@
+import json
+import math
+import os
+
+from utils.file_handler import iter_sales_columns, new_parse_rejects, validate_and_filter, _new_filter_summary
+from utils.data_processor import SalesAggregator
+from utils.records import TransactionArrays
+from utils.result_cache import dataset_fingerprint, _atomic_write
+
+STORE_VERSION = 1
+GRANULARITIES = ('day', 'month')
+UNDATED = "undated"  # partition for rows whose Date is not YYYY-MM-DD
+SALES_HEADER = "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region\n"
+MANIFEST_FILE = "manifest.json"
+MAX_SUMMARIES = 8  # filter combinations whose summary is kept per partition
+
+
+def partition_key(date, granularity='day'):
+    """'2024-12-05' -> '2024-12-05' (day) or '2024-12' (month); UNDATED for anything else."""
+    if len(date) == 10 and date[4] == '-' and date[7] == '-' and date.replace('-', '').isdigit():
+        return date if granularity == 'day' else date[:7]
+    return UNDATED
+
+
+def _filter_key(region, min_amount, max_amount):
+    def amount(value):
+        return None if value is None else float(value)
+    return json.dumps([region or None, amount(min_amount), amount(max_amount)])
+
+
+def _load_json(path):
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _save_json(path, value):
+    _atomic_write(path, json.dumps(value).encode("utf-8"))
+
+
+class PartitionedStore:
+    """
+    Sales data split by Date into one partition per day (or month) under
+    `root`. Each partition is a plain sales file (<key>.txt, header
+    included) with a small <key>.meta.json beside it: row count, min/max
+    Date, min/max amount, regions, and the aggregated summary of its valid
+    rows for the filter combinations queried so far.
+
+        store = PartitionedStore("data/partitions")
+        store.ingest("data/sales_data.txt")
+        aggregator, filter_summary = store.aggregate("2024-12-24", "2024-12-30", region="North")
+        daily_sales_trend(aggregator)
+
+    Date-range queries only open the partitions the range overlaps; whole
+    partitions are answered from their stored summaries (parsed once per
+    filter combination), so query time follows the range, not the history.
+    Rows with an unparseable Date go to the UNDATED partition, which only
+    unbounded queries include. Files are ingested once (by content).
+    An ingest is recorded as pending in the manifest, with every
+    partition's size, before any row is appended; an ingest interrupted
+    part way is rolled back (partitions truncated to those sizes) the next
+    time the store is opened, so retrying it does not duplicate rows.
+    """
+
+    def __init__(self, root, granularity='day'):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown partition granularity: {granularity}")
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._manifest_path = os.path.join(root, MANIFEST_FILE)
+        manifest = _load_json(self._manifest_path)
+        if manifest is None:
+            manifest = {"version": STORE_VERSION, "granularity": granularity, "ingested": {}}
+            _save_json(self._manifest_path, manifest)
+        elif manifest.get("granularity") != granularity:
+            raise ValueError(f"{root} is partitioned by {manifest.get('granularity')}, not {granularity}")
+        self.granularity = granularity
+        self._manifest = manifest
+        self._roll_back_pending()
+
+    def _data_path(self, key):
+        return os.path.join(self.root, key + ".txt")
+
+    def _meta_path(self, key):
+        return os.path.join(self.root, key + ".meta.json")
+
+    def keys(self):
+        """Partition keys in date order (UNDATED last)."""
+        keys = [name[:-4] for name in os.listdir(self.root) if name.endswith(".txt")]
+        return sorted(keys, key=lambda key: (key == UNDATED, key))
+
+    def _roll_back_pending(self):
+        # Undo appends of an ingest that did not finish
+        pending = self._manifest.pop("pending", None)
+        if not pending:
+            return
+        for key, size in pending["sizes"].items():
+            path = self._data_path(key)
+            if not os.path.exists(path):
+                continue
+            if size is None:
+                os.remove(path)
+                if os.path.exists(self._meta_path(key)):
+                    os.remove(self._meta_path(key))
+                continue
+            if os.path.getsize(path) != size:
+                os.truncate(path, size)
+                self._refresh_metadata(key)
+        print(f"Rolled back the interrupted ingest of {pending['file']}")
+        _save_json(self._manifest_path, self._manifest)
+
+    def ingest(self, filename, file_encoder='utf-8', rejects=None):
+        """
+        Appends the rows of a sales file to their partitions and refreshes
+        the touched partitions' metadata. Returns the number of rows added
+        (0 if this content was already ingested). Rows skipped as
+        malformed are counted into `rejects` (see new_parse_rejects).
+        """
+        fingerprint = dataset_fingerprint(filename)
+        if fingerprint in self._manifest["ingested"]:
+            return 0
+        if rejects is None:
+            rejects = new_parse_rejects()
+        lines = {}
+        for columns in iter_sales_columns(filename, file_encoder, rejects):
+            for row in zip(*columns):
+                key = partition_key(row[1], self.granularity)
+                partition_lines = lines.get(key)
+                if partition_lines is None:
+                    partition_lines = lines[key] = []
+                partition_lines.append("|".join(map(str, row)) + "\n")
+
+        # Saved before the first append: the sizes to roll back to
+        self._manifest["pending"] = {
+            "file": os.path.abspath(filename),
+            "sizes": {key: os.path.getsize(self._data_path(key)) if os.path.exists(self._data_path(key)) else None
+                      for key in lines}
+        }
+        _save_json(self._manifest_path, self._manifest)
+        for key, partition_lines in lines.items():
+            path = self._data_path(key)
+            new = not os.path.exists(path)
+            with open(path, "a", encoding="utf-8") as file:
+                if new:
+                    file.write(SALES_HEADER)
+                file.write("".join(partition_lines))
+            self._refresh_metadata(key)
+
+        del self._manifest["pending"]
+        self._manifest["ingested"][fingerprint] = os.path.abspath(filename)
+        _save_json(self._manifest_path, self._manifest)
+        return sum(map(len, lines.values()))
+
+    def _read(self, key):
+        return TransactionArrays.from_column_blocks(iter_sales_columns(self._data_path(key)))
+
+    def _refresh_metadata(self, key):
+        # Full rescan of one partition; stored summaries start over
+        transactions = self._read(key)
+        amounts = [amount for amount in transactions.revenue if not math.isnan(amount)]
+        meta = {
+            "version": STORE_VERSION,
+            "bytes": os.path.getsize(self._data_path(key)),
+            "rows": len(transactions),
+            "min_date": min(transactions.Date, default=None),
+            "max_date": max(transactions.Date, default=None),
+            "min_amount": min(amounts, default=None),
+            "max_amount": max(amounts, default=None),
+            "nan_amounts": len(transactions) - len(amounts),
+            "regions": sorted(set(transactions.Region)),
+            "summaries": {}
+        }
+        self._store_summary(meta, transactions, None, None, None)
+        _save_json(self._meta_path(key), meta)
+        return meta
+
+    def _store_summary(self, meta, transactions, region, min_amount, max_amount):
+        valid, _, filter_summary = validate_and_filter(transactions, region, min_amount, max_amount)
+        aggregator = SalesAggregator().update(valid)
+        summaries = meta["summaries"]
+        unfiltered = _filter_key(None, None, None)
+        while len(summaries) >= MAX_SUMMARIES:
+            # Oldest first; the unfiltered summary (stored first) is kept for pruning
+            summaries.pop(next(key for key in summaries if key != unfiltered))
+        summaries[_filter_key(region, min_amount, max_amount)] = {
+            "aggregator": aggregator.to_state(),
+            "filter_summary": filter_summary
+        }
+        return aggregator, filter_summary
+
+    def metadata(self, key):
+        """The partition's metadata, rebuilt if the data file changed since it was written."""
+        meta = _load_json(self._meta_path(key))
+        if (meta is None or meta.get("version") != STORE_VERSION or
+                meta["bytes"] != os.path.getsize(self._data_path(key))):
+            meta = self._refresh_metadata(key)
+        return meta
+
+    def partitions(self, start=None, end=None):
+        """[(key, metadata)] for the partitions with rows dated start..end (inclusive, ISO dates)."""
+        selected = []
+        for key in self.keys():
+            if key == UNDATED:
+                if start is None and end is None:
+                    selected.append((key, self.metadata(key)))
+                continue
+            # Prune on the key first (no file access): every Date in a
+            # partition starts with its key. Then on the stored dates.
+            last = key if self.granularity == 'day' else key + "-99"
+            if (start is not None and last < start) or (end is not None and key > end):
+                continue
+            meta = self.metadata(key)
+            if meta["rows"] and (start is None or meta["max_date"] >= start) and (
+                    end is None or meta["min_date"] <= end):
+                selected.append((key, meta))
+        return selected
+
+    def _covers(self, meta, start, end):
+        return (start is None or meta["min_date"] >= start) and (end is None or meta["max_date"] <= end)
+
+    def _read_range(self, key, meta, start, end):
+        transactions = self._read(key)
+        if key == UNDATED or self._covers(meta, start, end):
+            return transactions
+        return transactions.mask([(start is None or date >= start) and (end is None or date <= end)
+                                  for date in transactions.Date])
+
+    def read(self, start=None, end=None):
+        """TransactionArrays of every row dated start..end, partition by partition."""
+        parts = [self._read_range(key, meta, start, end) for key, meta in self.partitions(start, end)]
+        return TransactionArrays.from_column_blocks(part.columns() for part in parts)
+
+    def select(self, start=None, end=None, region=None, min_amount=None, max_amount=None):
+        """validate_and_filter over just the rows dated start..end."""
+        return validate_and_filter(self.read(start, end), region, min_amount, max_amount)
+
+    def _pruned(self, meta, region, min_amount, max_amount):
+        # No row of the partition can pass the region/amount filters
+        if region and region not in meta["regions"]:
+            return True
+        if meta["nan_amounts"] or meta["min_amount"] is None:
+            return False  # NaN amounts pass every amount filter
+        return ((min_amount is not None and meta["max_amount"] < min_amount) or
+                (max_amount is not None and meta["min_amount"] > max_amount))
+
+    def aggregate(self, start=None, end=None, region=None, min_amount=None, max_amount=None):
+        """
+        (SalesAggregator, filter_summary) for the valid rows dated
+        start..end that pass the filters, merged partition by partition in
+        date order. Whole partitions reuse (or store) their summary for this
+        filter combination; a range edge inside a month partition is parsed.
+        """
+        aggregator = SalesAggregator()
+        filter_summary = _new_filter_summary()
+        filter_key = _filter_key(region, min_amount, max_amount)
+        for key, meta in self.partitions(start, end):
+            if key != UNDATED and not self._covers(meta, start, end):
+                transactions = self._read_range(key, meta, start, end)
+                valid, _, summary = validate_and_filter(transactions, region, min_amount, max_amount)
+                partial = SalesAggregator().update(valid)
+            elif filter_key in meta["summaries"]:
+                stored = meta["summaries"][filter_key]
+                partial = SalesAggregator.from_state(stored["aggregator"])
+                summary = stored["filter_summary"]
+            elif self._pruned(meta, region, min_amount, max_amount):
+                partial = None
+                unfiltered = meta["summaries"][_filter_key(None, None, None)]
+                summary = dict(unfiltered["filter_summary"], final_count=0)
+            else:
+                partial, summary = self._store_summary(meta, self._read(key), region, min_amount, max_amount)
+                _save_json(self._meta_path(key), meta)
+            if partial is not None:
+                aggregator.merge(partial)
+            for name in filter_summary:
+                filter_summary[name] += summary[name]
+        return aggregator, filter_summary
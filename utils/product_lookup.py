@@ -0,0 +1,150 @@
+import threading
+from collections import OrderedDict
+
+from utils.api_handler import (
+    MAX_WORKERS, PRODUCTS_URL, REQUEST_TIMEOUT,
+    create_product_mapping, create_session, get_with_retries, parse_product_id
+)
+from utils.catalog_cache import DEFAULT_CACHE_PATH, DEFAULT_NEGATIVE_TTL, DEFAULT_TTL, load_products, save_products
+from utils.records import field_values
+
+
+def collect_product_ids(transactions):
+    """Distinct numeric product ids referenced by the transactions."""
+    product_ids = set()
+    seen = set()
+    for product_id_str in field_values(transactions, "ProductID"):
+        if product_id_str in seen:
+            continue
+        seen.add(product_id_str)
+        product_id = parse_product_id(product_id_str)
+        if product_id is not None:
+            product_ids.add(product_id)
+    return product_ids
+
+
+class ProductLookup:
+    """
+    Resolves only the product ids that are actually needed:
+    in-memory LRU -> local SQLite catalog cache -> per-product API endpoint.
+
+    Ids the API answers 404 for are remembered as missing (negative
+    caching) both in the LRU and in the SQLite cache, so they are not
+    requested again on every run. Cached products older than `ttl` are
+    fetched again, like the full catalog; if that fails, the expired row
+    is used. lookup() calls from several threads run one at a time.
+    """
+
+    def __init__(self, url=PRODUCTS_URL, cache_path=DEFAULT_CACHE_PATH, maxsize=4096,
+                 max_workers=MAX_WORKERS, timeout=REQUEST_TIMEOUT, negative_ttl=DEFAULT_NEGATIVE_TTL,
+                 ttl=DEFAULT_TTL):
+        self.url = url.rstrip("/")
+        self.cache_path = cache_path
+        self.maxsize = maxsize
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.negative_ttl = negative_ttl
+        self.ttl = ttl
+        self._memo = OrderedDict()  # product id -> product info, or None if it does not exist
+        self._session = None
+        self._lock = threading.Lock()
+
+    def _remember(self, product_id, product_info):
+        self._memo[product_id] = product_info
+        self._memo.move_to_end(product_id)
+        if len(self._memo) > self.maxsize:
+            self._memo.popitem(last=False)
+
+    def _fetch_one(self, product_id):
+        # Returns the product JSON, None on 404, or raises on other failures
+        response = get_with_retries(self._session, f"{self.url}/{product_id}", timeout=self.timeout)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    def _fetch(self, product_ids):
+        from concurrent.futures import ThreadPoolExecutor
+
+        import requests
+
+        found = {}
+        missing = set()
+        failed = []
+        if self._session is None:
+            self._session = create_session(self.max_workers)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {product_id: pool.submit(self._fetch_one, product_id) for product_id in product_ids}
+            for product_id, future in futures.items():
+                try:
+                    product = future.result()
+                except requests.exceptions.RequestException as e:
+                    failed.append((product_id, e))
+                    continue  # not cached either way; retried next time
+                if product is None:
+                    missing.add(product_id)
+                else:
+                    create_product_mapping([product], found)
+        if failed:
+            product_id, error = failed[0]
+            print(f"Failed to fetch {len(failed)} products (first: {product_id}: {error})")
+        return found, missing
+
+    def lookup(self, product_ids):
+        """
+        Returns a product mapping (as create_product_mapping builds it) for
+        the requested ids that exist.
+        """
+        with self._lock:
+            return self._lookup(product_ids)
+
+    def _lookup(self, product_ids):
+        product_mapping = {}
+        pending = []
+        for product_id in product_ids:
+            if product_id in self._memo:
+                self._memo.move_to_end(product_id)
+                if self._memo[product_id] is not None:
+                    product_mapping[product_id] = self._memo[product_id]
+            else:
+                pending.append(product_id)
+        if not pending:
+            return product_mapping
+
+        cached, missing = load_products(pending, self.cache_path, self.negative_ttl, self.ttl)
+        to_fetch = [i for i in pending if i not in cached and i not in missing]
+        if to_fetch:
+            fetched, fetched_missing = self._fetch(to_fetch)
+            save_products(fetched, fetched_missing, self.cache_path)
+            cached.update(fetched)
+            missing |= fetched_missing
+            failed = [i for i in to_fetch if i not in fetched and i not in fetched_missing]
+            if failed:
+                # API unreachable for these: fall back to expired cached rows
+                stale, _ = load_products(failed, self.cache_path, self.negative_ttl)
+                cached.update(stale)
+
+        for product_id in pending:
+            if product_id in cached:
+                product_mapping[product_id] = cached[product_id]
+                self._remember(product_id, cached[product_id])
+            elif product_id in missing:
+                self._remember(product_id, None)
+        return product_mapping
+
+
+_default_lookup = None  # created on first use, then shared by every call
+
+
+def lookup_product_mapping(transactions, lookup=None):
+    """
+    Product mapping covering just the products referenced by `transactions`,
+    ready to pass to enrich_sales_data. Without `lookup`, one process-wide
+    ProductLookup is used, so its in-memory LRU carries over from file to file.
+    """
+    global _default_lookup
+    if lookup is None:
+        if _default_lookup is None:
+            _default_lookup = ProductLookup()
+        lookup = _default_lookup
+    return lookup.lookup(collect_product_ids(transactions))
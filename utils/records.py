@@ -0,0 +1,209 @@
+import gc
+import sys
+from array import array
+from collections import namedtuple
+from itertools import compress, repeat
+from operator import mul
+
+TRANSACTION_FIELDS = ('TransactionID', 'Date', 'ProductID', 'ProductName', 'Quantity', 'UnitPrice',
+                      'CustomerID', 'Region')
+_FIELD_SET = frozenset(TRANSACTION_FIELDS)
+
+
+class Transaction(namedtuple('_TransactionRecord', TRANSACTION_FIELDS + ('revenue',))):
+    """
+    One parsed transaction as a compact, immutable record: the eight fields
+    of the sales file as attributes, plus `revenue` (Quantity * UnitPrice)
+    computed once when the record is built. A tuple subclass with empty
+    __slots__, so records are built at C speed and carry no per-row dict.
+
+    Read access also works like the transaction dicts (txn["Quantity"],
+    txn.get("Region"), dict(txn)), so code written for dicts accepts
+    records unchanged; to_dict() gives the dict form back. Integer and
+    slice keys index the tuple as usual.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, TransactionID, Date, ProductID, ProductName, Quantity, UnitPrice, CustomerID, Region):
+        return tuple.__new__(cls, (TransactionID, Date, ProductID, ProductName, Quantity, UnitPrice,
+                                   CustomerID, Region, Quantity * UnitPrice))
+
+    def __getnewargs__(self):
+        return tuple(self)[:len(TRANSACTION_FIELDS)]
+
+    @classmethod
+    def _make(cls, iterable):
+        # The eight fields; revenue is computed by __new__
+        return cls(*iterable)
+
+    def _replace(self, **changes):
+        """A copy with some of the eight fields changed and revenue recomputed."""
+        unknown = changes.keys() - _FIELD_SET
+        if unknown:
+            raise ValueError(f"Got unexpected field names: {sorted(unknown)!r}")
+        return self.__class__(*(changes.get(name, value) for name, value in zip(TRANSACTION_FIELDS, self)))
+
+    @classmethod
+    def from_dict(cls, txn):
+        return cls(*(txn[name] for name in TRANSACTION_FIELDS))
+
+    def to_dict(self):
+        return dict(zip(TRANSACTION_FIELDS, self))
+
+    def keys(self):
+        return TRANSACTION_FIELDS
+
+    def __getitem__(self, key):
+        if not isinstance(key, str):
+            return tuple.__getitem__(self, key)
+        if key not in _FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in _FIELD_SET else default
+
+    def __eq__(self, other):
+        if isinstance(other, Transaction):
+            return tuple.__eq__(self, other)
+        return self.to_dict() == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = tuple.__hash__
+
+    def __repr__(self):
+        return "Transaction(" + ", ".join(f"{name}={value!r}" for name, value in zip(TRANSACTION_FIELDS, self)) + ")"
+
+
+def _records(columns, revenue):
+    # Records straight from field columns and a matching revenue column
+    return map(tuple.__new__, repeat(Transaction), zip(*columns, revenue))
+
+
+def _intern_column(values):
+    # Repeated text values (dates, ids, names, regions) share one string
+    return list(map(sys.intern, values))
+
+
+def _number_column(typecode, values):
+    # Compact machine array; plain list if a value does not fit (e.g. huge ints)
+    try:
+        return array(typecode, values)
+    except OverflowError:
+        return list(values)
+
+
+def columns_to_records(columns):
+    """Transaction records for a column tuple from the tokenizer (see file_handler.tokenize_sales_text)."""
+    transaction_ids, dates, product_ids, product_names, quantities, unit_prices, customer_ids, regions = columns
+    columns = (transaction_ids, _intern_column(dates), _intern_column(product_ids), _intern_column(product_names),
+               quantities, unit_prices, _intern_column(customer_ids), _intern_column(regions))
+    # Records hold only strings and numbers, so they can't form reference
+    # cycles; pausing the collector saves rescanning every new record
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return list(_records(columns, map(mul, quantities, unit_prices)))
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class TransactionArrays:
+    """
+    Struct-of-arrays storage for many transactions: one list per text field
+    (repeated values interned) and one array per numeric field, including
+    `revenue`. Columns are attributes named like the fields (arrays.Region).
+
+    Behaves as a read-only sequence of Transaction records (len, indexing,
+    iteration build records on demand); validate_and_filter,
+    SalesAggregator.update, enrich_sales_data and save_enriched_data read
+    the columns directly instead.
+    """
+
+    def __init__(self, TransactionID, Date, ProductID, ProductName, Quantity, UnitPrice, CustomerID, Region,
+                 revenue=None):
+        self.TransactionID = TransactionID
+        self.Date = Date
+        self.ProductID = ProductID
+        self.ProductName = ProductName
+        self.Quantity = Quantity
+        self.UnitPrice = UnitPrice
+        self.CustomerID = CustomerID
+        self.Region = Region
+        if revenue is None:
+            revenue = _number_column('d', map(mul, Quantity, UnitPrice))
+        self.revenue = revenue
+
+    @classmethod
+    def from_column_blocks(cls, blocks):
+        """From several tokenizer column tuples (e.g. iter_sales_columns), concatenated in order."""
+        merged = [[] for _ in TRANSACTION_FIELDS]
+        for block in blocks:
+            for values, column in zip(merged, block):
+                values.extend(column)
+        return cls.from_columns(merged)
+
+    @classmethod
+    def from_columns(cls, columns):
+        """From one tokenizer column tuple (see file_handler.tokenize_sales_text)."""
+        transaction_ids, dates, product_ids, product_names, quantities, unit_prices, customer_ids, regions = columns
+        return cls(list(transaction_ids), _intern_column(dates), _intern_column(product_ids),
+                   _intern_column(product_names), _number_column('q', quantities),
+                   _number_column('d', unit_prices), _intern_column(customer_ids), _intern_column(regions))
+
+    @classmethod
+    def from_transactions(cls, transactions):
+        """From transaction dicts or records."""
+        transactions = list(transactions)
+        return cls.from_columns(tuple([txn[name] for txn in transactions] for name in TRANSACTION_FIELDS))
+
+    def columns(self):
+        """The eight field columns in file order."""
+        return tuple(getattr(self, name) for name in TRANSACTION_FIELDS)
+
+    def __len__(self):
+        return len(self.TransactionID)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.take(range(len(self))[i])
+        return tuple.__new__(Transaction, [column[i] for column in self.columns()] + [self.revenue[i]])
+
+    def __iter__(self):
+        return _records(self.columns(), self.revenue)
+
+    def rows(self):
+        """Plain tuples of the eight fields, in field order."""
+        return zip(*self.columns())
+
+    def take(self, rows):
+        """New TransactionArrays with the given row numbers, in that order."""
+        rows = list(rows)
+
+        def pick(column):
+            values = [column[i] for i in rows]
+            return array(column.typecode, values) if isinstance(column, array) else values
+        return TransactionArrays(*(pick(column) for column in self.columns()), revenue=pick(self.revenue))
+
+    def mask(self, keep):
+        """New TransactionArrays with the rows whose `keep` flag is true."""
+        keep = list(keep)
+
+        def pick(column):
+            values = compress(column, keep)
+            return array(column.typecode, values) if isinstance(column, array) else list(values)
+        return TransactionArrays(*(pick(column) for column in self.columns()), revenue=pick(self.revenue))
+
+    def to_dicts(self):
+        return [dict(zip(TRANSACTION_FIELDS, row)) for row in self.rows()]
+
+
+def field_values(transactions, name, default=""):
+    """One field across dicts, records or a TransactionArrays (read as a column)."""
+    if isinstance(transactions, TransactionArrays):
+        return getattr(transactions, name)
+    return (txn.get(name, default) for txn in transactions)
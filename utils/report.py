@@ -0,0 +1,274 @@
+import html
+import json
+from datetime import datetime
+
+from utils.data_processor import _as_aggregator, _distinct_count, _from_units, top_n
+
+LIST_LIMIT = 20  # entries shown per long list; the rest are only counted
+
+
+def _capped(items, limit):
+    # (first `limit` items, number left out)
+    if limit is None or len(items) <= limit:
+        return items, 0
+    return items[:limit], len(items) - limit
+
+
+def build_report_data(aggregator, enrichment, generated_at=None, list_limit=LIST_LIMIT):
+    """
+    Every figure the sales report shows, computed once from the aggregates.
+
+    `aggregator` is a SalesAggregator (or ApproxSalesAggregator);
+    `enrichment` is {'total', 'success_count', 'failed_products'} with
+    failed_products a {product name: unmatched transactions} dict (see
+    api_handler.enrichment_summary). Long lists (low performing and failed
+    products) keep the first `list_limit` entries and count the rest. The
+    result holds only plain values and is what every renderer formats.
+    """
+    aggregator = _as_aggregator(aggregator)
+    approximate = getattr(aggregator, 'approximate', False)
+    total_revenue = aggregator.total_revenue
+    total_transactions = aggregator.transaction_count
+
+    regions = []
+    for region, stats in aggregator.region_stats.items():
+        sales = _from_units(stats['total_sales'])
+        regions.append({
+            'region': region,
+            'sales': sales,
+            'percent': (sales / total_revenue * 100) if total_revenue else 0,
+            'transactions': stats['transaction_count']
+        })
+
+    # Heap selection over the aggregates; no full-size sorted copies
+    top_products = [
+        {'product': p, 'quantity': s['total_quantity'], 'revenue': _from_units(s['total_revenue'])}
+        for p, s in top_n(aggregator.product_stats.items(), 5, lambda x: _from_units(x[1]['total_revenue']))
+    ]
+    # Approximate mode (sketches.ApproxSalesAggregator) keeps no per-customer
+    # sets: top spenders come from Space-Saving, purchases from Count-Min
+    if approximate:
+        top_customers = [
+            {'customer': c, 'spent': _from_units(spent), 'orders': aggregator.purchase_counts.estimate(c)}
+            for c, spent, _ in aggregator.top_customers.top(5)
+        ]
+    else:
+        top_customers = [
+            {'customer': c, 'spent': _from_units(s['total_spent']), 'orders': _distinct_count(s['order_dates'])}
+            for c, s in top_n(aggregator.customer_stats.items(), 5, lambda x: _from_units(x[1]['total_spent']))
+        ]
+
+    daily_data = aggregator.date_stats
+    daily = [
+        {'date': date, 'revenue': _from_units(daily_data[date]['revenue']),
+         'transactions': daily_data[date]['transaction_count'],
+         'customers': _distinct_count(daily_data[date]['unique_customers'])}
+        for date in sorted(daily_data)
+    ]
+    best_selling_day = max(daily_data.items(), key=lambda x: x[1]["revenue"])[0] if daily_data else "N/A"
+    low_products, more_low_products = _capped(
+        [p for p, s in aggregator.product_stats.items() if s['total_quantity'] < 5], list_limit)
+
+    enriched_total = enrichment['total']
+    failed_products, more_failed_products = _capped(
+        [{'product': p, 'count': n} for p, n in enrichment['failed_products'].items()], list_limit)
+
+    estimates = None
+    if approximate:
+        estimates = {
+            'distinct_customers': len(aggregator.customers),
+            'order_value_quantiles': {q: aggregator.order_values.quantile(q) for q in (0.5, 0.9, 0.99)},
+            'error_bounds': aggregator.error_bounds()
+        }
+
+    return {
+        'generated': (generated_at or datetime.now()).strftime("%Y-%m-%d %H:%M:%S"),
+        'records': total_transactions,
+        'approximate': approximate,
+        'summary': {
+            'total_revenue': total_revenue,
+            'total_transactions': total_transactions,
+            'average_order_value': total_revenue / total_transactions if total_transactions else 0,
+            'date_range': f"{aggregator.min_date} to {aggregator.max_date}" if total_transactions else "N/A"
+        },
+        'estimates': estimates,
+        'regions': sorted(regions, key=lambda r: r['sales'], reverse=True),
+        'region_averages': [{'region': r['region'], 'average': r['sales'] / r['transactions']} for r in regions],
+        'top_products': top_products,
+        'top_customers': top_customers,
+        'daily': daily,
+        'best_selling_day': best_selling_day,
+        'low_products': low_products,
+        'more_low_products': more_low_products,
+        'enrichment': {
+            'total': enriched_total,
+            'success_count': enrichment['success_count'],
+            'success_rate': (enrichment['success_count'] / enriched_total * 100) if enriched_total else 0,
+            'failed_products': failed_products,
+            'more_failed_products': more_failed_products
+        }
+    }
+
+
+def render_text(data):
+    """The fixed-width text report, as one string."""
+    mark = "~" if data['approximate'] else ""
+    summary = data['summary']
+    lines = [
+        "=" * 44,
+        "       SALES ANALYTICS REPORT",
+        f"     Generated: {data['generated']}",
+        f"     Records Processed: {data['records']}"
+    ]
+    if data['approximate']:
+        lines += ["     APPROXIMATE MODE: figures marked ~ are", "     sketch estimates (see ESTIMATES)"]
+    lines += [
+        "=" * 44,
+        "",
+        "OVERALL SUMMARY",
+        "-" * 44,
+        f"Total Revenue:        ₹{summary['total_revenue']:,.2f}",
+        f"Total Transactions:   {summary['total_transactions']}",
+        f"Average Order Value:  ₹{summary['average_order_value']:,.2f}",
+        f"Date Range:           {summary['date_range']}",
+        ""
+    ]
+
+    estimates = data['estimates']
+    if estimates:
+        lines += ["ESTIMATES", "-" * 44, f"Distinct Customers:   ~{estimates['distinct_customers']}"]
+        for q, value in estimates['order_value_quantiles'].items():
+            label = f"Order Value p{q * 100:g}:"
+            lines.append(f"{label:22}~₹{value:,.2f}")
+        lines.append("Error bounds:")
+        lines += [f" - {name}: {bound}" for name, bound in estimates['error_bounds'].items()]
+        lines.append("")
+
+    lines += ["REGION-WISE PERFORMANCE", "-" * 44, f"{'Region':10}{'Sales':15}{'% of Total':12}{'Transactions'}"]
+    lines += [f"{r['region']:10}₹{r['sales']:13,.2f}  {r['percent']:8.2f}%     {r['transactions']}"
+              for r in data['regions']]
+    lines.append("")
+
+    lines += ["TOP 5 PRODUCTS", "-" * 44, f"{'Rank':5}{'Product':25}{'Qty Sold':10}{'Revenue'}"]
+    lines += [f"{i:<5}{p['product']:25}{p['quantity']:<10}₹{p['revenue']:,.2f}"
+              for i, p in enumerate(data['top_products'], 1)]
+    lines.append("")
+
+    lines += ["TOP 5 CUSTOMERS", "-" * 44,
+              f"{'Rank':5}{'Customer ID':15}{'Total Spent':15}{'~Purchases' if mark else 'Orders'}"]
+    lines += [f"{i:<5}{c['customer']:15}{mark}₹{c['spent']:{13 - len(mark)},.2f}  {c['orders']}"
+              for i, c in enumerate(data['top_customers'], 1)]
+    lines.append("")
+
+    lines += ["DAILY SALES TREND", "-" * 44, f"{'Date':12}{'Revenue':15}{'Txns':8}{'Customers'}"]
+    lines += [f"{d['date']:12}₹{d['revenue']:13,.2f}  {d['transactions']:<8}{mark}{d['customers']}"
+              for d in data['daily']]
+    lines.append("")
+
+    lines += ["PRODUCT PERFORMANCE ANALYSIS", "-" * 44, f"Best Selling Day: {data['best_selling_day']}",
+              "Low Performing Products:"]
+    lines += [f" - {p}" for p in data['low_products']]
+    if data['more_low_products']:
+        lines.append(f" ... and {data['more_low_products']} more")
+    lines += ["", "Average Transaction Value per Region:"]
+    lines += [f" - {r['region']}: ₹{r['average']:,.2f}" for r in data['region_averages']]
+    lines.append("")
+
+    enrichment = data['enrichment']
+    lines += ["API ENRICHMENT SUMMARY", "-" * 44, f"Total Products Enriched: {enrichment['total']}",
+              f"Success Rate: {enrichment['success_rate']:.2f}%", "Failed Products:"]
+    lines += [f" - {p['product']}" + (f" ({p['count']} transactions)" if p['count'] > 1 else "")
+              for p in enrichment['failed_products']]
+    if enrichment['more_failed_products']:
+        lines.append(f" ... and {enrichment['more_failed_products']} more")
+    return "\n".join(lines) + "\n"
+
+
+def render_json(data):
+    return json.dumps(data, ensure_ascii=False, indent=2) + "\n"
+
+
+def _html_table(headers, rows):
+    head = "".join(f"<th>{html.escape(str(h))}</th>" for h in headers)
+    body = "".join("<tr>" + "".join(f"<td>{html.escape(str(cell))}</td>" for cell in row) + "</tr>" for row in rows)
+    return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
+
+
+def _html_list(items, more):
+    entries = [f"<li>{html.escape(str(item))}</li>" for item in items]
+    if more:
+        entries.append(f"<li>… and {more} more</li>")
+    return "<ul>" + "".join(entries) + "</ul>"
+
+
+def render_html(data):
+    """A standalone HTML page with the same sections as the text report."""
+    mark = "~" if data['approximate'] else ""
+    summary = data['summary']
+    enrichment = data['enrichment']
+    parts = [
+        "<!DOCTYPE html>",
+        '<html><head><meta charset="utf-8"><title>Sales Analytics Report</title></head><body>',
+        "<h1>Sales Analytics Report</h1>",
+        f"<p>Generated: {data['generated']} &middot; Records Processed: {data['records']}</p>"
+    ]
+    if data['approximate']:
+        parts.append("<p><strong>Approximate mode:</strong> figures marked ~ are sketch estimates.</p>")
+    parts += [
+        "<h2>Overall Summary</h2>",
+        _html_table(["Total Revenue", "Total Transactions", "Average Order Value", "Date Range"], [[
+            f"₹{summary['total_revenue']:,.2f}", summary['total_transactions'],
+            f"₹{summary['average_order_value']:,.2f}", summary['date_range']
+        ]])
+    ]
+    estimates = data['estimates']
+    if estimates:
+        parts += [
+            "<h2>Estimates</h2>",
+            _html_table(["Estimate", "Value"],
+                        [["Distinct Customers", f"~{estimates['distinct_customers']}"]] +
+                        [[f"Order Value p{q * 100:g}", f"~₹{value:,.2f}"]
+                         for q, value in estimates['order_value_quantiles'].items()] +
+                        [[f"Error bound: {name}", bound] for name, bound in estimates['error_bounds'].items()])
+        ]
+    parts += [
+        "<h2>Region-wise Performance</h2>",
+        _html_table(["Region", "Sales", "% of Total", "Transactions"],
+                    [[r['region'], f"₹{r['sales']:,.2f}", f"{r['percent']:.2f}%", r['transactions']]
+                     for r in data['regions']]),
+        "<h2>Top 5 Products</h2>",
+        _html_table(["Rank", "Product", "Qty Sold", "Revenue"],
+                    [[i, p['product'], p['quantity'], f"₹{p['revenue']:,.2f}"]
+                     for i, p in enumerate(data['top_products'], 1)]),
+        "<h2>Top 5 Customers</h2>",
+        _html_table(["Rank", "Customer ID", "Total Spent", "~Purchases" if mark else "Orders"],
+                    [[i, c['customer'], f"{mark}₹{c['spent']:,.2f}", c['orders']]
+                     for i, c in enumerate(data['top_customers'], 1)]),
+        "<h2>Daily Sales Trend</h2>",
+        _html_table(["Date", "Revenue", "Txns", "Customers"],
+                    [[d['date'], f"₹{d['revenue']:,.2f}", d['transactions'], f"{mark}{d['customers']}"]
+                     for d in data['daily']]),
+        "<h2>Product Performance Analysis</h2>",
+        f"<p>Best Selling Day: {html.escape(str(data['best_selling_day']))}</p>",
+        "<h3>Low Performing Products</h3>",
+        _html_list(data['low_products'], data['more_low_products']),
+        "<h3>Average Transaction Value per Region</h3>",
+        _html_list([f"{r['region']}: ₹{r['average']:,.2f}" for r in data['region_averages']], 0),
+        "<h2>API Enrichment Summary</h2>",
+        f"<p>Total Products Enriched: {enrichment['total']} &middot; "
+        f"Success Rate: {enrichment['success_rate']:.2f}%</p>",
+        "<h3>Failed Products</h3>",
+        _html_list([f"{p['product']} ({p['count']} transactions)" if p['count'] > 1 else p['product']
+                    for p in enrichment['failed_products']], enrichment['more_failed_products']),
+        "</body></html>"
+    ]
+    return "\n".join(parts) + "\n"
+
+
+RENDERERS = {'text': render_text, 'json': render_json, 'html': render_html}
+
+
+def render_report(data, fmt='text'):
+    if fmt not in RENDERERS:
+        raise ValueError(f"Unknown report format: {fmt}")
+    return RENDERERS[fmt](data)
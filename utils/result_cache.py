@@ -0,0 +1,197 @@
+import codecs
+import hashlib
+import json
+import os
+import pickle
+from collections import OrderedDict
+
+from utils.file_handler import stream_transactions, _new_filter_summary
+from utils.data_processor import (
+    SalesAggregator,
+    calculate_total_revenue,
+    region_wise_sales,
+    top_selling_products,
+    customer_analysis,
+    daily_sales_trend,
+    find_peak_sales_day,
+    low_performing_products
+)
+from utils.sketches import approximate_analytics
+
+ANALYTICS_VERSION = 2  # bump when the cached analytics change shape
+HASH_BLOCK_SIZE = 1 << 20
+FINGERPRINTS_FILE = "fingerprints.json"
+
+_fingerprints = {}  # absolute path -> (size, mtime_ns, digest)
+
+
+def _load_fingerprints(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, FINGERPRINTS_FILE), encoding="utf-8") as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _atomic_write(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+
+
+def dataset_fingerprint(filename, cache_dir=None):
+    """
+    SHA-256 of the file's content. The digest is remembered per path with
+    the file's size and mtime (in memory, and in `cache_dir` if given), so
+    it is only recomputed after the file changes.
+    """
+    path = os.path.abspath(filename)
+    stat = os.stat(path)
+    stamp = [stat.st_size, stat.st_mtime_ns]
+    known = _fingerprints.get(path)
+    if known is None and cache_dir:
+        known = _load_fingerprints(cache_dir).get(path)
+    if known is not None and list(known[:2]) == stamp:
+        _fingerprints[path] = tuple(known)
+        return known[2]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    fingerprint = digest.hexdigest()
+    _fingerprints[path] = (*stamp, fingerprint)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        fingerprints = _load_fingerprints(cache_dir)
+        fingerprints[path] = [*stamp, fingerprint]
+        _atomic_write(os.path.join(cache_dir, FINGERPRINTS_FILE), json.dumps(fingerprints).encode("utf-8"))
+    return fingerprint
+
+
+class ResultCache:
+    """
+    In-memory LRU of computed results, optionally backed by one pickle file
+    per key in `cache_dir` so results survive between runs. Keys must
+    identify their inputs completely (see analytics_key); cached values are
+    shared, so treat them as read-only.
+    """
+
+    def __init__(self, maxsize=32, cache_dir=None, disk_maxsize=256):
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        self.disk_maxsize = disk_maxsize
+        self._memo = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".pkl")
+
+    def _remember(self, key, value):
+        self._memo[key] = value
+        self._memo.move_to_end(key)
+        if len(self._memo) > self.maxsize:
+            self._memo.popitem(last=False)
+
+    def get(self, key):
+        """The cached value, or None."""
+        if key in self._memo:
+            self._memo.move_to_end(key)
+            self.hits += 1
+            return self._memo[key]
+        if self.cache_dir:
+            path = self._path(key)
+            try:
+                with open(path, "rb") as file:
+                    stored_key, value = pickle.load(file)
+            except FileNotFoundError:
+                stored_key = None
+            except (pickle.UnpicklingError, EOFError, ValueError, AttributeError, ImportError) as e:
+                print(f"Ignoring unreadable cache entry {path}: {e}")
+                stored_key = None
+            if stored_key == key:
+                os.utime(path)  # most recently used, for _prune
+                self._remember(key, value)
+                self.hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self._remember(key, value)
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            _atomic_write(self._path(key), pickle.dumps((key, value), protocol=pickle.HIGHEST_PROTOCOL))
+            self._prune()
+
+    def _prune(self):
+        # Drop the least recently used files beyond disk_maxsize
+        entries = [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(".pkl")]
+        if len(entries) <= self.disk_maxsize:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime_ns)
+        for entry in entries[:len(entries) - self.disk_maxsize]:
+            os.remove(entry.path)
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+
+def analytics_key(fingerprint, region=None, min_amount=None, max_amount=None, approximate=False,
+                  file_encoder='utf-8'):
+    """
+    Cache key for the analytics of one dataset, read with `file_encoder`,
+    under validate_and_filter's filters.
+    """
+    def amount(value):
+        return None if value is None else float(value)
+    return json.dumps(["analytics", ANALYTICS_VERSION, fingerprint, codecs.lookup(file_encoder).name,
+                       region or None, amount(min_amount), amount(max_amount),
+                       "approximate" if approximate else "exact"])
+
+
+def compute_analytics(aggregator):
+    """Every data_processor view of one aggregator, plus the aggregator itself for the report."""
+    if getattr(aggregator, 'approximate', False):
+        return approximate_analytics(aggregator)
+    return {
+        'aggregator': aggregator,
+        'total_revenue': calculate_total_revenue(aggregator),
+        'region_stats': region_wise_sales(aggregator),
+        'top_products': top_selling_products(aggregator),
+        'customer_stats': customer_analysis(aggregator),
+        'daily_stats': daily_sales_trend(aggregator),
+        'peak_day': find_peak_sales_day(aggregator),
+        'low_products': low_performing_products(aggregator)
+    }
+
+
+_default_cache = ResultCache()
+
+
+def cached_analytics(filename, region=None, min_amount=None, max_amount=None, cache=None,
+                     file_encoder='utf-8'):
+    """
+    compute_analytics for a sales file filtered like validate_and_filter,
+    plus its 'filter_summary'. Served from `cache` (a process-wide
+    in-memory cache by default) while the file's content is unchanged.
+    """
+    cache = cache or _default_cache
+    key = analytics_key(dataset_fingerprint(filename, cache.cache_dir), region, min_amount, max_amount,
+                        file_encoder=file_encoder)
+
+    def compute():
+        filter_summary = _new_filter_summary()
+        aggregator = SalesAggregator().update(
+            stream_transactions(filename, file_encoder, region, min_amount, max_amount, filter_summary))
+        analytics = compute_analytics(aggregator)
+        analytics['filter_summary'] = filter_summary
+        return analytics
+
+    return cache.get_or_compute(key, compute)
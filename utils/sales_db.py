@@ -0,0 +1,237 @@
+import os
+import sqlite3
+from itertools import islice
+
+from utils.data_processor import _to_units, _from_units, _check_tie_break, top_n
+from utils.records import TRANSACTION_FIELDS, TransactionArrays, field_values
+
+DEFAULT_DB_PATH = "data/sales.sqlite"
+LOAD_BATCH_SIZE = 50000  # rows per executemany call
+
+# Revenue is summed exactly like SalesAggregator's fixed-point units
+# (_to_units, 2**-64 scale). Those need ~100 bits, more than an SQLite
+# INTEGER holds, so each row stores its units as four 32-bit limbs of the
+# 128-bit two's complement value; SUM() of each limb cannot overflow below
+# 2**31 rows and the totals are recombined in Python. A NaN or infinite
+# revenue (kept as a float by _to_units) stores zero limbs and its repr in
+# revenue_nonfinite instead, since SQLite turns NaN into NULL; the distinct
+# values per group are added back onto the total.
+_LIMB_BITS = 32
+_LIMB_MASK = (1 << _LIMB_BITS) - 1
+_UNITS_BITS = 4 * _LIMB_BITS
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    transaction_id TEXT,
+    date TEXT,
+    product_id TEXT,
+    product_name TEXT,
+    quantity INTEGER,
+    unit_price REAL,
+    customer_id TEXT,
+    region TEXT,
+    revenue_0 INTEGER,
+    revenue_1 INTEGER,
+    revenue_2 INTEGER,
+    revenue_3 INTEGER,
+    revenue_nonfinite TEXT
+);
+"""
+
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS transactions_region ON transactions (region);
+CREATE INDEX IF NOT EXISTS transactions_product_id ON transactions (product_id);
+CREATE INDEX IF NOT EXISTS transactions_product_name ON transactions (product_name);
+CREATE INDEX IF NOT EXISTS transactions_customer_id ON transactions (customer_id);
+CREATE INDEX IF NOT EXISTS transactions_date ON transactions (date);
+"""
+
+_REVENUE_SUMS = ("SUM(revenue_0), SUM(revenue_1), SUM(revenue_2), SUM(revenue_3), "
+                 "GROUP_CONCAT(DISTINCT revenue_nonfinite)")
+
+
+def _limbs(revenue):
+    units = _to_units(revenue)
+    if isinstance(units, float):
+        return (0, 0, 0, 0, repr(units))
+    units &= (1 << _UNITS_BITS) - 1
+    return (units & _LIMB_MASK, (units >> 32) & _LIMB_MASK, (units >> 64) & _LIMB_MASK, units >> 96, None)
+
+
+def _units(sums):
+    # Recombine SUM()s of the limbs into signed fixed-point units
+    *limb_sums, nonfinite = sums
+    units = sum((limb_sum or 0) << (i * _LIMB_BITS) for i, limb_sum in enumerate(limb_sums))
+    units &= (1 << _UNITS_BITS) - 1
+    units = units - (1 << _UNITS_BITS) if units >> (_UNITS_BITS - 1) else units
+    if nonfinite:
+        return units + sum(float(value) for value in nonfinite.split(","))
+    return units
+
+
+def _rows(transactions):
+    # (8 fields..., 4 revenue limbs, non-finite revenue) per transaction, reading columns where possible
+    if isinstance(transactions, TransactionArrays):
+        revenue = transactions.revenue
+    else:
+        transactions = list(transactions)
+        revenue = (txn.get("Quantity", 0) * txn.get("UnitPrice", 0) for txn in transactions)
+    columns = [field_values(transactions, name) for name in TRANSACTION_FIELDS]
+    return (fields + _limbs(amount) for fields, amount in zip(zip(*columns), revenue))
+
+
+class SalesDatabase:
+    """
+    Transactions persisted in an SQLite file, with the data_processor
+    analyses pushed down into SQL GROUP BYs.
+
+        with SalesDatabase("data/sales.sqlite") as db:
+            db.load(valid_transactions)
+            db.region_wise_sales()
+
+    Each analysis returns the same structure as its data_processor
+    counterpart run on the same (already validated/filtered) rows, ties
+    included: groups keep first-appearance order via rowid. The one
+    difference is customer_analysis's products_bought, listed in
+    first-appearance order rather than set order.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(_SCHEMA)
+        # Databases from before revenue_nonfinite existed get the column, NULL
+        if "revenue_nonfinite" not in {row[1] for row in self.connection.execute("PRAGMA table_info(transactions)")}:
+            self.connection.execute("ALTER TABLE transactions ADD COLUMN revenue_nonfinite TEXT")
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+    def load(self, transactions, batch_size=LOAD_BATCH_SIZE, replace=False):
+        """
+        Appends transactions (dicts, records or TransactionArrays) in one
+        transaction, batch_size rows per executemany. Returns the row count.
+        Rows are not deduplicated: loading the same data twice counts it
+        twice. replace=True empties the table first, in the same transaction.
+        """
+        rows = _rows(transactions)
+        count = 0
+        with self.connection:
+            if replace:
+                self.connection.execute("DELETE FROM transactions")
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                self.connection.executemany(
+                    "INSERT INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+                count += len(batch)
+            # Built after the bulk insert, kept up to date by later loads
+            self.connection.executescript(_INDEXES)
+        return count
+
+    def clear(self):
+        with self.connection:
+            self.connection.execute("DELETE FROM transactions")
+
+    def _total_units(self):
+        return _units(self.connection.execute(f"SELECT {_REVENUE_SUMS} FROM transactions").fetchone())
+
+    def calculate_total_revenue(self):
+        return round(_from_units(self._total_units()), 2)
+
+    def region_wise_sales(self):
+        total_sales = _from_units(self._total_units())
+        region_stats = {}
+        for region, count, *sums in self.connection.execute(
+                f"SELECT region, COUNT(*), {_REVENUE_SUMS} FROM transactions GROUP BY region ORDER BY MIN(rowid)"):
+            sales = _from_units(_units(sums))
+            region_stats[region] = {
+                'total_sales': sales,
+                'transaction_count': count,
+                'percentage': round((sales / total_sales) * 100, 2) if total_sales > 0 else 0.0
+            }
+        return dict(sorted(region_stats.items(), key=lambda item: item[1]['total_sales'], reverse=True))
+
+    def top_selling_products(self, n=5, tie_break="first"):
+        _check_tie_break(tie_break)
+        order = "MIN(rowid)" if tie_break == "first" else "product_name"
+        limit = "" if n is None else f"LIMIT {int(n)}"
+        return [
+            (product, quantity, round(_from_units(_units(sums)), 2))
+            for product, quantity, *sums in self.connection.execute(
+                f"SELECT product_name, SUM(quantity), {_REVENUE_SUMS} FROM transactions "
+                f"GROUP BY product_name ORDER BY SUM(quantity) DESC, {order} {limit}")
+        ]
+
+    def customer_analysis(self, n=None, tie_break="first"):
+        """
+        Per-customer stats ordered by total_spent, highest first. Sums and
+        counts come from SQL; the exact spend ranking is done over the
+        per-customer groups, and products are fetched for the top n only.
+        """
+        groups = [
+            (customer_id, (_units(sums), count))
+            for customer_id, count, *sums in self.connection.execute(
+                f"SELECT customer_id, COUNT(*), {_REVENUE_SUMS} FROM transactions "
+                f"GROUP BY customer_id ORDER BY MIN(rowid)")
+        ]
+        ranked = top_n(groups, n, lambda item: round(_from_units(item[1][0]), 2), tie_break)
+
+        products_bought = {customer_id: [] for customer_id, _ in ranked}
+        query = ("SELECT customer_id, product_name FROM transactions {} "
+                 "GROUP BY customer_id, product_name ORDER BY MIN(rowid)")
+        if n is None:
+            pairs = self.connection.execute(query.format(""))
+        else:
+            self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS selected_customers (customer_id TEXT PRIMARY KEY)")
+            self.connection.execute("DELETE FROM selected_customers")
+            self.connection.executemany("INSERT INTO selected_customers VALUES (?)",
+                                        ((customer_id,) for customer_id in products_bought))
+            pairs = self.connection.execute(
+                query.format("WHERE customer_id IN (SELECT customer_id FROM selected_customers)"))
+        for customer_id, product in pairs:
+            products_bought[customer_id].append(product)
+
+        customer_stats = {}
+        for customer_id, (units, purchase_count) in ranked:
+            total_spent = _from_units(units)
+            customer_stats[customer_id] = {
+                'total_spent': round(total_spent, 2),
+                'purchase_count': purchase_count,
+                'products_bought': products_bought[customer_id],
+                'avg_order_value': round(total_spent / purchase_count, 2) if purchase_count > 0 else 0.0
+            }
+        return customer_stats
+
+    def daily_sales_trend(self):
+        return {
+            date: {
+                'revenue': round(_from_units(_units(sums)), 2),
+                'transaction_count': count,
+                'unique_customers': unique_customers
+            }
+            for date, count, unique_customers, *sums in self.connection.execute(
+                f"SELECT date, COUNT(*), COUNT(DISTINCT customer_id), {_REVENUE_SUMS} FROM transactions "
+                f"GROUP BY date ORDER BY date")
+        }
+
+    def low_performing_products(self, threshold=10):
+        return [
+            (product, quantity, round(_from_units(_units(sums)), 2))
+            for product, quantity, *sums in self.connection.execute(
+                f"SELECT product_name, SUM(quantity), {_REVENUE_SUMS} FROM transactions "
+                f"GROUP BY product_name HAVING SUM(quantity) < ? ORDER BY SUM(quantity), MIN(rowid)", (threshold,))
+        ]
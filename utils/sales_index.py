@@ -0,0 +1,164 @@
+import mmap
+import os
+
+import numpy as np
+
+from utils.file_handler import sales_text_columns, columns_to_transactions, validate_and_filter
+
+INDEX_VERSION = 1
+INDEX_READ_SIZE = 1 << 20  # bytes of lines read per batch while building
+
+
+def default_index_path(filename):
+    return filename + ".index.npz"
+
+
+def _file_stamp(filename):
+    stat = os.stat(filename)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def build_index(file):
+    """
+    Scans a sales file (opened in binary mode) once and returns the index
+    arrays: the byte span of every non-blank data line (header excluded)
+    and the line numbers sorted by TransactionID and by Date. Keys are
+    the raw first/second fields, stripped; whether a line parses is
+    decided when it is read back.
+    """
+    file.seek(0)
+    file.readline()  # header
+    offset = file.tell()
+    starts = []
+    ends = []
+    transaction_ids = []
+    dates = []
+    while True:
+        lines = file.readlines(INDEX_READ_SIZE)
+        if not lines:
+            break
+        for line in lines:
+            start = offset
+            offset += len(line)
+            if not line.replace(b'|', b'').strip():
+                continue
+            fields = line.split(b'|', 2)
+            starts.append(start)
+            ends.append(offset - 1 if line.endswith(b'\n') else offset)
+            transaction_ids.append(fields[0].strip())
+            dates.append(fields[1].strip() if len(fields) > 1 else b"")
+
+    # Keys stay encoded bytes (1 byte/char on disk instead of 4 for str arrays)
+    transaction_ids = np.array(transaction_ids, dtype=bytes)
+    dates = np.array(dates, dtype=bytes)
+    id_order = np.argsort(transaction_ids, kind='stable')
+    date_order = np.argsort(dates, kind='stable')
+    return {
+        'starts': np.array(starts, dtype=np.int64),
+        'ends': np.array(ends, dtype=np.int64),
+        'id_keys': transaction_ids[id_order],
+        'id_rows': id_order,
+        'date_keys': dates[date_order],
+        'date_rows': date_order
+    }
+
+
+def load_index(index_path, stamp):
+    """The index arrays saved at `index_path`, or None if missing or built for another file version."""
+    try:
+        with np.load(index_path) as data:
+            if data['meta'].tolist() != [INDEX_VERSION, *stamp]:
+                return None
+            return {name: data[name] for name in data.files if name != 'meta'}
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def save_index(index, index_path, stamp):
+    # Write then rename so a concurrent reader never sees half an index
+    tmp_path = index_path + ".tmp.npz"
+    np.savez(tmp_path, meta=np.array([INDEX_VERSION, *stamp], dtype=np.int64), **index)
+    os.replace(tmp_path, index_path)
+
+
+class SalesFileIndex:
+    """
+    Random access to a sales file by TransactionID and Date.
+
+    The file is memory-mapped and a sidecar index (<file>.index.npz by
+    default) maps TransactionIDs and Dates to the byte spans of their
+    lines. The index is built on first use and rebuilt whenever the file's
+    size or mtime changes. Lookups only read and parse the matching lines.
+
+        with SalesFileIndex("data/sales_data.txt") as index:
+            index.lookup("T042")
+            valid, invalid, summary = index.select("2024-12-01", "2024-12-07", region="North")
+
+    Assumes one record per line (quoted fields spanning lines are not
+    supported) and an ASCII-compatible encoding.
+    """
+
+    def __init__(self, filename, index_path=None, file_encoder='utf-8'):
+        self.filename = filename
+        self.index_path = index_path or default_index_path(filename)
+        self.file_encoder = file_encoder
+        self.rebuilt = False
+        self._file = open(filename, 'rb')
+        try:
+            stamp = _file_stamp(filename)
+            # mmap can't map an empty file
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if stamp[0] else b''
+            index = load_index(self.index_path, stamp)
+            if index is None:
+                index = build_index(self._file)
+                save_index(index, self.index_path, stamp)
+                self.rebuilt = True
+        except Exception:
+            self.close()
+            raise
+        self._index = index
+
+    def close(self):
+        if isinstance(getattr(self, '_data', None), mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self._index['starts'])
+
+    def _read_rows(self, rows):
+        # Rows are read in file order; consecutive lines come out as one slice
+        rows = np.sort(np.asarray(rows, dtype=np.int64))
+        if not len(rows):
+            return []
+        starts = self._index['starts'][rows]
+        ends = self._index['ends'][rows]
+        breaks = np.flatnonzero(starts[1:] != ends[:-1] + 1) + 1
+        span_starts = starts[np.concatenate(([0], breaks))].tolist()
+        span_ends = ends[np.concatenate((breaks - 1, [len(rows) - 1]))].tolist()
+        text = b'\n'.join(self._data[start:end] for start, end in zip(span_starts, span_ends))
+        return columns_to_transactions(sales_text_columns(text.decode(self.file_encoder)))
+
+    def _key_rows(self, name, low, high):
+        keys = self._index[f'{name}_keys']
+        first = 0 if low is None else np.searchsorted(keys, low.encode(self.file_encoder), side='left')
+        last = len(keys) if high is None else np.searchsorted(keys, high.encode(self.file_encoder), side='right')
+        return self._index[f'{name}_rows'][first:last]
+
+    def lookup(self, transaction_id):
+        """Parsed transactions with this TransactionID (several if it is duplicated)."""
+        return self._read_rows(self._key_rows('id', transaction_id, transaction_id))
+
+    def date_range(self, start=None, end=None):
+        """Parsed transactions dated start..end inclusive (ISO date strings), in file order."""
+        return self._read_rows(self._key_rows('date', start, end))
+
+    def select(self, start=None, end=None, region=None, min_amount=None, max_amount=None):
+        """validate_and_filter over just the lines dated start..end."""
+        return validate_and_filter(self.date_range(start, end), region, min_amount, max_amount)
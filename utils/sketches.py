@@ -0,0 +1,441 @@
+import hashlib
+import heapq
+import math
+
+from utils.data_processor import (
+    _to_units,
+    _from_units,
+    calculate_total_revenue,
+    region_wise_sales,
+    top_selling_products,
+    daily_sales_trend,
+    find_peak_sales_day,
+    low_performing_products
+)
+
+# Fixed, process-independent hashing (str hash() is salted per process),
+# so sketches built in different worker processes can be merged.
+_MASK64 = (1 << 64) - 1
+
+
+def hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HyperLogLog:
+    """
+    Distinct-count estimate in constant memory (2**p one-byte registers).
+    `error` is the target relative standard error (1.04 / sqrt(2**p)).
+    len() returns the rounded estimate, so it can stand in for a set
+    wherever only the size is read.
+    """
+
+    def __init__(self, error=0.02):
+        self.error = error
+        self.p = min(16, max(4, math.ceil(math.log2((1.04 / error) ** 2))))
+        self.m = 1 << self.p
+        self.registers = bytearray(self.m)
+
+    def add(self, value):
+        self.add_hash(hash64(value))
+
+    def add_hash(self, hashed):
+        index = hashed >> (64 - self.p)
+        rest = hashed & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def estimate(self):
+        m = self.m
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        registers = bytes(self.registers)
+        total = sum(registers.count(rank) * 2.0 ** -rank for rank in set(registers))
+        estimate = alpha * m * m / total
+        zeros = registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # linear counting for small sets
+        return estimate
+
+    def __len__(self):
+        return int(round(self.estimate()))
+
+    def copy(self):
+        sketch = HyperLogLog(self.error)
+        sketch.registers = bytearray(self.registers)
+        return sketch
+
+    def merge(self, other):
+        if other.p != self.p:
+            raise ValueError("Can only merge HyperLogLogs with the same precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+
+class CountMinSketch:
+    """
+    Point estimates of per-key totals in width x depth counters. An
+    estimate never undercounts and overcounts by at most epsilon * (sum of
+    all counts) with probability 1 - delta.
+    """
+
+    def __init__(self, epsilon=0.0005, delta=0.01):
+        self.epsilon = epsilon
+        self.delta = delta
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self.tables = [[0] * self.width for _ in range(self.depth)]
+        self.total = 0
+
+    def _indexes(self, hashed):
+        # Double hashing: row i uses h1 + i * h2
+        h1 = hashed & 0xFFFFFFFF
+        h2 = hashed >> 32
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, value, count=1):
+        self.add_hash(hash64(value), count)
+
+    def add_hash(self, hashed, count=1):
+        self.total += count
+        h1 = hashed & 0xFFFFFFFF
+        h2 = hashed >> 32
+        width = self.width
+        for i, table in enumerate(self.tables):
+            table[(h1 + i * h2) % width] += count
+
+    def estimate(self, value):
+        hashed = hash64(value)
+        return min(table[index] for table, index in zip(self.tables, self._indexes(hashed)))
+
+    def merge(self, other):
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Can only merge CountMinSketches with the same width and depth")
+        self.tables = [list(map(int.__add__, mine, theirs)) for mine, theirs in zip(self.tables, other.tables)]
+        self.total += other.total
+        return self
+
+
+class SpaceSaving:
+    """
+    Heavy hitters by weight, tracking at most k keys. A tracked key's count
+    overestimates its true total by at most its recorded error, which is
+    bounded by (total weight) / k.
+    """
+
+    def __init__(self, k=100):
+        self.k = k
+        self.counts = {}
+        self.errors = {}
+        self.total = 0
+        self._heap = []  # (count, key) per tracked key; counts may be stale (too low)
+
+    def _pop_min(self):
+        # Counts only grow, so a stale entry is re-pushed with its current count
+        while True:
+            count, key = heapq.heappop(self._heap)
+            current = self.counts[key]
+            if current == count or current is count:  # a nan count never compares equal
+                return key, count
+            heapq.heappush(self._heap, (current, key))
+
+    def add(self, key, weight=1):
+        self.total += weight
+        counts = self.counts
+        if key in counts:
+            counts[key] += weight
+            return
+        if len(counts) < self.k:
+            counts[key] = weight
+            self.errors[key] = 0
+        else:
+            # Replace the smallest counter; its count becomes the new key's error
+            evicted, floor = self._pop_min()
+            del counts[evicted], self.errors[evicted]
+            counts[key] = floor + weight
+            self.errors[key] = floor
+        heapq.heappush(self._heap, (counts[key], key))
+
+    def min_count(self):
+        return min(self.counts.values()) if len(self.counts) >= self.k else 0
+
+    def top(self, n=None):
+        """[(key, count, error)] highest counts first."""
+        items = heapq.nlargest(n if n is not None else self.k, self.counts.items(), key=lambda item: item[1])
+        return [(key, count, self.errors[key]) for key, count in items]
+
+    def merge(self, other):
+        # Keys missing from a full summary may have had up to its min count
+        floor, other_floor = self.min_count(), other.min_count()
+        counts = {}
+        errors = {}
+        for key in self.counts.keys() | other.counts.keys():
+            counts[key] = self.counts.get(key, floor) + other.counts.get(key, other_floor)
+            errors[key] = self.errors.get(key, floor) + other.errors.get(key, other_floor)
+        kept = heapq.nlargest(self.k, counts.items(), key=lambda item: item[1])
+        self.counts = dict(kept)
+        self.errors = {key: errors[key] for key in self.counts}
+        self.total += other.total
+        self._heap = [(count, key) for key, count in self.counts.items()]
+        heapq.heapify(self._heap)
+        return self
+
+
+class TDigest:
+    """
+    Quantile estimates from at most ~compression centroids (merging
+    t-digest with the k1 scale function); accuracy is best in the tails.
+    """
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.centroids = []  # [(mean, weight)] sorted by mean
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._buffer = []
+
+    def add(self, value, weight=1):
+        self._buffer.append((value, weight))
+        self.count += weight
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def _q_limit(self, q):
+        # Largest cumulative fraction the current centroid may reach
+        k = self.compression / (2 * math.pi) * math.asin(2 * q - 1) + 1
+        return (math.sin(min(k * 2 * math.pi / self.compression, math.pi / 2)) + 1) / 2
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        points = sorted(self.centroids + self._buffer)
+        self._buffer = []
+        total = sum(weight for _, weight in points)
+        merged = []
+        mean, weight = points[0]
+        done = 0
+        limit = total * self._q_limit(0)
+        for point_mean, point_weight in points[1:]:
+            if done + weight + point_weight <= limit:
+                weight += point_weight
+                mean += (point_mean - mean) * point_weight / weight
+            else:
+                merged.append((mean, weight))
+                done += weight
+                limit = total * self._q_limit(done / total)
+                mean, weight = point_mean, point_weight
+        merged.append((mean, weight))
+        self.centroids = merged
+
+    def quantile(self, q):
+        self._compress()
+        if not self.centroids:
+            return None
+        if len(self.centroids) == 1:
+            return self.centroids[0][0]
+        target = q * self.count
+        # Interpolate between centroid centers, anchored at min and max
+        previous_position, previous_value = 0.0, self.min
+        position = 0.0
+        for mean, weight in self.centroids:
+            center = position + weight / 2
+            if target <= center:
+                span = center - previous_position
+                fraction = (target - previous_position) / span if span else 0.0
+                return previous_value + fraction * (mean - previous_value)
+            previous_position, previous_value = center, mean
+            position += weight
+        span = self.count - previous_position
+        fraction = (target - previous_position) / span if span else 0.0
+        return previous_value + fraction * (self.max - previous_value)
+
+    def merge(self, other):
+        other._compress()
+        self._buffer.extend(other.centroids)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+
+class ApproxSalesAggregator:
+    """
+    Opt-in approximate counterpart of SalesAggregator with constant memory
+    per group: no per-day, per-region or per-customer sets.
+
+    - region/date totals and per-product totals stay exact (plain sums);
+    - distinct customers per day, per region and overall: HyperLogLog;
+    - top customers by spend: Space-Saving; purchases per customer:
+      Count-Min Sketch;
+    - order value quantiles: t-digest.
+
+    region_wise_sales, daily_sales_trend, find_peak_sales_day,
+    top_selling_products and low_performing_products accept it as is
+    (HyperLogLog stands in for the customer sets); see approximate_analytics.
+    Every sketch merges, so partial aggregators from different partitions
+    or processes combine with merge().
+    """
+
+    approximate = True
+
+    def __init__(self, error=0.02, heavy_hitters=100, count_min_epsilon=0.0005, count_min_delta=0.01,
+                 compression=100):
+        self.error = error
+        self.heavy_hitters = heavy_hitters
+        self.count_min_epsilon = count_min_epsilon
+        self.count_min_delta = count_min_delta
+        self.compression = compression
+        self.revenue_units = 0
+        self.transaction_count = 0
+        self.min_date = None
+        self.max_date = None
+        self.region_stats = {}
+        self.product_stats = {}
+        self.date_stats = {}
+        self.customers = HyperLogLog(error)
+        self.top_customers = SpaceSaving(heavy_hitters)
+        self.purchase_counts = CountMinSketch(count_min_epsilon, count_min_delta)
+        self.order_values = TDigest(compression)
+
+    def add(self, txn):
+        quantity = txn.get("Quantity", 0)
+        unit_price = txn.get("UnitPrice", 0)
+        amount = quantity * unit_price
+        revenue = _to_units(amount)
+        date = txn.get("Date", "Unknown")
+        region = txn.get("Region", "Unknown")
+        product = txn.get("ProductName", "Unknown")
+        customer_id = txn.get("CustomerID", "Unknown")
+        customer_hash = hash64(customer_id)
+
+        self.revenue_units += revenue
+        self.transaction_count += 1
+        if self.min_date is None or date < self.min_date:
+            self.min_date = date
+        if self.max_date is None or date > self.max_date:
+            self.max_date = date
+
+        region_entry = self.region_stats.get(region)
+        if region_entry is None:
+            region_entry = self.region_stats[region] = {
+                'total_sales': 0,
+                'transaction_count': 0,
+                'unique_customers': HyperLogLog(self.error)
+            }
+        region_entry['total_sales'] += revenue
+        region_entry['transaction_count'] += 1
+        region_entry['unique_customers'].add_hash(customer_hash)
+
+        product_entry = self.product_stats.get(product)
+        if product_entry is None:
+            product_entry = self.product_stats[product] = {
+                'total_quantity': 0,
+                'total_revenue': 0
+            }
+        product_entry['total_quantity'] += quantity
+        product_entry['total_revenue'] += revenue
+
+        date_entry = self.date_stats.get(date)
+        if date_entry is None:
+            date_entry = self.date_stats[date] = {
+                'revenue': 0,
+                'transaction_count': 0,
+                'unique_customers': HyperLogLog(self.error)
+            }
+        date_entry['revenue'] += revenue
+        date_entry['transaction_count'] += 1
+        date_entry['unique_customers'].add_hash(customer_hash)
+
+        self.customers.add_hash(customer_hash)
+        self.top_customers.add(customer_id, revenue)
+        self.purchase_counts.add_hash(customer_hash)
+        self.order_values.add(amount)
+
+    @property
+    def total_revenue(self):
+        return _from_units(self.revenue_units)
+
+    def update(self, transactions):
+        for txn in transactions:
+            self.add(txn)
+        return self
+
+    def merge(self, other):
+        self.revenue_units += other.revenue_units
+        self.transaction_count += other.transaction_count
+        if other.min_date is not None and (self.min_date is None or other.min_date < self.min_date):
+            self.min_date = other.min_date
+        if other.max_date is not None and (self.max_date is None or other.max_date > self.max_date):
+            self.max_date = other.max_date
+        for stats, other_stats in ((self.region_stats, other.region_stats),
+                                   (self.product_stats, other.product_stats),
+                                   (self.date_stats, other.date_stats)):
+            for key, other_entry in other_stats.items():
+                entry = stats.get(key)
+                if entry is None:
+                    # A copy, so `other` can still be updated afterwards
+                    stats[key] = {field: value.copy() if isinstance(value, HyperLogLog) else value
+                                  for field, value in other_entry.items()}
+                    continue
+                for field, value in other_entry.items():
+                    if isinstance(value, HyperLogLog):
+                        entry[field].merge(value)
+                    else:
+                        entry[field] += value
+        self.customers.merge(other.customers)
+        self.top_customers.merge(other.top_customers)
+        self.purchase_counts.merge(other.purchase_counts)
+        self.order_values.merge(other.order_values)
+        return self
+
+    def error_bounds(self):
+        """Human-readable accuracy of each estimate, for reports."""
+        return {
+            'distinct_customers': f"±{self.customers.error * 100:.1f}% (1 std. error)",
+            'customer_spend': f"overestimate ≤ ₹{_from_units(self.top_customers.total) / self.top_customers.k:,.2f}",
+            'purchase_counts': (f"overestimate ≤ {self.count_min_epsilon * self.purchase_counts.total:,.0f} "
+                                f"with {(1 - self.count_min_delta) * 100:.0f}% probability"),
+            'order_value_quantiles': f"t-digest, compression {self.compression}"
+        }
+
+
+def approx_customer_analysis(aggregator, n=None):
+    """Top spenders (Space-Saving) with estimated spend, purchases and the spend error bound."""
+    customer_stats = {}
+    for customer_id, spent, error in aggregator.top_customers.top(n):
+        customer_stats[customer_id] = {
+            'total_spent': round(_from_units(spent), 2),
+            'purchase_count': aggregator.purchase_counts.estimate(customer_id),
+            'max_error': round(_from_units(error), 2)
+        }
+    return customer_stats
+
+
+def order_value_quantiles(aggregator, quantiles=(0.5, 0.9, 0.99)):
+    return {q: aggregator.order_values.quantile(q) for q in quantiles}
+
+
+def approximate_analytics(aggregator):
+    """compute_analytics for an ApproxSalesAggregator; customer figures are estimates."""
+    return {
+        'aggregator': aggregator,
+        'approximate': True,
+        'total_revenue': calculate_total_revenue(aggregator),
+        'region_stats': region_wise_sales(aggregator),
+        'region_customers': {region: len(stats['unique_customers'])
+                             for region, stats in aggregator.region_stats.items()},
+        'top_products': top_selling_products(aggregator),
+        'customer_stats': approx_customer_analysis(aggregator),
+        'daily_stats': daily_sales_trend(aggregator),
+        'peak_day': find_peak_sales_day(aggregator),
+        'low_products': low_performing_products(aggregator),
+        'distinct_customers': len(aggregator.customers),
+        'order_value_quantiles': order_value_quantiles(aggregator),
+        'error_bounds': aggregator.error_bounds()
+    }